@@ -0,0 +1,473 @@
+"""
+Materialized aggregates for SSRM AgGrid application.
+
+Precomputes per-group partial aggregates (sum, count, min, max and the row
+count) for configured ``rowGroupCols``/``valueCols`` combinations into side
+tables. Grouped requests whose filters only touch materialized group columns
+are answered by rolling these partials up instead of scanning the base table;
+avg is derived as sum / count. A JSON snapshot on disk records when each side
+table was built, so only one of the server's workers builds them at startup.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import SUPPORTED_AGG_FUNCTIONS
+from database import DatabaseManager
+from models import AgGridOptions
+
+logger = logging.getLogger(__name__)
+
+# Partial aggregates kept per value column; avg is derived as sum / count
+PARTIAL_AGGREGATES = ("sum", "count", "min", "max")
+
+# Alias of the row count computed for every group
+ROW_COUNT_ALIAS = "__rows"
+
+
+def partial_alias(field: str, agg: str) -> str:
+    """Name of the column holding one partial aggregate, e.g. ``revenue__sum``"""
+    return f"{field}__{agg}"
+
+
+def _column_names(column: Dict[str, Any]) -> set:
+    """Names a rowGroupCols/valueCols entry may be referenced by (id and field)"""
+    return {name for name in (column.get("id"), column.get("field")) if name}
+
+
+class MaterializedAggregate:
+    """
+    One side table of partial aggregates at the granularity of ``group_fields``.
+
+    Because partials can be rolled up again, the table serves any grouping over
+    a subset of its group columns, at any expanded level.
+    """
+
+    def __init__(
+        self,
+        source_table: str,
+        group_fields: Sequence[str],
+        value_fields: Sequence[str],
+    ):
+        """
+        Initialize materialized aggregate definition.
+
+        Args:
+            source_table: Table the partials are computed from
+            group_fields: Columns the side table is grouped by
+            value_fields: Columns whose partial aggregates are kept
+        """
+        self.source_table = source_table
+        self.group_fields = list(group_fields)
+        self.value_fields = sorted(set(value_fields))
+        digest = hashlib.sha1(
+            repr((source_table, self.group_fields, self.value_fields)).encode()
+        ).hexdigest()[:10]
+        self.table_name = f"ssrm_agg_{digest}"
+        # Only routed to once built; cleared while a full rebuild runs
+        self.ready = False
+        self.refreshed_at: Optional[float] = None
+
+    def covers(self, options: AgGridOptions) -> bool:
+        """Check if a grouped request can be answered from this side table"""
+        if not options.is_doing_grouping() or (options.pivotMode and options.pivotCols):
+            return False
+
+        group_fields = set(self.group_fields)
+        for group_col in options.rowGroupCols:
+            if not _column_names(group_col) <= group_fields:
+                return False
+        for value_col in options.valueCols:
+            if not _column_names(value_col) <= set(self.value_fields):
+                return False
+        # Only filters on group columns can be applied to pre-aggregated rows
+        return set(options.filterModel or {}) <= group_fields
+
+    def partial_columns(self) -> List[Tuple[str, str]]:
+        """(alias, rollup function) of every partial column, in table order"""
+        columns = [
+            (partial_alias(field, agg), "sum" if agg == "count" else agg)
+            for field in self.value_fields
+            for agg in PARTIAL_AGGREGATES
+        ]
+        columns.append((ROW_COUNT_ALIAS, "sum"))
+        return columns
+
+    def aggregate_sql(self, agg_func: str, field: str, escape_column) -> str:
+        """
+        SQL expression computing ``agg_func(field)`` from the partial columns.
+
+        Args:
+            agg_func: One of SUPPORTED_AGG_FUNCTIONS
+            field: Value column the aggregate is requested for
+            escape_column: Callable escaping a column name
+        """
+        if agg_func not in SUPPORTED_AGG_FUNCTIONS:
+            agg_func = "sum"
+        if agg_func == "avg":
+            total = escape_column(partial_alias(field, "sum"))
+            count = escape_column(partial_alias(field, "count"))
+            return f"sum({total}) * 1.0 / NULLIF(sum({count}), 0)"
+        if agg_func == "count":
+            return f"sum({escape_column(partial_alias(field, 'count'))})"
+        return f"{agg_func}({escape_column(partial_alias(field, agg_func))})"
+
+    def rollup_sql(self, alias: str, escape_column) -> str:
+        """SQL expression rolling one partial column up to a coarser grouping"""
+        rollup = dict(self.partial_columns())[alias]
+        return f"{rollup}({escape_column(alias)})"
+
+    def build_partials_sql(self, escape_column, where_sql: str = "") -> str:
+        """SELECT computing the side table's rows from the source table"""
+        group_cols = [escape_column(field) for field in self.group_fields]
+        select_parts = list(group_cols)
+        for field in self.value_fields:
+            for agg in PARTIAL_AGGREGATES:
+                select_parts.append(
+                    f"{agg}({escape_column(field)}) AS "
+                    f"{escape_column(partial_alias(field, agg))}"
+                )
+        select_parts.append(f"count(*) AS {escape_column(ROW_COUNT_ALIAS)}")
+        return (
+            f"SELECT {', '.join(select_parts)} FROM {self.source_table}"
+            f"{where_sql} GROUP BY {', '.join(group_cols)}"
+        )
+
+
+class AggregateStore:
+    """
+    Registry of materialized aggregates, with full and incremental refresh.
+
+    A full refresh rebuilds a side table under a temporary name and swaps it
+    in. An incremental refresh recomputes only the groups touched by a write:
+    their rows are deleted and re-aggregated from the source table in one
+    transaction, which also handles updates and deletes (min/max included).
+
+    With a snapshot, ``build_once`` lets the first worker to claim the lock file
+    next to it build the side tables; the others adopt them once the snapshot
+    records the build instead of rebuilding them concurrently.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[Path] = None,
+        max_age: Optional[float] = 600.0,
+        build_timeout: float = 600.0,
+    ):
+        """
+        Initialize aggregate store.
+
+        Args:
+            snapshot_path: JSON file shared by the workers; None builds in every worker
+            max_age: Seconds a side table recorded in the snapshot is adopted for; None always
+            build_timeout: Seconds to wait for another worker's build (and before
+                its lock file is considered abandoned)
+        """
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.max_age = max_age
+        self.build_timeout = build_timeout
+        self._aggregates: List[MaterializedAggregate] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.snapshot_loads = 0
+
+    def register(
+        self,
+        source_table: str,
+        group_fields: Sequence[str],
+        value_fields: Sequence[str],
+    ) -> MaterializedAggregate:
+        """Add a rowGroupCols/valueCols combination to materialize (built by ``refresh``)"""
+        aggregate = MaterializedAggregate(source_table, group_fields, value_fields)
+        with self._lock:
+            for existing in self._aggregates:
+                if existing.table_name == aggregate.table_name:
+                    return existing
+            self._aggregates.append(aggregate)
+        return aggregate
+
+    def aggregates(self, table_name: Optional[str] = None) -> List[MaterializedAggregate]:
+        """Get registered aggregates, optionally only those of one source table"""
+        with self._lock:
+            return [
+                aggregate
+                for aggregate in self._aggregates
+                if table_name is None or aggregate.source_table == table_name
+            ]
+
+    def find(
+        self, table_name: str, options: AgGridOptions
+    ) -> Optional[MaterializedAggregate]:
+        """
+        Find the smallest built side table that can answer a grouped request.
+
+        Returns:
+            Optional[MaterializedAggregate]: None if no materialization covers
+            the request's grouping, values and filters
+        """
+        candidates = [
+            aggregate
+            for aggregate in self.aggregates(table_name)
+            if aggregate.ready and aggregate.covers(options)
+        ]
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Fewer group columns means a coarser, smaller side table
+        return min(candidates, key=lambda aggregate: len(aggregate.group_fields))
+
+    def _escape(self, db_manager: DatabaseManager):
+        escape_char = db_manager.escape_char
+        return lambda column: f"{escape_char}{column}{escape_char}"
+
+    def _rebuild(self, db_manager: DatabaseManager, aggregate: MaterializedAggregate) -> None:
+        escape_column = self._escape(db_manager)
+        build_table = f"{aggregate.table_name}__build"
+        aggregate.ready = False
+        db_manager.execute_write(
+            [
+                (f"DROP TABLE IF EXISTS {build_table}", []),
+                (
+                    f"CREATE TABLE {build_table} AS "
+                    f"{aggregate.build_partials_sql(escape_column)}",
+                    [],
+                ),
+                (f"DROP TABLE IF EXISTS {aggregate.table_name}", []),
+                (f"ALTER TABLE {build_table} RENAME TO {aggregate.table_name}", []),
+            ]
+        )
+
+    def _refresh_groups(
+        self,
+        db_manager: DatabaseManager,
+        aggregate: MaterializedAggregate,
+        changed_groups: Iterable[Dict[str, Any]],
+    ) -> None:
+        escape_column = self._escape(db_manager)
+        columns = list(aggregate.group_fields) + [
+            alias for alias, _ in aggregate.partial_columns()
+        ]
+        column_list = ", ".join(escape_column(column) for column in columns)
+
+        statements = []
+        for group in changed_groups:
+            conditions = []
+            params = []
+            for field, value in group.items():
+                if value is None:
+                    conditions.append(f"{escape_column(field)} IS NULL")
+                else:
+                    conditions.append(f"{escape_column(field)} = {db_manager.placeholder}")
+                    params.append(value)
+            where_sql = f" WHERE {' AND '.join(conditions)}"
+            statements.append((f"DELETE FROM {aggregate.table_name}{where_sql}", params))
+            statements.append(
+                (
+                    f"INSERT INTO {aggregate.table_name} ({column_list}) "
+                    f"{aggregate.build_partials_sql(escape_column, where_sql)}",
+                    params,
+                )
+            )
+        db_manager.execute_write(statements)
+
+    @staticmethod
+    def _key(db_manager: DatabaseManager, aggregate: MaterializedAggregate) -> str:
+        """Snapshot key of a side table, without connection details such as passwords"""
+        config = db_manager.config
+        database = repr((config.database_type, config.connection_string))
+        digest = hashlib.sha1(database.encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{aggregate.table_name}"
+
+    def _read_snapshot(self) -> Dict[str, float]:
+        if self.snapshot_path is None:
+            return {}
+        try:
+            return json.loads(self.snapshot_path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable aggregate snapshot %s: %s", self.snapshot_path, e)
+            return {}
+
+    def _write_snapshot(
+        self, db_manager: DatabaseManager, aggregates: Sequence[MaterializedAggregate]
+    ) -> None:
+        if self.snapshot_path is None or not aggregates:
+            return
+        try:
+            data = self._read_snapshot()
+            for aggregate in aggregates:
+                data[self._key(db_manager, aggregate)] = aggregate.refreshed_at
+            # Written aside and renamed, so other workers never read a partial file
+            partial_path = self.snapshot_path.with_name(
+                f"{self.snapshot_path.name}.{os.getpid()}.tmp"
+            )
+            partial_path.write_text(json.dumps(data))
+            os.replace(partial_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Could not write aggregate snapshot %s: %s", self.snapshot_path, e)
+
+    def _adopt(self, db_manager: DatabaseManager, aggregate: MaterializedAggregate) -> bool:
+        """Mark a side table ready if the snapshot records a recent enough build"""
+        refreshed_at = self._read_snapshot().get(self._key(db_manager, aggregate))
+        if refreshed_at is None:
+            return False
+        if self.max_age is not None and time.time() - refreshed_at >= self.max_age:
+            return False
+        aggregate.ready = True
+        aggregate.refreshed_at = refreshed_at
+        self.snapshot_loads += 1
+        return True
+
+    def _claim(self) -> bool:
+        """Create the build lock file; False if another worker holds it"""
+        lock_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.lock")
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime < self.build_timeout:
+                        return False
+                except FileNotFoundError:
+                    continue
+                # Left behind by a worker that stopped while building
+                logger.warning("Removing abandoned aggregate build lock %s", lock_path)
+                lock_path.unlink(missing_ok=True)
+        return False
+
+    def _release(self) -> None:
+        lock_path = self.snapshot_path.with_name(f"{self.snapshot_path.name}.lock")
+        lock_path.unlink(missing_ok=True)
+
+    def build_once(self, db_manager: DatabaseManager, poll_interval: float = 0.5) -> int:
+        """
+        Build the side tables of the configured table in one worker only.
+
+        Side tables the snapshot records as built within ``max_age`` are adopted.
+        The rest are built by the worker claiming the lock file, while the other
+        workers wait up to ``build_timeout`` seconds to adopt them; side tables
+        still not built are left to requests' fallback to the source table.
+
+        Returns:
+            int: Number of side tables built by this worker
+        """
+        pending = [
+            aggregate
+            for aggregate in self.aggregates(db_manager.table_name)
+            if not self._adopt(db_manager, aggregate)
+        ]
+        if not pending:
+            return 0
+        if self.snapshot_path is None:
+            return self._refresh(db_manager, pending)
+
+        if self._claim():
+            try:
+                return self._refresh(db_manager, pending)
+            finally:
+                self._release()
+
+        deadline = time.monotonic() + self.build_timeout
+        while pending and time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            pending = [aggregate for aggregate in pending if not self._adopt(db_manager, aggregate)]
+        if pending:
+            logger.warning(
+                "Gave up waiting for another worker to build %d materialized aggregates",
+                len(pending),
+            )
+        return 0
+
+    def refresh(
+        self,
+        db_manager: DatabaseManager,
+        changed_groups: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Bring the side tables of the configured table up to date.
+
+        Args:
+            db_manager: Database manager of the source table
+            changed_groups: Group column values touched by a write, e.g.
+                ``[{"sector": "Tech"}]`` (include the old and new group when a
+                row moves). Side tables whose group columns do not include all
+                of a group's keys are fully rebuilt; None rebuilds everything.
+
+        Returns:
+            int: Number of side tables refreshed
+        """
+        return self._refresh(db_manager, self.aggregates(db_manager.table_name), changed_groups)
+
+    def _refresh(
+        self,
+        db_manager: DatabaseManager,
+        aggregates: Sequence[MaterializedAggregate],
+        changed_groups: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        refreshed = []
+        for aggregate in aggregates:
+            try:
+                if (
+                    aggregate.ready
+                    and changed_groups is not None
+                    and all(
+                        group and set(group) <= set(aggregate.group_fields)
+                        for group in changed_groups
+                    )
+                ):
+                    self._refresh_groups(db_manager, aggregate, changed_groups)
+                else:
+                    self._rebuild(db_manager, aggregate)
+                    self.builds += 1
+                aggregate.ready = True
+                aggregate.refreshed_at = time.time()
+                refreshed.append(aggregate)
+            except Exception:
+                # Never route to a side table that may have missed a write
+                aggregate.ready = False
+                logger.exception("Error refreshing materialized aggregate %s", aggregate.table_name)
+        self._write_snapshot(db_manager, refreshed)
+        return len(refreshed)
+
+    async def refresh_async(
+        self,
+        db_manager: DatabaseManager,
+        changed_groups: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """Run ``refresh`` on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            db_manager.executor, self.refresh, db_manager, changed_groups
+        )
+
+    def stats(self) -> dict:
+        """Get routing counters and the state of every side table"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "builds": self.builds,
+            "snapshot_loads": self.snapshot_loads,
+            "aggregates": [
+                {
+                    "table": aggregate.table_name,
+                    "source_table": aggregate.source_table,
+                    "group_fields": aggregate.group_fields,
+                    "value_fields": aggregate.value_fields,
+                    "ready": aggregate.ready,
+                    "refreshed_at": aggregate.refreshed_at,
+                }
+                for aggregate in self.aggregates()
+            ],
+        }
@@ -0,0 +1,507 @@
+"""
+Benchmark harness for SSRM AgGrid application.
+
+Generates synthetic SQLite/DuckDB tables (10^5 to 10^8 rows) and replays AG
+Grid request traces against ``perform_ssrm_query``, timing ``QueryBuilder`` and
+``format_query_results`` on their own as well. Reports p50/p95/p99 latency
+and peak memory per trace, and can compare a run against a saved baseline.
+
+Usage:
+    python benchmark.py --rows 1000000 --backend sqlite duckdb
+    python benchmark.py --rows 1000000 --json results.json
+    python benchmark.py --rows 1000000 --baseline results.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import resource
+import sqlite3
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cache import CountCache
+from formatters import format_query_results
+from grouping import GroupingEngine
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+
+try:
+    import duckdb  # type: ignore[import]
+
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "trades"
+
+# Cardinalities of the generated columns; traces use the same values
+SECTOR_COUNT = 11
+DESK_COUNT = 40
+SYMBOL_COUNT = 5000
+REGIONS = ("US", "EU", "APAC", "LATAM")
+DATE_RANGE_DAYS = 1826
+
+# Rows inserted per statement while generating a table
+GENERATE_CHUNK_ROWS = 1_000_000
+
+
+# Multipliers of the per-column row id hashes, distinct so columns are uncorrelated
+_HASH_MULTIPLIERS = (
+    2654435761,
+    2246822519,
+    3266489917,
+    668265263,
+    374761393,
+    1103515245,
+    1664525,
+    22695477,
+)
+
+
+def _hash_sql(salt: int, modulus: int) -> str:
+    """Deterministic pseudo-random integer in [0, modulus) derived from the row id ``x``"""
+    return f"((x * {_HASH_MULTIPLIERS[salt]} + {salt}) % 1000003 % {modulus})"
+
+
+def _select_rows_sql(backend: str) -> str:
+    """SELECT list producing one synthetic trade per row id ``x``"""
+    region_cases = " ".join(
+        f"WHEN {index} THEN '{region}'" for index, region in enumerate(REGIONS)
+    )
+    if backend == "duckdb":
+        trade_date = f"DATE '2020-01-01' + CAST({_hash_sql(5, DATE_RANGE_DAYS)} AS INTEGER)"
+    else:
+        trade_date = (
+            f"date('2020-01-01', '+' || {_hash_sql(5, DATE_RANGE_DAYS)} || ' days')"
+        )
+    return (
+        "SELECT x, "
+        f"'SYM' || CAST({_hash_sql(1, SYMBOL_COUNT)} AS VARCHAR), "
+        f"'Sector ' || CAST({_hash_sql(2, SECTOR_COUNT)} AS VARCHAR), "
+        f"CASE {_hash_sql(3, len(REGIONS))} {region_cases} END, "
+        f"'Desk ' || CAST({_hash_sql(4, DESK_COUNT)} AS VARCHAR), "
+        f"{trade_date}, "
+        f"1 + {_hash_sql(6, 10000)}, "
+        f"{_hash_sql(7, 1000000)} / 100.0"
+    )
+
+
+def generate_table(backend: str, path: Path, rows: int) -> Path:
+    """
+    Create a synthetic trades table, unless the file already exists.
+
+    The data only depends on ``rows``, so repeated runs and both backends
+    see identical tables.
+
+    Args:
+        backend: "sqlite" or "duckdb"
+        path: Database file to create
+        rows: Number of rows to generate
+
+    Returns:
+        Path: The database file
+    """
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    partial_path = path.with_name(path.name + ".partial")
+    partial_path.unlink(missing_ok=True)
+
+    columns = (
+        "id BIGINT PRIMARY KEY, symbol VARCHAR, sector VARCHAR, region VARCHAR, "
+        "desk VARCHAR, trade_date {date_type}, quantity INTEGER, price DOUBLE"
+    )
+    if backend == "duckdb":
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("DuckDB is not installed. Install with: pip install duckdb")
+        connection = duckdb.connect(str(partial_path))
+        connection.execute(f"CREATE TABLE {TABLE_NAME} ({columns.format(date_type='DATE')})")
+        insert_sql = (
+            f"INSERT INTO {TABLE_NAME} {_select_rows_sql(backend)} FROM range(?, ?) r(x)"
+        )
+    else:
+        connection = sqlite3.connect(partial_path)
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(
+            f"CREATE TABLE {TABLE_NAME} "
+            f"({columns.format(date_type='TEXT').replace('BIGINT PRIMARY KEY', 'INTEGER PRIMARY KEY')})"
+        )
+        insert_sql = (
+            "WITH RECURSIVE seq(x) AS (SELECT ? UNION ALL SELECT x + 1 FROM seq WHERE x + 1 < ?) "
+            f"INSERT INTO {TABLE_NAME} {_select_rows_sql(backend)} FROM seq"
+        )
+
+    for start in range(0, rows, GENERATE_CHUNK_ROWS):
+        end = min(start + GENERATE_CHUNK_ROWS, rows)
+        connection.execute(insert_sql, [start + 1, end + 1])
+        logger.info("Generated %d/%d rows of %s", end, rows, path.name)
+    if backend == "sqlite":
+        connection.commit()
+        connection.execute("ANALYZE")
+        connection.commit()
+    connection.close()
+
+    partial_path.rename(path)
+    logger.info(
+        "Generated %s with %d rows in %.1f s", path, rows, time.perf_counter() - started
+    )
+    return path
+
+
+def deep_scroll_trace(rows: int, block_size: int) -> List[Dict[str, Any]]:
+    """Sequential blocks from the top, then jumps deep into the table"""
+    requests = [
+        {"startRow": start, "endRow": start + block_size}
+        for start in range(0, min(rows, 10 * block_size), block_size)
+    ]
+    for fraction in (0.1, 0.5, 0.9):
+        start = int(rows * fraction) // block_size * block_size
+        requests.append({"startRow": start, "endRow": start + block_size})
+    return requests
+
+
+def multi_sort_trace(rows: int, block_size: int) -> List[Dict[str, Any]]:
+    """Deep scroll sorted on three columns with mixed directions"""
+    sort_model = [
+        {"colId": "sector", "sort": "asc"},
+        {"colId": "price", "sort": "desc"},
+        {"colId": "id", "sort": "asc"},
+    ]
+    return [
+        {**request, "sortModel": sort_model}
+        for request in deep_scroll_trace(rows, block_size)
+    ]
+
+
+def grouped_expand_trace(rows: int, block_size: int) -> List[Dict[str, Any]]:
+    """Top-level groups, then expanding sectors, regions and desks down to leaf rows"""
+    grouping = {
+        "rowGroupCols": [
+            {"id": "sector", "field": "sector"},
+            {"id": "region", "field": "region"},
+            {"id": "desk", "field": "desk"},
+        ],
+        "valueCols": [
+            {"id": "quantity", "field": "quantity", "aggFunc": "sum"},
+            {"id": "price", "field": "price", "aggFunc": "avg"},
+        ],
+    }
+    requests = [{"startRow": 0, "endRow": block_size, "groupKeys": [], **grouping}]
+    for sector in range(3):
+        sector_key = f"Sector {sector}"
+        requests.append(
+            {"startRow": 0, "endRow": block_size, "groupKeys": [sector_key], **grouping}
+        )
+        for region in REGIONS[:2]:
+            requests.append(
+                {
+                    "startRow": 0,
+                    "endRow": block_size,
+                    "groupKeys": [sector_key, region],
+                    **grouping,
+                }
+            )
+        requests.append(
+            {
+                "startRow": 0,
+                "endRow": block_size,
+                "groupKeys": [sector_key, REGIONS[0], "Desk 0"],
+                **grouping,
+            }
+        )
+    return requests
+
+
+def set_filter_trace(rows: int, block_size: int) -> List[Dict[str, Any]]:
+    """Deep scroll with set filters on two columns, narrowed step by step"""
+    filter_models = [
+        {"region": {"filterType": "set", "values": ["US", "EU"]}},
+        {
+            "region": {"filterType": "set", "values": ["US", "EU"]},
+            "sector": {"filterType": "set", "values": ["Sector 1", "Sector 2", "Sector 3"]},
+        },
+        {
+            "region": {"filterType": "set", "values": ["US"]},
+            "sector": {"filterType": "set", "values": ["Sector 1"]},
+        },
+    ]
+    matching = rows // 2
+    return [
+        {**request, "filterModel": filter_model}
+        for filter_model in filter_models
+        for request in deep_scroll_trace(matching, block_size)[:5]
+    ]
+
+
+TRACES: Dict[str, Callable[[int, int], List[Dict[str, Any]]]] = {
+    "deep_scroll": deep_scroll_trace,
+    "multi_sort": multi_sort_trace,
+    "grouped_expand": grouped_expand_trace,
+    "set_filter": set_filter_trace,
+}
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Linearly interpolated ``q``-th percentile (0-100) of the samples"""
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples_ms: Sequence[float], peak_bytes: int) -> Dict[str, float]:
+    """Latency percentiles (ms) and peak traced memory (MiB) of one benchmark"""
+    return {
+        "count": len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms) if samples_ms else math.nan,
+        "peak_mib": peak_bytes / (1024 * 1024),
+    }
+
+
+def _ag_rows(request: Dict[str, Any]) -> AgRows:
+    return AgRows(
+        query=f"SELECT * FROM {TABLE_NAME}", options=AgGridOptions(**request), escape='"'
+    )
+
+
+async def _replay(
+    db_manager, requests: List[Dict[str, Any]], with_caches: bool, samples: List[float]
+) -> None:
+    """Run a trace once, appending each request's latency (ms) to ``samples``"""
+    count_cache = CountCache() if with_caches else None
+    grouping_engine = GroupingEngine() if with_caches else None
+    for request in requests:
+        started = time.perf_counter()
+        await perform_ssrm_query(
+            db_manager,
+            _ag_rows(request),
+            count_cache=count_cache,
+            grouping_engine=grouping_engine,
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+def _traced_peak(function: Callable[[], Any]) -> int:
+    """Peak Python memory allocated while running ``function``, in bytes"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_ssrm(
+    db_manager, requests: List[Dict[str, Any]], repeat: int, with_caches: bool
+) -> Dict[str, float]:
+    """Replay a trace ``repeat`` times through ``perform_ssrm_query``"""
+    samples: List[float] = []
+    asyncio.run(_replay(db_manager, requests, with_caches, []))  # Warm-up
+    for _ in range(repeat):
+        asyncio.run(_replay(db_manager, requests, with_caches, samples))
+    # Memory is traced in a separate pass, since tracing slows allocations down
+    peak = _traced_peak(lambda: asyncio.run(_replay(db_manager, requests, with_caches, [])))
+    return summarize(samples, peak)
+
+
+def benchmark_query_builder(
+    db_manager, requests: List[Dict[str, Any]], repeat: int
+) -> Dict[str, float]:
+    """Time building the main and count queries of every request of a trace"""
+
+    def build_all(samples: List[float]) -> None:
+        for request in requests:
+            started = time.perf_counter()
+            query_builder = QueryBuilder(
+                ag_rows=_ag_rows(request),
+                table_name=db_manager.table_name,
+                escape_char=db_manager.escape_char,
+                placeholder=db_manager.placeholder,
+            )
+            query_builder.build_query()
+            query_builder.build_count_query()
+            samples.append((time.perf_counter() - started) * 1000)
+
+    samples: List[float] = []
+    for _ in range(repeat * 10):
+        build_all(samples)
+    return summarize(samples, _traced_peak(lambda: build_all([])))
+
+
+def benchmark_formatting(
+    db_manager, requests: List[Dict[str, Any]], repeat: int
+) -> Dict[str, float]:
+    """Time ``format_query_results`` on the raw rows of every request of a trace"""
+    blocks = []
+    for request in requests:
+        query_builder = QueryBuilder(
+            ag_rows=_ag_rows(request),
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+        )
+        blocks.append(db_manager.execute_query(*query_builder.build_query()))
+
+    def format_all(samples: List[float]) -> None:
+        for block in blocks:
+            started = time.perf_counter()
+            format_query_results(block)
+            samples.append((time.perf_counter() - started) * 1000)
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        format_all(samples)
+    return summarize(samples, _traced_peak(lambda: format_all([])))
+
+
+def run_benchmarks(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """
+    Run every selected trace on every selected backend.
+
+    Returns:
+        Dict[str, Dict[str, float]]: "backend/rows/component/trace" -> summary
+    """
+    results: Dict[str, Dict[str, float]] = {}
+    for backend in args.backend:
+        path = generate_table(
+            backend, Path(args.data_dir) / f"{TABLE_NAME}_{args.rows}.{backend}.db", args.rows
+        )
+        db_manager = create_database_manager(
+            database_type=backend, file_path=path, table_name=TABLE_NAME
+        )
+        try:
+            for trace in args.trace:
+                requests = TRACES[trace](args.rows, args.block_size)
+                prefix = f"{backend}/{args.rows}"
+                results[f"{prefix}/ssrm/{trace}"] = benchmark_ssrm(
+                    db_manager, requests, args.repeat, args.with_caches
+                )
+                results[f"{prefix}/query_builder/{trace}"] = benchmark_query_builder(
+                    db_manager, requests, args.repeat
+                )
+                results[f"{prefix}/format/{trace}"] = benchmark_formatting(
+                    db_manager, requests, args.repeat
+                )
+                logger.info("Finished %s on %s", trace, backend)
+        finally:
+            db_manager.close()
+    return results
+
+
+def print_report(
+    results: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Dict[str, float]]] = None,
+) -> None:
+    """Print a latency/memory table, with the p95 change against a baseline"""
+    name_width = max([len(name) for name in results] + [9])
+    header = f"{'benchmark':<{name_width}} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak MiB':>9}"
+    if baseline is not None:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, summary in results.items():
+        line = (
+            f"{name:<{name_width}} {summary['count']:>6} {summary['p50_ms']:>10.3f} "
+            f"{summary['p95_ms']:>10.3f} {summary['p99_ms']:>10.3f} {summary['peak_mib']:>9.2f}"
+        )
+        if baseline is not None:
+            base = baseline.get(name)
+            change = _relative_change(summary, base)
+            line += f" {change:>+11.1%}" if change is not None else f" {'-':>12}"
+        print(line)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_mib = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(f"\nProcess peak RSS: {rss_mib:.1f} MiB")
+
+
+def _relative_change(
+    summary: Dict[str, float], base: Optional[Dict[str, float]]
+) -> Optional[float]:
+    """Relative p95 change against a baseline summary (None if not comparable)"""
+    if not base or not base.get("p95_ms"):
+        return None
+    return summary["p95_ms"] / base["p95_ms"] - 1
+
+
+def find_regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[Tuple[str, float]]:
+    """Benchmarks whose p95 grew by more than ``threshold`` (e.g. 0.2 for 20%)"""
+    regressions = []
+    for name, summary in results.items():
+        change = _relative_change(summary, baseline.get(name))
+        if change is not None and change > threshold:
+            regressions.append((name, change))
+    return regressions
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the SSRM query path")
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="Rows of the synthetic table (10^5 to 10^8)"
+    )
+    parser.add_argument(
+        "--backend", nargs="+", choices=["sqlite", "duckdb"], default=["sqlite"]
+    )
+    parser.add_argument("--trace", nargs="+", choices=sorted(TRACES), default=list(TRACES))
+    parser.add_argument("--block-size", type=int, default=100, help="Rows per SSRM block")
+    parser.add_argument("--repeat", type=int, default=5, help="Replays of each trace")
+    parser.add_argument(
+        "--with-caches",
+        action="store_true",
+        help="Use a count cache and grouping engine, as the app does",
+    )
+    parser.add_argument(
+        "--data-dir", default="bench_data", help="Directory of the generated tables"
+    )
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results written with --json")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative p95 growth over the baseline that counts as a regression",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    results = run_benchmarks(args)
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(results, baseline)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for name, change in regressions:
+            print(f"REGRESSION {name}: p95 {change:+.1%}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
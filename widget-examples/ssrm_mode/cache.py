@@ -0,0 +1,369 @@
+"""
+In-process caching utilities for SSRM AgGrid application.
+Provides a thread-safe LRU cache with per-entry expiry, the SSRM row-count cache
+and a byte-budgeted cache of result blocks.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from formatters import ColumnarRows
+from models import AgGridOptions
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire ``ttl`` seconds after being stored.
+
+    Lookups refresh an entry's LRU position but not its expiry, so stale data
+    never outlives ``ttl`` no matter how often it is read.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum number of entries before least recently used ones are evicted
+            ttl: Seconds an entry stays valid; None disables expiry
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value, or ``default`` if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting least recently used entries if full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop cached entries.
+
+        Args:
+            predicate: Called with each key; matching entries are dropped.
+                Drops everything when omitted.
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            if predicate is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+def normalize_filter_model(filter_model: dict) -> dict:
+    """Normalize a filterModel so equivalent filters produce the same cache key"""
+    normalized = {}
+    for field_name, filter_config in (filter_model or {}).items():
+        filter_config = dict(filter_config)
+        if isinstance(filter_config.get("values"), list):
+            # Set filter values are order-independent
+            filter_config["values"] = sorted(filter_config["values"], key=str)
+        normalized[field_name] = filter_config
+    return normalized
+
+
+class CountCache:
+    """
+    Cache of SSRM row counts keyed by the parts of a request that affect the count.
+
+    startRow/endRow and sortModel never change the count, so every block of one
+    filtered (and grouped) view shares a single cached COUNT result. Like the
+    block cache, every table carries a version stamp: a count computed while
+    the table was invalidated is not stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 60.0):
+        """
+        Initialize count cache.
+
+        Args:
+            max_entries: Maximum number of distinct views whose count is kept
+            ttl: Seconds a count stays valid; None keeps counts until invalidated
+        """
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+        # Bumped by invalidate(None), so it also covers tables not seen yet
+        self._epoch = 0
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stale_sets = 0
+
+    @staticmethod
+    def make_key(table_name: str, options: AgGridOptions) -> Tuple[str, str]:
+        """Build the cache key for a table and request"""
+        payload = json.dumps(
+            {
+                "filterModel": normalize_filter_model(options.filterModel),
+                "groupKeys": options.groupKeys or [],
+                "rowGroupCols": options.rowGroupCols or [],
+                # Pivot without row groups counts its single aggregate row
+                "pivotMode": bool(options.pivotMode),
+                "pivotCols": options.pivotCols or [],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return table_name, payload
+
+    def get(self, table_name: str, options: AgGridOptions) -> Optional[int]:
+        """Get the cached count for a view, if any"""
+        return self._cache.get(self.make_key(table_name, options))
+
+    def table_version(self, table_name: str) -> Tuple[int, int]:
+        """Get the current version stamp of a table"""
+        return self._epoch, self._versions.get(table_name, 0)
+
+    def set(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        count: int,
+        version: Optional[Tuple[int, int]] = None,
+    ) -> bool:
+        """
+        Store the count for a view.
+
+        Args:
+            table_name: Table the count was read from
+            options: Request the count answers
+            count: The row count
+            version: Table version observed before running the count query. If
+                the table was invalidated since, the count is not stored.
+
+        Returns:
+            bool: False if the count was outdated and not stored
+        """
+        key = self.make_key(table_name, options)
+        with self._lock:
+            if version is not None and version != self.table_version(table_name):
+                self.stale_sets += 1
+                return False
+            self._cache.set(key, count)
+        return True
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """
+        Drop cached counts, e.g. after rows were written.
+
+        Counts still being computed from before the call are not stored
+        (see the ``version`` argument of ``set``).
+
+        Args:
+            table_name: Only drop counts for this table; drops all when omitted
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            if table_name is None:
+                self._epoch += 1
+                return self._cache.invalidate()
+            self._versions[table_name] = self._versions.get(table_name, 0) + 1
+            return self._cache.invalidate(lambda key: key[0] == table_name)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and current size"""
+        return {
+            "entries": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "stale_sets": self.stale_sets,
+        }
+
+
+def estimate_rows_size(rows: Union[List[Dict[str, Any]], ColumnarRows]) -> int:
+    """
+    Estimate the memory held by a block of result rows, in bytes.
+
+    Counts the row dicts and their values; keys are shared column-name strings
+    and are not counted per row.
+    """
+    if isinstance(rows, ColumnarRows):
+        return rows.size_bytes()
+
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class BlockCache:
+    """
+    LRU cache of formatted SSRM blocks bounded by an approximate byte budget.
+
+    Entries are keyed by the table and the canonical signature of the full
+    request (sort, filter, grouping and block range). Every table carries a
+    version stamp recorded with each entry; bumping the stamp after a write
+    makes all of that table's blocks stale without scanning the cache.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: Optional[float] = None):
+        """
+        Initialize block cache.
+
+        Args:
+            max_bytes: Approximate memory budget for cached rows
+            ttl: Seconds a block stays valid (None to keep blocks until evicted)
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        # (table, signature) -> (table version, total_count, rows, size, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, int, list, int, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def table_version(self, table_name: str) -> int:
+        """Get the current version stamp of a table"""
+        return self._versions.get(table_name, 0)
+
+    def _fresh_entry(self, key: Tuple[str, str]) -> Optional[tuple]:
+        """Get an entry, dropping it if stale or expired (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        version, _, _, size, expires_at = entry
+        if version != self.table_version(key[0]) or (
+            expires_at is not None and expires_at <= time.monotonic()
+        ):
+            # Table changed since the block was computed, or the block expired
+            del self._entries[key]
+            self.current_bytes -= size
+            return None
+        return entry
+
+    def get(
+        self, table_name: str, options: AgGridOptions
+    ) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """Get the cached (total_count, rows) for a request, if fresh"""
+        key = (table_name, options.signature())
+        with self._lock:
+            entry = self._fresh_entry(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def contains(self, table_name: str, options: AgGridOptions) -> bool:
+        """Check if a fresh block is cached, without counting a hit or miss"""
+        with self._lock:
+            return self._fresh_entry((table_name, options.signature())) is not None
+
+    def set(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        total_count: int,
+        rows: List[Dict[str, Any]],
+        version: Optional[int] = None,
+    ) -> bool:
+        """
+        Store a formatted block.
+
+        Args:
+            table_name: Table the block was read from
+            options: Request the block answers
+            total_count: Row count returned alongside the block
+            rows: Formatted rows; must not be mutated after caching
+            version: Table version observed before running the query. A write
+                that bumped the version while the query ran makes the block
+                immediately stale instead of caching outdated rows as fresh.
+
+        Returns:
+            bool: False if the block alone exceeds the budget and was not cached
+        """
+        size = estimate_rows_size(rows)
+        if size > self.max_bytes:
+            return False
+
+        key = (table_name, options.signature())
+        with self._lock:
+            if version is None:
+                version = self.table_version(table_name)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[3]
+
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (version, total_count, rows, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted[3]
+                self.evictions += 1
+        return True
+
+    def invalidate(self, table_name: str) -> int:
+        """
+        Mark all cached blocks of a table stale by bumping its version stamp.
+
+        Returns:
+            int: The table's new version
+        """
+        with self._lock:
+            self._versions[table_name] = self.table_version(table_name) + 1
+            return self._versions[table_name]
+
+    def stats(self) -> dict:
+        """Get hit/miss/eviction counters and memory usage"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,425 @@
+"""
+Change feed for SSRM AgGrid application.
+
+Instead of refreshing every block after a write, a grid can ask which rows
+were added, updated and removed since a version it got earlier and apply them
+as an AG Grid transaction. :class:`ChangeFeed` tracks changes either with
+triggers writing a change log table (SQLite) or with an ``updated_at``
+watermark column (any database).
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import DatabaseManager
+from filters import TRUE, And, InValues, Predicate, simplify
+from formatters import clean_json_data, format_query_results
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FEED_MODES = ("auto", "triggers", "watermark")
+
+# Keys per IN list when reading changed rows, below SQLite's variable limit
+_KEY_CHUNK_SIZE = 500
+
+# Column flagging rows inserted since the client's version in watermark mode
+_ADDED_ALIAS = "__ssrm_added"
+
+
+def collapse_operations(entries: List[Tuple[str, Any]]) -> Dict[Any, str]:
+    """
+    Net effect of a sequence of logged operations on each row key.
+
+    Args:
+        entries: (op, key) pairs in log order; op is insert, update or delete
+
+    Returns:
+        Dict[Any, str]: Key -> "add", "update" or "remove", in first-seen order;
+        rows inserted and deleted within the sequence are left out
+    """
+    first: Dict[Any, str] = {}
+    last: Dict[Any, str] = {}
+    for op, key in entries:
+        first.setdefault(key, op)
+        last[key] = op
+
+    changes = {}
+    for key, first_op in first.items():
+        if last[key] == "delete":
+            if first_op != "insert":
+                changes[key] = "remove"
+        elif first_op == "insert":
+            changes[key] = "add"
+        else:
+            changes[key] = "update"
+    return changes
+
+
+class ChangeFeed:
+    """
+    Rows added, updated and removed since a client-provided version.
+
+    In ``triggers`` mode, insert/update/delete triggers append to a
+    ``{table}_ssrm_changes`` log whose sequence number is the version. The
+    log is pruned to ``retention`` entries; clients older than that get
+    ``reset`` and must reload. In ``watermark`` mode the version holds the
+    largest ``updated_at_column`` value. Changed rows created since (by
+    ``created_at_column``, or a ``keyset_column`` above the version's largest
+    key) are reported as adds, the others as updates. Without either, inserts
+    cannot be told from updates: the version holds the row count and a grown
+    table gets ``reset``. Deletes are not seen in watermark mode.
+    """
+
+    def __init__(
+        self,
+        key_column: str = "id",
+        mode: str = "auto",
+        updated_at_column: Optional[str] = None,
+        max_changes: int = 10_000,
+        retention: int = 100_000,
+        created_at_column: Optional[str] = None,
+    ):
+        """
+        Initialize change feed.
+
+        Args:
+            key_column: Column identifying rows (the grid's row id)
+            mode: "triggers" (SQLite), "watermark", or "auto" to pick by database
+            updated_at_column: Column set to the write time on insert and update
+                (required by watermark mode)
+            max_changes: Log entries (or watermark rows) read per call
+            retention: Log entries kept for clients catching up
+            created_at_column: Column set to the write time on insert only, so
+                watermark mode can report inserted rows as adds
+        """
+        if mode not in CHANGE_FEED_MODES:
+            raise ValueError(f"Unsupported change feed mode: {mode}")
+        self.key_column = key_column
+        self.mode = mode
+        self.updated_at_column = updated_at_column
+        self.max_changes = max_changes
+        self.retention = retention
+        self.created_at_column = created_at_column
+        # table -> mode in use
+        self._modes: Dict[str, str] = {}
+        self.reads = 0
+        self.resets = 0
+        self.rows_sent = 0
+        self.pruned = 0
+
+    @staticmethod
+    def log_table(table_name: str) -> str:
+        """Name of the change log table of a table"""
+        return f"{table_name}_ssrm_changes"
+
+    def _resolve_mode(self, db_manager: DatabaseManager) -> str:
+        database_type = db_manager.config.database_type
+        mode = self.mode
+        if mode == "auto":
+            mode = "triggers" if database_type == "sqlite" else "watermark"
+        if mode == "triggers" and database_type != "sqlite":
+            raise ValueError(f"Change log triggers are not available for {database_type}")
+        if mode == "watermark" and not self.updated_at_column:
+            raise ValueError("The watermark change feed needs an updated_at_column")
+        return mode
+
+    def refresh(self, db_manager: DatabaseManager) -> str:
+        """
+        Set up change tracking of the configured table.
+
+        Creates the log table if missing and (re)creates its triggers, so a
+        changed ``key_column`` takes effect. Idempotent.
+
+        Returns:
+            str: Mode in use
+        """
+        if db_manager.is_sharded:
+            raise ValueError("The change feed does not support sharded tables")
+        mode = self._resolve_mode(db_manager)
+        if mode == "triggers":
+            self._ensure_triggers(db_manager)
+        self._modes[db_manager.table_name] = mode
+        return mode
+
+    async def refresh_async(self, db_manager: DatabaseManager) -> str:
+        """Run ``refresh`` on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_manager.executor, self.refresh, db_manager)
+
+    def _ensure_triggers(self, db_manager: DatabaseManager) -> None:
+        """Create the change log table and the triggers appending to it"""
+        table_name = db_manager.table_name
+        log = self.log_table(table_name)
+        key = f"{db_manager.escape_char}{self.key_column}{db_manager.escape_char}"
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {log} ("
+            "version INTEGER PRIMARY KEY AUTOINCREMENT, op TEXT NOT NULL, row_key)",
+            f"DROP TRIGGER IF EXISTS {log}_insert",
+            f"DROP TRIGGER IF EXISTS {log}_update",
+            f"DROP TRIGGER IF EXISTS {log}_delete",
+            f"CREATE TRIGGER {log}_insert AFTER INSERT ON {table_name} BEGIN "
+            f"INSERT INTO {log}(op, row_key) VALUES ('insert', new.{key}); END",
+            # A changed key removes the old row and adds the new one
+            f"CREATE TRIGGER {log}_update AFTER UPDATE ON {table_name} BEGIN "
+            f"INSERT INTO {log}(op, row_key) SELECT 'delete', old.{key} "
+            f"WHERE old.{key} IS NOT new.{key}; "
+            f"INSERT INTO {log}(op, row_key) VALUES ("
+            f"CASE WHEN old.{key} IS new.{key} THEN 'update' ELSE 'insert' END, new.{key}); END",
+            f"CREATE TRIGGER {log}_delete AFTER DELETE ON {table_name} BEGIN "
+            f"INSERT INTO {log}(op, row_key) VALUES ('delete', old.{key}); END",
+        ]
+        db_manager.execute_write([(statement, []) for statement in statements])
+        logger.info("Tracking changes of %s in %s", table_name, log)
+
+    def _log_bounds(self, db_manager: DatabaseManager) -> Tuple[int, int]:
+        """(oldest version still answerable, current version) of the change log"""
+        log = self.log_table(db_manager.table_name)
+        rows = db_manager.execute_query(
+            f"SELECT (SELECT seq FROM sqlite_sequence WHERE name = {db_manager.placeholder}) "
+            f"AS current, (SELECT MIN(version) FROM {log}) AS oldest",
+            [log],
+        )
+        current = rows[0]["current"] or 0
+        oldest = rows[0]["oldest"]
+        return (oldest - 1 if oldest is not None else current), current
+
+    def _prune(self, db_manager: DatabaseManager, current: int) -> None:
+        log = self.log_table(db_manager.table_name)
+        db_manager.execute_write(
+            [
+                (
+                    f"DELETE FROM {log} WHERE version <= {db_manager.placeholder}",
+                    [current - self.retention],
+                )
+            ]
+        )
+        self.pruned += 1
+
+    def _where_predicate(
+        self, db_manager: DatabaseManager, filter_model: Optional[Dict[str, Any]]
+    ) -> Predicate:
+        """Simplified predicate of the grid's filters"""
+        options = AgGridOptions(startRow=0, endRow=0, filterModel=filter_model or {})
+        query_builder = QueryBuilder(
+            ag_rows=AgRows(query="", options=options, escape=db_manager.escape_char),
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+        )
+        return query_builder.create_where_predicate()
+
+    def _select(
+        self, db_manager: DatabaseManager, predicate: Predicate, suffix: str = "", params=()
+    ) -> List[Dict[str, Any]]:
+        """Run ``SELECT *`` under a predicate"""
+        escape = lambda name: f"{db_manager.escape_char}{name}{db_manager.escape_char}"
+        query = f"SELECT * FROM {db_manager.table_name}"
+        where_params: List[Any] = []
+        if predicate != TRUE:
+            where_sql, where_params = predicate.to_sql(escape, db_manager.placeholder)
+            query += f" WHERE {where_sql}"
+        return format_query_results(
+            db_manager.execute_query(query + suffix, list(where_params) + list(params))
+        )
+
+    def _rows_by_key(
+        self, db_manager: DatabaseManager, keys: List[Any], predicate: Predicate
+    ) -> Dict[Any, Dict[str, Any]]:
+        """Current rows with these keys that match the predicate"""
+        rows = {}
+        for start in range(0, len(keys), _KEY_CHUNK_SIZE):
+            chunk = InValues(self.key_column, keys[start : start + _KEY_CHUNK_SIZE])
+            for row in self._select(db_manager, simplify(And([predicate, chunk]))):
+                rows[row[self.key_column]] = row
+        return rows
+
+    def get_changes(
+        self,
+        db_manager: DatabaseManager,
+        since: Optional[str] = None,
+        filter_model: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the rows changed since a version, as an AG Grid transaction.
+
+        Args:
+            db_manager: Database of the configured table
+            since: Version returned by a previous call; None only returns the current version
+            filter_model: The grid's filters. Changed rows outside them are not
+                added, and updated rows that left them are removed
+
+        Returns:
+            Dict[str, Any]: ``version`` to pass next time, ``add``/``update``
+            rows, ``remove`` keys (``{key_column: key}``), ``more`` when further
+            changes remain, and ``reset`` when the version is too old to catch up
+        """
+        table_name = db_manager.table_name
+        mode = self._modes.get(table_name)
+        if mode is None:
+            mode = self.refresh(db_manager)
+        self.reads += 1
+        if mode == "triggers":
+            return self._changes_from_log(db_manager, since, filter_model)
+        return self._changes_from_watermark(db_manager, since, filter_model)
+
+    def _transaction(self, version: Any, more: bool = False, reset: bool = False) -> Dict[str, Any]:
+        return {
+            "version": version,
+            "add": [],
+            "update": [],
+            "remove": [],
+            "more": more,
+            "reset": reset,
+        }
+
+    def _changes_from_log(
+        self,
+        db_manager: DatabaseManager,
+        since: Optional[str],
+        filter_model: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        oldest, current = self._log_bounds(db_manager)
+        if current - oldest > self.retention * 1.1:
+            self._prune(db_manager, current)
+            oldest = current - self.retention
+        if since is None:
+            return self._transaction(str(current))
+        since_version = int(since)
+        if since_version < oldest or since_version > current:
+            # Entries were pruned, or the log was recreated
+            self.resets += 1
+            return self._transaction(str(current), reset=True)
+
+        log = self.log_table(db_manager.table_name)
+        placeholder = db_manager.placeholder
+        entries = db_manager.execute_query(
+            f"SELECT version, op, row_key FROM {log} WHERE version > {placeholder} "
+            f"ORDER BY version LIMIT {placeholder}",
+            [since_version, self.max_changes + 1],
+        )
+        more = len(entries) > self.max_changes
+        entries = entries[: self.max_changes]
+        version = entries[-1]["version"] if entries else since_version
+        changes = collapse_operations([(entry["op"], entry["row_key"]) for entry in entries])
+
+        transaction = self._transaction(str(version), more=more)
+        predicate = self._where_predicate(db_manager, filter_model)
+        upserted = [key for key, change in changes.items() if change != "remove"]
+        rows = self._rows_by_key(db_manager, upserted, predicate)
+        for key, change in changes.items():
+            row = rows.get(key)
+            if row is not None:
+                transaction[change].append(row)
+            elif change != "add":
+                # Deleted, or no longer matching the grid's filters
+                transaction["remove"].append({self.key_column: key})
+        self.rows_sent += len(transaction["add"]) + len(transaction["update"])
+        return clean_json_data(transaction)
+
+    def _watermark_marker(self, db_manager: DatabaseManager) -> Optional[Tuple[str, str]]:
+        """(version field, SQL aggregate) telling inserts apart; None with a created_at column"""
+        if self.created_at_column:
+            return None
+        if db_manager.keyset_column:
+            escape_char = db_manager.escape_char
+            return "key", f"MAX({escape_char}{db_manager.keyset_column}{escape_char})"
+        return "rows", "COUNT(*)"
+
+    def _changes_from_watermark(
+        self,
+        db_manager: DatabaseManager,
+        since: Optional[str],
+        filter_model: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        escape = lambda name: f"{db_manager.escape_char}{name}{db_manager.escape_char}"
+        escaped = escape(self.updated_at_column)
+        placeholder = db_manager.placeholder
+        marker = self._watermark_marker(db_manager)
+        marker_sql = f", {marker[1]} AS {escape(marker[0])}" if marker else ""
+        rows = db_manager.execute_query(
+            f"SELECT MAX({escaped}) AS {escape('updated_at')}{marker_sql} "
+            f"FROM {db_manager.table_name}"
+        )
+        # Opaque to the client: the watermark, plus the marker telling inserts apart
+        current = json.loads(json.dumps(rows[0] if rows else {}, default=str))
+        version = json.dumps(current, sort_keys=True)
+        if since is None or current.get("updated_at") is None:
+            return self._transaction(version)
+
+        try:
+            previous = json.loads(since)
+            if not isinstance(previous, dict) or set(previous) != set(current):
+                raise ValueError(since)
+        except ValueError:
+            # A version of another mode or configuration
+            self.resets += 1
+            return self._transaction(version, reset=True)
+        if previous["updated_at"] is None or (
+            marker and marker[0] == "rows" and current["rows"] > previous["rows"]
+        ):
+            # Rows were inserted, and they cannot be told from updated ones
+            self.resets += 1
+            return self._transaction(version, reset=True)
+
+        if self.created_at_column:
+            added_sql = f"{escape(self.created_at_column)} > {placeholder}"
+            added_params = [previous["updated_at"]]
+        elif marker and marker[0] == "key" and previous["key"] is not None:
+            added_sql = f"{escape(db_manager.keyset_column)} > {placeholder}"
+            added_params = [previous["key"]]
+        else:
+            added_sql, added_params = "1 = 0", []
+        # Not filtered: updated rows that left the grid's filters are removed
+        changed = format_query_results(
+            db_manager.execute_query(
+                f"SELECT *, CASE WHEN {added_sql} THEN 1 ELSE 0 END AS {escape(_ADDED_ALIAS)} "
+                f"FROM {db_manager.table_name} WHERE {escaped} > {placeholder} "
+                f"ORDER BY {escaped} LIMIT {placeholder}",
+                added_params + [previous["updated_at"], self.max_changes + 1],
+            )
+        )
+        if len(changed) > self.max_changes:
+            # Rows sharing the cut-off timestamp could be skipped when paging
+            self.resets += 1
+            return self._transaction(version, reset=True)
+
+        predicate = self._where_predicate(db_manager, filter_model)
+        if predicate == TRUE:
+            matching = None
+        else:
+            keys = [row[self.key_column] for row in changed]
+            matching = self._rows_by_key(db_manager, keys, predicate)
+
+        transaction = self._transaction(version)
+        for row in changed:
+            added = row.pop(_ADDED_ALIAS)
+            key = row[self.key_column]
+            if matching is None or key in matching:
+                transaction["add" if added else "update"].append(row)
+            elif not added:
+                transaction["remove"].append({self.key_column: key})
+        self.rows_sent += len(transaction["add"]) + len(transaction["update"])
+        return clean_json_data(transaction)
+
+    async def get_changes_async(
+        self, db_manager: DatabaseManager, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Run ``get_changes`` on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            db_manager.executor, lambda: self.get_changes(db_manager, **kwargs)
+        )
+
+    def stats(self) -> dict:
+        """Get the mode per table and read/reset/row counters"""
+        return {
+            "modes": dict(self._modes),
+            "reads": self.reads,
+            "resets": self.resets,
+            "rows_sent": self.rows_sent,
+            "pruned": self.pruned,
+        }
@@ -0,0 +1,105 @@
+"""
+Request coalescing for SSRM AgGrid application.
+
+When many grids open the same view at once, identical SSRM requests arrive
+within milliseconds of each other. :class:`RequestCoalescer` runs only the
+first of them; the others await that execution and share its result.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from metrics import StageTimer
+from models import AgGridOptions
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical concurrent SSRM requests.
+
+    Requests are identical when they target the same table and have the same
+    canonical signature (sort, filters, grouping and rows). Nothing is kept
+    once the execution finishes: later requests run again, or hit the result
+    caches. A failed execution fails every request that joined it.
+    """
+
+    def __init__(self):
+        # (table, signature) -> task of the execution in flight
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Any]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    @staticmethod
+    def make_key(table_name: str, options: AgGridOptions) -> Tuple[str, str]:
+        """In-flight key of a request"""
+        return (table_name, options.signature())
+
+    async def run(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        compute: Callable[[], Awaitable[T]],
+        timer: Optional[StageTimer] = None,
+    ) -> Tuple[T, bool]:
+        """
+        Run a request, or join the identical request already running.
+
+        Args:
+            table_name: Table the request reads
+            options: The request
+            compute: Coroutine function executing the request
+            timer: Timer of the request; time spent waiting on another
+                request's execution is recorded as the ``coalesced`` stage
+
+        Returns:
+            Tuple[T, bool]: Result, and whether it came from another request's execution
+        """
+        key = self.make_key(table_name, options)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            if timer is not None:
+                with timer.stage("coalesced"):
+                    # Shielded so a cancelled request does not cancel the shared execution
+                    return await asyncio.shield(task), True
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(compute())
+        self._inflight[key] = task
+        self.executions += 1
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return await asyncio.shield(task), False
+
+    def _finished(self, key: Tuple[str, str], task: "asyncio.Task[Any]") -> None:
+        # invalidate() may already have detached this execution
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+
+    def invalidate(self, table_name: str) -> int:
+        """
+        Detach the executions in flight for a table, e.g. after a write.
+
+        Requests already waiting on them still get their results; new requests
+        run again so they see the write.
+        """
+        stale = [key for key in self._inflight if key[0] == table_name]
+        for key in stale:
+            del self._inflight[key]
+        return len(stale)
+
+    def stats(self) -> dict:
+        """Get execution and coalescing counters"""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "inflight": len(self._inflight),
+        }
@@ -10,6 +10,99 @@ DEFAULT_DATABASE_NAME = "demo_data.db"
 DEFAULT_TABLE_NAME = "demo_data"
 
 SQL_ESCAPE_CHAR = '"'
+SQL_PLACEHOLDER = "?"
+
+# Prepared statements kept per pooled connection
+DEFAULT_STATEMENT_CACHE_SIZE = 256
+
+# Connection pool defaults
+DEFAULT_POOL_MIN_SIZE = 1
+DEFAULT_POOL_MAX_SIZE = 5
+DEFAULT_POOL_IDLE_TIMEOUT = 300.0  # seconds before surplus idle connections are closed
+DEFAULT_POOL_HEALTH_CHECK_INTERVAL = 30.0  # idle seconds before a connection is re-validated
+
+# Worker threads used to run blocking queries off the event loop
+DEFAULT_EXECUTOR_MAX_WORKERS = 4
+
+# SSRM query path: caching, read-ahead, routing, schema and search settings
+
+# Row count cache defaults
+DEFAULT_COUNT_CACHE_TTL = 60.0  # seconds a cached COUNT stays valid
+DEFAULT_COUNT_CACHE_SIZE = 1024  # distinct filtered views whose count is kept
+
+# Result block cache defaults
+DEFAULT_BLOCK_CACHE_MAX_BYTES = 64 * 1024 * 1024  # approximate memory budget
+
+# Read-ahead of adjacent blocks (PREFETCH_DEPTH = 0 disables it)
+PREFETCH_DEPTH = 1  # blocks computed ahead of each served block
+PREFETCH_BACKWARD = False  # also compute the block before each served block
+DEFAULT_PREFETCH_MAX_BYTES = 32 * 1024 * 1024  # approximate memory budget
+DEFAULT_PREFETCH_TTL = 30.0  # seconds a prefetched block stays valid
+
+# Fetch result blocks as row tuples and render JSON straight from the columns
+COLUMNAR_RESULTS = True
+
+# Serialize JSON responses with orjson when it is installed
+FAST_JSON_RESPONSES = True
+
+# Run identical concurrent SSRM requests once and share the result
+COALESCE_REQUESTS = True
+
+# Stream large flat blocks to the client in chunks straight from the cursor,
+# bounding peak memory by the chunk size instead of the block size (opt-in)
+STREAM_RESPONSES = False
+DEFAULT_STREAM_CHUNK_SIZE = 5000  # rows fetched and rendered per chunk
+DEFAULT_STREAM_MIN_ROWS = 10000  # smaller blocks are served (and cached) normally
+
+# Index advisor defaults
+DEFAULT_INDEX_ADVISOR_MIN_USES = 20  # requests sharing an access pattern before an index is recommended
+DEFAULT_SLOW_QUERY_MS = 500.0  # queries slower than this are kept with their query plan
+DEFAULT_SLOW_QUERY_LOG_SIZE = 100  # most recent slow queries kept for /data-ssrm/slow-queries
+INDEX_ADVISOR_AUTO_CREATE = False  # create recommended indexes automatically
+
+# Seconds a read replica that failed its health probe stays out of rotation
+DEFAULT_REPLICA_RETRY_AFTER = 30.0
+
+# Columns, indexes and statistics of the table, loaded at startup and shared by
+# the server's workers through a snapshot file in the system temp directory
+SCHEMA_SNAPSHOT_FILE = "ssrm_schema_snapshot.json"
+DEFAULT_SCHEMA_REFRESH_INTERVAL = 600.0  # seconds before columns and statistics are reloaded
+DEFAULT_SCHEMA_DDL_CHECK_INTERVAL = 30.0  # seconds between checks for schema changes
+
+# Build times of the materialized aggregate side tables, shared by the server's
+# workers so only one of them builds the tables at startup
+AGGREGATE_SNAPSHOT_FILE = "ssrm_aggregate_snapshot.json"
+DEFAULT_AGGREGATE_MAX_AGE = 600.0  # seconds a recorded build is adopted instead of rebuilding
+
+# Distinct values served to set filters (/data-ssrm/values/{column})
+DEFAULT_VALUES_MAX = 10_000  # values kept per column; larger columns are searched in the database
+DEFAULT_VALUES_REFRESH_INTERVAL = 300.0  # seconds before a value list is refreshed
+DEFAULT_VALUES_CACHE_SIZE = 256  # column/filter combinations whose values are kept
+
+# Text columns whose contains/startsWith/endsWith filters use a trigram index:
+# "fts5" (SQLite), "fulltext" (MySQL), "memory" (in-process) or "auto"
+TEXT_SEARCH_COLUMNS = []  # e.g. ["firm"]
+TEXT_SEARCH_MODE = "auto"
+DEFAULT_TEXT_SEARCH_MAX_VALUES = 200_000  # distinct values indexed in memory per column
+DEFAULT_TEXT_SEARCH_MAX_IN_VALUES = 1000  # more in-memory matches keep the LIKE condition
+
+# Rows added, updated and removed since a client's version, applied by the
+# grid as transactions (/data-ssrm/changes, opt-in). SQLite tracks changes with
+# triggers; other databases need a column set to the write time
+CHANGE_FEED = False
+CHANGE_FEED_KEY_COLUMN = "id"  # the grid's row id
+CHANGE_FEED_UPDATED_AT_COLUMN = None  # e.g. "updated_at"
+CHANGE_FEED_CREATED_AT_COLUMN = None  # e.g. "created_at", so watermark mode reports inserts as adds
+DEFAULT_CHANGE_FEED_MAX_CHANGES = 10_000  # changes returned per call
+DEFAULT_CHANGE_LOG_RETENTION = 100_000  # change log entries kept for clients catching up
+
+# Answer counts of huge tables from table statistics and refine them in the
+# background; rowCount is flagged with rowCountApproximate (opt-in)
+ESTIMATED_COUNTS = False
+DEFAULT_ESTIMATE_MIN_ROWS = 1_000_000  # smaller tables are always counted exactly
+
+# Aggregation functions supported
+SUPPORTED_AGG_FUNCTIONS = ["sum", "avg", "count", "min", "max"]
 
 
 def get_database_path(custom_path: str = None) -> Path:
@@ -18,8 +111,20 @@ def get_database_path(custom_path: str = None) -> Path:
         return Path(custom_path)
     return Path(__file__).parent / DEFAULT_DATABASE_NAME
 
-# Aggregation functions supported
-SUPPORTED_AGG_FUNCTIONS = ["sum", "avg", "count", "min", "max"]
+
+def nulls_sort_first(null_order: str, descending: bool) -> bool:
+    """
+    Check if NULLs come before all other values in an ORDER BY without NULLS FIRST/LAST.
+
+    Args:
+        null_order: The database's NULL ordering (see ``DatabaseConfig.null_order``)
+        descending: Sort direction of the column
+    """
+    if null_order == "last":
+        return False
+    if null_order == "high":
+        return descending
+    return not descending
 
 
 class DatabaseConfig:
@@ -33,14 +138,54 @@ class DatabaseConfig:
         connection_string: str = None,
         table_name: str = DEFAULT_TABLE_NAME,
         escape_char: str = SQL_ESCAPE_CHAR,
+        placeholder: str = SQL_PLACEHOLDER,
+        statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+        pool_min_size: int = DEFAULT_POOL_MIN_SIZE,
+        pool_max_size: int = DEFAULT_POOL_MAX_SIZE,
+        pool_idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        pool_health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        executor_max_workers: int = DEFAULT_EXECUTOR_MAX_WORKERS,
+        keyset_column: str = None,
+        rollup_syntax: str = None,
+        replicas: list = None,
+        replica_retry_after: float = DEFAULT_REPLICA_RETRY_AFTER,
+        shards: list = None,
+        shard_key: str = None,
+        null_order: str = "low",
     ):
         self.database_type = database_type
         self.connection_string = connection_string
         self.table_name = table_name
         self.escape_char = escape_char
+        self.placeholder = placeholder
+        self.statement_cache_size = statement_cache_size
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_health_check_interval = pool_health_check_interval
+        self.executor_max_workers = executor_max_workers
+        # Unique column (e.g. an INTEGER PRIMARY KEY) enabling keyset pagination
+        self.keyset_column = keyset_column
+        # How the database spells ROLLUP: "with_rollup" (MySQL 8+), "rollup"
+        # (GROUP BY ROLLUP(...)), or None to roll groups up in memory
+        self.rollup_syntax = rollup_syntax
+        # Connection strings of read replicas of the primary database
+        self.replicas = list(replicas or [])
+        self.replica_retry_after = replica_retry_after
+        # Connection strings of the databases a horizontally sharded table is
+        # split across (the first one also serves metadata), and the column
+        # rows are distributed by (see routing.shard_for_value)
+        self.shards = list(shards or [])
+        self.shard_key = shard_key
+        # Where the database sorts NULLs: "low" (below every value: first
+        # ascending, last descending; SQLite, MySQL), "high" (above every value;
+        # Snowflake) or "last" (last in both directions; DuckDB)
+        self.null_order = null_order
 
     @classmethod
-    def for_sqlite(cls, db_path: str = None, table_name: str = DEFAULT_TABLE_NAME):
+    def for_sqlite(
+        cls, db_path: str = None, table_name: str = DEFAULT_TABLE_NAME, **kwargs
+    ):
         """Create configuration for SQLite database"""
         path = get_database_path(db_path)
         return cls(
@@ -48,17 +193,66 @@ class DatabaseConfig:
             connection_string=Path(path).resolve(),
             table_name=table_name,
             escape_char='"',
+            **kwargs,
+        )
+
+    @classmethod
+    def for_duckdb(
+        cls,
+        db_path: str = None,
+        table_name: str = DEFAULT_TABLE_NAME,
+        parquet_path: str = None,
+        read_only: bool = False,
+        **kwargs,
+    ):
+        """
+        Create configuration for DuckDB database.
+
+        Args:
+            db_path: DuckDB database file; None opens an in-memory database
+            table_name: Table (or view) queried by the grid
+            parquet_path: Parquet file or glob exposed as a view named ``table_name``
+            read_only: Open the database file read-only
+        """
+        connection_config = {
+            "database": str(Path(db_path).resolve()) if db_path else ":memory:",
+            "read_only": read_only,
+            "parquet": {table_name: str(parquet_path)} if parquet_path else {},
+        }
+        return cls(
+            database_type="duckdb",
+            connection_string=connection_config,
+            table_name=table_name,
+            escape_char='"',
+            rollup_syntax="rollup",
+            null_order="last",
+            **kwargs,
         )
 
     @classmethod
-    def for_snowflake(cls, connection_string: str, table_name: str, schema: str = None):
-        """Create configuration for Snowflake database"""
+    def for_snowflake(
+        cls, connection_string, table_name: str, schema: str = None, **kwargs
+    ):
+        """
+        Create configuration for Snowflake database.
+
+        Args:
+            connection_string: Keyword arguments for ``snowflake.connector.connect``
+                (account, user, password, warehouse, database, ...) or the name
+                of a connection defined in ``connections.toml``
+            table_name: Table queried by the grid
+            schema: Optional schema prefixed to the table name
+        """
         full_table_name = f"{schema}.{table_name}" if schema else table_name
         return cls(
             database_type="snowflake",
             connection_string=connection_string,
             table_name=full_table_name,
             escape_char='"',
+            placeholder="%s",
+            rollup_syntax="rollup",
+            null_order="high",
+            **kwargs,
         )
 
     @classmethod
@@ -70,6 +264,7 @@ class DatabaseConfig:
         password: str,
         table_name: str = DEFAULT_TABLE_NAME,
         port: int = 3306,
+        **kwargs,
     ):
         """Create configuration for MySQL database"""
         connection_config = {
@@ -84,4 +279,7 @@ class DatabaseConfig:
             connection_string=connection_config,
             table_name=table_name,
             escape_char="`",
+            placeholder="%s",
+            rollup_syntax="with_rollup",
+            **kwargs,
         )
@@ -0,0 +1,28 @@
+"""Shared fixtures for the SSRM AgGrid tests"""
+
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_table(tmp_path):
+    """
+    Factory writing rows to a SQLite table in a temporary database file.
+
+    Call it with a column definition list (e.g. ``['"id" INTEGER PRIMARY KEY',
+    '"v" REAL']``) and the rows; it returns the database path.
+    """
+
+    def create(columns, rows, table_name="data", path=None):
+        path = path or tmp_path / "data.db"
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE {table_name} ({', '.join(columns)})")
+        if rows:
+            placeholders = ", ".join(["?"] * len(rows[0]))
+            conn.executemany(f"INSERT INTO {table_name} VALUES ({placeholders})", rows)
+        conn.commit()
+        conn.close()
+        return path
+
+    return create
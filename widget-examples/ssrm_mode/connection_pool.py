@@ -0,0 +1,320 @@
+"""
+Connection pooling utilities for SSRM AgGrid application.
+Keeps database connections open between requests instead of reconnecting per query.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Tuple
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool for drivers whose connections can move between threads (e.g. MySQL).
+
+    Never opens more than ``max_size`` connections, closes surplus connections that
+    sat idle longer than ``idle_timeout`` (keeping ``min_size`` of them) and validates
+    connections that have been idle longer than ``health_check_interval`` before
+    handing them out.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        is_healthy: Callable[[Any], bool],
+        min_size: int = 1,
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 30.0,
+    ):
+        """
+        Initialize connection pool.
+
+        Args:
+            connect: Factory that opens a new driver connection
+            is_healthy: Callable returning True if a connection is still usable
+            min_size: Number of idle connections never evicted (opened by ``warm``)
+            max_size: Maximum number of simultaneously open connections
+            idle_timeout: Seconds after which surplus idle connections are closed
+            health_check_interval: Idle seconds after which a connection is re-validated
+            acquire_timeout: Seconds to wait for a free connection before failing
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: Deque[Tuple[Any, float]] = deque()
+        self._open_count = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Number of currently open connections (idle and in use)"""
+        return self._open_count
+
+    def warm(self) -> None:
+        """Open connections until ``min_size`` are available"""
+        while True:
+            with self._condition:
+                if self._open_count >= self.min_size:
+                    return
+                self._open_count += 1
+            self.release(self._open())
+
+    def _open(self) -> Any:
+        """Open a new connection, keeping the open counter consistent on failure"""
+        try:
+            return self._connect()
+        except Exception:
+            with self._condition:
+                self._open_count -= 1
+                self._condition.notify()
+            raise
+
+    def _close_quietly(self, conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now: float) -> list:
+        """Pop idle connections past ``idle_timeout`` while respecting ``min_size`` (lock held)"""
+        evicted = []
+        # Oldest idle connections sit on the left of the deque
+        while (
+            self._idle
+            and self._open_count > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            conn, _ = self._idle.popleft()
+            self._open_count -= 1
+            evicted.append(conn)
+        return evicted
+
+    def acquire(self) -> Any:
+        """Take a connection from the pool, opening a new one if allowed"""
+        deadline = time.monotonic() + self.acquire_timeout
+
+        while True:
+            with self._condition:
+                evicted = self._evict_idle(time.monotonic())
+                candidate = None
+                while candidate is None:
+                    if self._idle:
+                        # Most recently used connection is the most likely to be alive
+                        candidate = self._idle.pop()
+                    elif self._open_count < self.max_size:
+                        self._open_count += 1
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeoutError(
+                                f"No connection available within {self.acquire_timeout}s "
+                                f"(max_size={self.max_size})"
+                            )
+                        self._condition.wait(remaining)
+
+            for conn in evicted:
+                self._close_quietly(conn)
+
+            if candidate is None:
+                return self._open()
+
+            conn, last_used = candidate
+            if time.monotonic() - last_used < self.health_check_interval:
+                return conn
+
+            try:
+                healthy = self._is_healthy(conn)
+            except Exception:
+                healthy = False
+            if healthy:
+                return conn
+
+            # Stale connection - drop it and try again
+            self._discard(conn)
+
+    def release(self, conn: Any) -> None:
+        """Return a connection to the pool"""
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    def _discard(self, conn: Any) -> None:
+        """Close a broken connection and free its slot"""
+        self._close_quietly(conn)
+        with self._condition:
+            self._open_count -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Context manager yielding a pooled connection.
+
+        Connections that raised during use are discarded rather than returned,
+        since their state (open transactions, broken sockets) is unknown. This
+        includes a generator holding the connection being closed early
+        (GeneratorExit), which may leave unread results on it.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            self._discard(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        """Close every idle connection (connections currently in use are left alone)"""
+        with self._condition:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._open_count -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+
+class ThreadLocalConnectionPool:
+    """
+    Pool handing each thread its own long-lived connection (e.g. SQLite).
+
+    SQLite connections are cheap to share within a thread but must not be used
+    concurrently from several threads, so every worker thread keeps one handle.
+    Handles idle longer than ``idle_timeout`` or belonging to finished threads
+    are closed on the next acquire.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        is_healthy: Callable[[Any], bool],
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+    ):
+        """
+        Initialize per-thread pool.
+
+        Args:
+            connect: Factory that opens a new driver connection
+            is_healthy: Callable returning True if a connection is still usable
+            idle_timeout: Seconds after which an unused handle is closed
+            health_check_interval: Idle seconds after which a handle is re-validated
+        """
+        self._connect = connect
+        self._is_healthy = is_healthy
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+
+        # thread ident -> [connection, last_used]
+        self._handles: Dict[int, list] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    @property
+    def size(self) -> int:
+        """Number of currently open per-thread handles"""
+        return len(self._handles)
+
+    def _evict(self, now: float) -> list:
+        """Drop handles of dead threads and of threads idle past ``idle_timeout``"""
+        # Sweeping walks every thread, so do it at most once per second
+        if now - self._last_sweep < 1.0:
+            return []
+        self._last_sweep = now
+
+        alive = {thread.ident for thread in threading.enumerate()}
+        current = threading.get_ident()
+        evicted = []
+        with self._lock:
+            for ident, (conn, last_used) in list(self._handles.items()):
+                if ident == current:
+                    continue
+                if ident not in alive or now - last_used > self.idle_timeout:
+                    evicted.append(conn)
+                    del self._handles[ident]
+        return evicted
+
+    def acquire(self) -> Any:
+        """Get the calling thread's connection, opening or re-validating as needed"""
+        now = time.monotonic()
+        for conn in self._evict(now):
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+        ident = threading.get_ident()
+        entry = self._handles.get(ident)
+        if entry is not None:
+            conn, last_used = entry
+            if now - last_used < self.health_check_interval:
+                entry[1] = now
+                return conn
+            try:
+                healthy = self._is_healthy(conn)
+            except Exception:
+                healthy = False
+            if healthy:
+                entry[1] = now
+                return conn
+            self._drop(ident)
+
+        conn = self._connect()
+        with self._lock:
+            self._handles[ident] = [conn, now]
+        return conn
+
+    def _drop(self, ident: int) -> None:
+        with self._lock:
+            entry = self._handles.pop(ident, None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Context manager yielding the calling thread's connection"""
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # Roll back anything left open by the failed statement
+            try:
+                conn.rollback()
+            except Exception:
+                self._drop(threading.get_ident())
+            raise
+        else:
+            entry = self._handles.get(threading.get_ident())
+            if entry is not None:
+                entry[1] = time.monotonic()
+
+    def close_all(self) -> None:
+        """Close every per-thread handle"""
+        with self._lock:
+            handles = [conn for conn, _ in self._handles.values()]
+            self._handles.clear()
+        for conn in handles:
+            try:
+                conn.close()
+            except Exception:
+                pass
@@ -3,10 +3,38 @@ Generic database management utilities for SSRM AgGrid application.
 Supports multiple database types through configurable database connections.
 """
 
+import asyncio
+import itertools
+import logging
 import sqlite3
-from typing import Any, Dict, List, Protocol
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from config import DatabaseConfig
+from config import (
+    DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+    DEFAULT_POOL_IDLE_TIMEOUT,
+    DEFAULT_POOL_MAX_SIZE,
+    DEFAULT_POOL_MIN_SIZE,
+    DEFAULT_STATEMENT_CACHE_SIZE,
+    DatabaseConfig,
+)
+from connection_pool import ConnectionPool, ThreadLocalConnectionPool
+from filters import Predicate
+from routing import ReplicaSet, merge_sorted_pages, prune_shards
 
 try:
     import mysql.connector  # type: ignore[import]
@@ -16,16 +44,54 @@ try:
 except ImportError:
     MYSQL_AVAILABLE = False
 
+try:
+    import duckdb  # type: ignore[import]
+
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+try:
+    import snowflake.connector  # type: ignore[import]
+    from snowflake.connector import Error as SnowflakeError  # type: ignore[import]
+
+    SNOWFLAKE_AVAILABLE = True
+except ImportError:
+    SNOWFLAKE_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
 
 class DatabaseConnection(Protocol):
     """Protocol defining the interface for database connections"""
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Execute a SELECT query and return results"""
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query with bound parameters and return results"""
         pass
 
-    def execute_count_query(self, query: str) -> int:
-        """Execute a COUNT query and return the result"""
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query and return (column names, row tuples)"""
+        pass
+
+    def execute_count_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> int:
+        """Execute a COUNT query with bound parameters and return the result"""
+        pass
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """Execute a SELECT query and yield (column names, row tuples) chunks"""
+        pass
+
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """Execute (query, params) write statements in one transaction"""
         pass
 
     def get_table_columns(self, table_name: str) -> List[Dict[str, str]]:
@@ -36,46 +102,209 @@ class DatabaseConnection(Protocol):
         """Get total row count for a table"""
         pass
 
+    def get_table_indexes(self, table_name: str) -> List[List[str]]:
+        """Get the column list of every index on a table"""
+        pass
+
+    def get_table_statistics(self, table_name: str) -> Dict[str, Any]:
+        """Get the planner's row count and per-column distinct counts of a table"""
+        pass
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the database's query plan for a SELECT query, one line per step"""
+        pass
+
+    def warm(self) -> None:
+        """Open the configured minimum number of pooled connections"""
+        pass
+
+    def close(self) -> None:
+        """Release all pooled connections"""
+        pass
+
+
+def _sqlite_is_healthy(conn: sqlite3.Connection) -> bool:
+    """Check that a SQLite handle can still run statements"""
+    conn.execute("SELECT 1").fetchone()
+    return True
+
+
+def _mysql_is_healthy(conn) -> bool:
+    """Check that a MySQL connection is still alive (pings the server)"""
+    return conn.is_connected()
+
+
+def _duckdb_is_healthy(conn) -> bool:
+    """Check that a DuckDB cursor can still run statements"""
+    conn.execute("SELECT 1").fetchone()
+    return True
+
+
+def _snowflake_is_healthy(conn) -> bool:
+    """Check that a Snowflake session is open and has not expired"""
+    if conn.is_closed():
+        return False
+    conn.cursor().execute("SELECT 1").fetchone()
+    return True
+
+
+class PreparedStatementCache:
+    """
+    Per-connection LRU of server-side prepared statements, keyed by SQL text.
+
+    Each entry is a prepared cursor; executing the same SQL again only sends the
+    new parameters, so the server reuses the already parsed and planned statement.
+    """
+
+    def __init__(self, connection, max_size: int = DEFAULT_STATEMENT_CACHE_SIZE):
+        self.connection = connection
+        self.max_size = max_size
+        self._cursors: "OrderedDict[str, Any]" = OrderedDict()
+
+    def cursor_for(self, query: str):
+        """Get the prepared cursor for a statement, preparing it on first use"""
+        cursor = self._cursors.get(query)
+        if cursor is not None:
+            self._cursors.move_to_end(query)
+            return cursor
+
+        cursor = self.connection.cursor(prepared=True)
+        self._cursors[query] = cursor
+        while len(self._cursors) > self.max_size:
+            _, evicted = self._cursors.popitem(last=False)
+            evicted.close()  # Deallocates the server-side statement
+        return cursor
+
 
 class SQLiteConnection:
-    """SQLite database connection implementation"""
+    """SQLite database connection implementation with one pooled handle per thread"""
 
-    def __init__(self, db_path: str):
+    def __init__(
+        self,
+        db_path: str,
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+    ):
         self.db_path = db_path
+        self.statement_cache_size = statement_cache_size
+        self.pool = ThreadLocalConnectionPool(
+            connect=self._connect,
+            is_healthy=_sqlite_is_healthy,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+        )
 
-    def get_connection(self) -> sqlite3.Connection:
-        """Get SQLite connection with proper configuration"""
-        conn = sqlite3.connect(self.db_path)
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new SQLite connection with proper configuration"""
+        # The pool guarantees a handle is only used by the thread that owns it,
+        # but it may be closed from another thread during idle eviction.
+        # sqlite3 keeps compiled statements per connection keyed by SQL text, so
+        # placeholder queries are prepared once and re-bound on later requests.
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
         conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
         return conn
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
+    def get_connection(self):
+        """Get the calling thread's pooled SQLite connection (context manager)"""
+        return self.pool.connection()
+
+    def warm(self) -> None:
+        """Open the calling thread's SQLite handle ahead of the first query"""
+        with self.get_connection():
+            pass
+
+    def close(self) -> None:
+        """Close all per-thread SQLite handles"""
+        self.pool.close_all()
+
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as list of dictionaries"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(query)
+                cursor.execute(query, params or ())
                 rows = cursor.fetchall()
                 # Convert Row objects to dictionaries
                 return [dict(row) for row in rows]
         except Exception as e:
-            print(f"Error executing query: {query}")
-            print(f"Error: {str(e)}")
+            logger.error("Error executing query: %s (%s)", query, e)
             raise
 
-    def execute_count_query(self, query: str) -> int:
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query and return column names with plain row tuples"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # Plain tuples skip building a sqlite3.Row per result row
+                cursor.row_factory = None
+                cursor.execute(query, params or ())
+                rows = cursor.fetchall()
+                columns = [description[0] for description in cursor.description]
+                return columns, rows
+        except Exception as e:
+            logger.error("Error executing query: %s (%s)", query, e)
+            raise
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a SELECT query and yield row tuples in chunks of ``chunk_size``.
+
+        A streamed response is consumed from whichever worker thread serves
+        the next chunk, so it uses its own short-lived connection rather than
+        a per-thread pooled handle.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(query, params or ())
+            columns = [description[0] for description in cursor.description]
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        except Exception as e:
+            logger.error("Error streaming query: %s (%s)", query, e)
+            raise
+        finally:
+            conn.close()
+
+    def execute_count_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> int:
         """Execute a COUNT query and return the result"""
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute(query)
+                cursor.execute(query, params or ())
                 result = cursor.fetchone()[0]
                 return result if result is not None else 0
         except Exception as e:
-            print(f"Error executing count query: {query}")
-            print(f"Error: {str(e)}")
+            logger.error("Error executing count query: %s (%s)", query, e)
             raise
 
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """Execute write statements in one transaction (rolled back on error)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            for query, params in statements:
+                cursor.execute(query, params or ())
+            conn.commit()
+
     def get_table_columns(self, table_name: str) -> List[Dict[str, str]]:
         """Get column information for a table"""
         with self.get_connection() as conn:
@@ -93,92 +322,705 @@ class SQLiteConnection:
             cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
             return cursor.fetchone()[0]
 
+    def get_table_indexes(self, table_name: str) -> List[List[str]]:
+        """Get the column list of every index on a table (incl. INTEGER PRIMARY KEY)"""
+        with self.get_connection() as conn:
+            indexes = []
+            for row in conn.execute(f"PRAGMA table_info({table_name})").fetchall():
+                # An INTEGER PRIMARY KEY is the rowid, the table's own b-tree key
+                if row[5] == 1 and row[2].upper() == "INTEGER":
+                    indexes.append([row[1]])
+            for index in conn.execute(f"PRAGMA index_list({table_name})").fetchall():
+                index_info = conn.execute(f"PRAGMA index_info({index[1]})").fetchall()
+                indexes.append([row[2] for row in sorted(index_info, key=lambda row: row[0])])
+            return indexes
+
+    def get_table_statistics(self, table_name: str) -> Dict[str, Any]:
+        """
+        Get row and distinct-value estimates from ``sqlite_stat1``.
+
+        The statistics exist only after ``ANALYZE`` has run; ``rows`` is None
+        otherwise. Each stat row starts with the table's row count, followed by
+        the average number of rows per value of the index's leading column.
+        """
+        with self.get_connection() as conn:
+            try:
+                rows = conn.execute(
+                    "SELECT idx, stat FROM sqlite_stat1 WHERE tbl = ?", (table_name,)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return {"rows": None, "distinct": {}}
+
+            statistics: Dict[str, Any] = {"rows": None, "distinct": {}}
+            for index_name, stat in rows:
+                numbers = [int(part) for part in stat.split() if part.isdigit()]
+                if not numbers:
+                    continue
+                statistics["rows"] = numbers[0]
+                if index_name is None or len(numbers) < 2 or not numbers[1]:
+                    continue
+                index_info = conn.execute(f"PRAGMA index_info({index_name})").fetchall()
+                leading = [row[2] for row in index_info if row[0] == 0]
+                if leading:
+                    statistics["distinct"][leading[0]] = max(numbers[0] // numbers[1], 1)
+            return statistics
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the EXPLAIN QUERY PLAN steps of a query, indented by nesting"""
+        with self.get_connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ()).fetchall()
+            depth = {0: -1}
+            plan = []
+            for node_id, parent_id, _, detail in rows:
+                depth[node_id] = depth.get(parent_id, -1) + 1
+                plan.append("  " * depth[node_id] + detail)
+            return plan
+
 
 class MySQLConnection:
-    """MySQL database connection implementation"""
+    """MySQL database connection implementation backed by a connection pool"""
 
-    def __init__(self, connection_config: Dict[str, Any]):
+    def __init__(
+        self,
+        connection_config: Dict[str, Any],
+        min_size: int = DEFAULT_POOL_MIN_SIZE,
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        statement_cache_size: int = DEFAULT_STATEMENT_CACHE_SIZE,
+    ):
         if not MYSQL_AVAILABLE:
             raise ImportError(
                 "mysql-connector-python is required for MySQL connections"
             )
         self.connection_config = connection_config
+        self.statement_cache_size = statement_cache_size
+        self.pool = ConnectionPool(
+            connect=self._connect,
+            is_healthy=_mysql_is_healthy,
+            min_size=min_size,
+            max_size=max_size,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+        )
 
-    def get_connection(self):
-        """Get MySQL connection with proper configuration"""
+    def _connect(self):
+        """Open a new MySQL connection with proper configuration"""
         try:
             connection = mysql.connector.connect(**self.connection_config)
+            # Pooled connections are reused across requests; without autocommit a
+            # long-lived REPEATABLE READ snapshot would hide newer rows.
+            connection.autocommit = True
+            # Prepared statements live as long as the pooled connection
+            connection.ssrm_statements = PreparedStatementCache(
+                connection, max_size=self.statement_cache_size
+            )
             return connection
         except MySQLError as e:
-            print(f"Error connecting to MySQL: {e}")
+            logger.error("Error connecting to MySQL: %s", e)
             raise
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Execute a SELECT query and return results as list of dictionaries"""
+    def get_connection(self):
+        """Borrow a MySQL connection from the pool (context manager)"""
+        return self.pool.connection()
+
+    def warm(self) -> None:
+        """Open ``min_size`` MySQL connections ahead of the first query"""
+        self.pool.warm()
+
+    def close(self) -> None:
+        """Close all idle pooled MySQL connections"""
+        self.pool.close_all()
+
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query as a prepared statement and return list of dictionaries"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(query)
-            results = cursor.fetchall()
-            cursor.close()
-            connection.close()
-            return results
+            with self.get_connection() as connection:
+                cursor = connection.ssrm_statements.cursor_for(query)
+                cursor.execute(query, tuple(params or ()))
+                columns = cursor.column_names
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
         except MySQLError as e:
-            print(f"Error executing query: {query}")
-            print(f"Error: {str(e)}")
+            logger.error("Error executing query: %s (%s)", query, e)
             raise
 
-    def execute_count_query(self, query: str) -> int:
-        """Execute a COUNT query and return the result"""
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query as a prepared statement and return column names with row tuples"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            cursor.execute(query)
-            result = cursor.fetchone()[0]
-            cursor.close()
-            connection.close()
-            return result if result is not None else 0
+            with self.get_connection() as connection:
+                cursor = connection.ssrm_statements.cursor_for(query)
+                cursor.execute(query, tuple(params or ()))
+                rows = cursor.fetchall()
+                return list(cursor.column_names), rows
         except MySQLError as e:
-            print(f"Error executing count query: {query}")
-            print(f"Error: {str(e)}")
+            logger.error("Error executing query: %s (%s)", query, e)
+            raise
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a SELECT query and yield row tuples in chunks of ``chunk_size``.
+
+        The pooled connection is held until the stream is exhausted or closed;
+        the unbuffered cursor reads rows from the server as chunks are consumed.
+        """
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, tuple(params or ()))
+                    columns = list(cursor.column_names)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield columns, rows
+                finally:
+                    try:
+                        cursor.close()
+                    except MySQLError:
+                        # Unread rows of an abandoned stream; the pool discards the connection
+                        pass
+        except MySQLError as e:
+            logger.error("Error streaming query: %s (%s)", query, e)
+            raise
+
+    def execute_count_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> int:
+        """Execute a COUNT query as a prepared statement and return the result"""
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.ssrm_statements.cursor_for(query)
+                cursor.execute(query, tuple(params or ()))
+                rows = cursor.fetchall()
+                result = rows[0][0] if rows else None
+                return result if result is not None else 0
+        except MySQLError as e:
+            logger.error("Error executing count query: %s (%s)", query, e)
+            raise
+
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """
+        Execute write statements in one transaction.
+
+        DDL statements commit implicitly in MySQL, so only DML is atomic.
+        """
+        try:
+            with self.get_connection() as connection:
+                connection.start_transaction()
+                try:
+                    cursor = connection.cursor()
+                    for query, params in statements:
+                        cursor.execute(query, tuple(params or ()))
+                    cursor.close()
+                    connection.commit()
+                except MySQLError:
+                    connection.rollback()
+                    raise
+        except MySQLError as e:
+            logger.error("Error executing write statements: %s", e)
             raise
 
     def get_table_columns(self, table_name: str) -> List[Dict[str, str]]:
         """Get column information for a table"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            cursor.execute(f"DESCRIBE {table_name}")
-            columns = []
-            for row in cursor.fetchall():
-                columns.append(
-                    {"column_name": row["Field"], "column_type": row["Type"]}
-                )
-            cursor.close()
-            connection.close()
-            return columns
+            with self.get_connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(f"DESCRIBE {table_name}")
+                columns = []
+                for row in cursor.fetchall():
+                    columns.append(
+                        {"column_name": row["Field"], "column_type": row["Type"]}
+                    )
+                cursor.close()
+                return columns
         except MySQLError as e:
-            print(f"Error getting table columns: {e}")
+            logger.error("Error getting table columns: %s", e)
             raise
 
     def get_table_count(self, table_name: str) -> int:
         """Get total row count for a table"""
         try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            result = cursor.fetchone()[0]
-            cursor.close()
-            connection.close()
-            return result
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                result = cursor.fetchone()[0]
+                cursor.close()
+                return result
+        except MySQLError as e:
+            logger.error("Error getting table count: %s", e)
+            raise
+
+    def get_table_indexes(self, table_name: str) -> List[List[str]]:
+        """Get the column list of every index on a table"""
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(f"SHOW INDEX FROM {table_name}")
+                indexes: Dict[str, List[Tuple[int, str]]] = {}
+                for row in cursor.fetchall():
+                    indexes.setdefault(row["Key_name"], []).append(
+                        (row["Seq_in_index"], row["Column_name"])
+                    )
+                cursor.close()
+                return [
+                    [column for _, column in sorted(columns)]
+                    for columns in indexes.values()
+                ]
         except MySQLError as e:
-            print(f"Error getting table count: {e}")
+            logger.error("Error getting table indexes: %s", e)
+            raise
+
+    def get_table_statistics(self, table_name: str) -> Dict[str, Any]:
+        """Get InnoDB's estimated row count and index cardinalities of a table"""
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    (table_name,),
+                )
+                row = cursor.fetchone()
+                cursor.execute(
+                    "SELECT COLUMN_NAME, MAX(CARDINALITY) FROM information_schema.STATISTICS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND SEQ_IN_INDEX = 1 "
+                    "GROUP BY COLUMN_NAME",
+                    (table_name,),
+                )
+                distinct = {
+                    column: int(cardinality)
+                    for column, cardinality in cursor.fetchall()
+                    if cardinality
+                }
+                cursor.close()
+                return {
+                    "rows": int(row[0]) if row and row[0] is not None else None,
+                    "distinct": distinct,
+                }
+        except MySQLError as e:
+            logger.error("Error getting table statistics: %s", e)
+            raise
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the EXPLAIN FORMAT=TREE plan of a query (MySQL 8.0.16+)"""
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"EXPLAIN FORMAT=TREE {query}", tuple(params or ()))
+                plan = [line for row in cursor.fetchall() for line in row[0].splitlines()]
+                cursor.close()
+                return plan
+        except MySQLError as e:
+            logger.error("Error explaining query: %s (%s)", query, e)
+            raise
+
+
+class DuckDBConnection:
+    """
+    DuckDB database connection implementation with one pooled cursor per thread.
+
+    A single database instance (a file or ``:memory:``) is opened once; every
+    thread gets its own cursor on it, which DuckDB allows to run concurrently.
+    Parquet files can be exposed as views, so they are scanned in place.
+    """
+
+    def __init__(
+        self,
+        connection_config: Dict[str, Any],
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+    ):
+        if not DUCKDB_AVAILABLE:
+            raise ImportError("duckdb is required for DuckDB connections")
+        self.connection_config = connection_config
+        self._database = None
+        self._database_lock = threading.Lock()
+        self.pool = ThreadLocalConnectionPool(
+            connect=self._connect,
+            is_healthy=_duckdb_is_healthy,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+        )
+
+    def _open_database(self):
+        """Open the shared database instance and register Parquet views on first use"""
+        with self._database_lock:
+            if self._database is None:
+                database = duckdb.connect(
+                    str(self.connection_config.get("database", ":memory:")),
+                    read_only=self.connection_config.get("read_only", False),
+                )
+                for view_name, parquet_path in self.connection_config.get(
+                    "parquet", {}
+                ).items():
+                    # DDL cannot take bound parameters; quote the path as a literal
+                    path_literal = str(parquet_path).replace("'", "''")
+                    database.execute(
+                        f"CREATE OR REPLACE VIEW {view_name} AS "
+                        f"SELECT * FROM read_parquet('{path_literal}')"
+                    )
+                self._database = database
+            return self._database
+
+    def _connect(self):
+        """Open a new cursor on the shared DuckDB database"""
+        try:
+            return self._open_database().cursor()
+        except duckdb.Error as e:
+            logger.error("Error connecting to DuckDB: %s", e)
+            raise
+
+    def get_connection(self):
+        """Get the calling thread's pooled DuckDB cursor (context manager)"""
+        return self.pool.connection()
+
+    def warm(self) -> None:
+        """Open the database and the calling thread's cursor ahead of the first query"""
+        with self.get_connection():
+            pass
+
+    def close(self) -> None:
+        """Close all per-thread cursors and the shared database"""
+        self.pool.close_all()
+        with self._database_lock:
+            if self._database is not None:
+                self._database.close()
+                self._database = None
+
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query and return results as list of dictionaries"""
+        columns, rows = self.execute_query_columnar(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query and return column names with plain row tuples"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute(query, list(params or ()))
+                rows = conn.fetchall()
+                columns = [description[0] for description in conn.description]
+                return columns, rows
+        except duckdb.Error as e:
+            logger.error("Error executing query: %s (%s)", query, e)
+            raise
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a SELECT query and yield row tuples in chunks of ``chunk_size``.
+
+        Uses its own cursor, since chunks may be consumed from different threads.
+        """
+        conn = self._connect()
+        try:
+            conn.execute(query, list(params or ()))
+            columns = [description[0] for description in conn.description]
+            while True:
+                rows = conn.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        except duckdb.Error as e:
+            logger.error("Error streaming query: %s (%s)", query, e)
+            raise
+        finally:
+            conn.close()
+
+    def execute_count_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> int:
+        """Execute a COUNT query and return the result"""
+        try:
+            with self.get_connection() as conn:
+                result = conn.execute(query, list(params or ())).fetchone()[0]
+                return result if result is not None else 0
+        except duckdb.Error as e:
+            logger.error("Error executing count query: %s (%s)", query, e)
+            raise
+
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """Execute write statements in one transaction (rolled back on error)"""
+        with self.get_connection() as conn:
+            conn.begin()
+            try:
+                for query, params in statements:
+                    conn.execute(query, list(params or ()))
+                conn.commit()
+            except duckdb.Error:
+                conn.rollback()
+                raise
+
+    def get_table_columns(self, table_name: str) -> List[Dict[str, str]]:
+        """Get column information for a table"""
+        with self.get_connection() as conn:
+            conn.execute(f"DESCRIBE {table_name}")
+            return [
+                {"column_name": row[0], "column_type": row[1]}
+                for row in conn.fetchall()
+            ]
+
+    def get_table_count(self, table_name: str) -> int:
+        """Get total row count for a table"""
+        with self.get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+
+    def get_table_indexes(self, table_name: str) -> List[List[str]]:
+        """Get the column list of every ART index on a table"""
+        with self.get_connection() as conn:
+            rows = conn.execute(
+                "SELECT expressions FROM duckdb_indexes() WHERE table_name = ?",
+                [table_name],
+            ).fetchall()
+            return [
+                [str(expression).strip('"') for expression in row[0]] for row in rows
+            ]
+
+    def get_table_statistics(self, table_name: str) -> Dict[str, Any]:
+        """Get the estimated row count of a table (None for Parquet views)"""
+        with self.get_connection() as conn:
+            row = conn.execute(
+                "SELECT estimated_size FROM duckdb_tables() WHERE table_name = ?",
+                [table_name],
+            ).fetchone()
+            return {"rows": row[0] if row else None, "distinct": {}}
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the EXPLAIN plan of a query"""
+        with self.get_connection() as conn:
+            rows = conn.execute(f"EXPLAIN {query}", list(params or ())).fetchall()
+            return [line for row in rows for line in row[1].splitlines()]
+
+
+class SnowflakeConnection:
+    """Snowflake database connection implementation backed by a session pool"""
+
+    def __init__(
+        self,
+        connection_config: Union[str, Dict[str, Any]],
+        min_size: int = DEFAULT_POOL_MIN_SIZE,
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        idle_timeout: float = DEFAULT_POOL_IDLE_TIMEOUT,
+        health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+    ):
+        if not SNOWFLAKE_AVAILABLE:
+            raise ImportError(
+                "snowflake-connector-python is required for Snowflake connections"
+            )
+        self.connection_config = connection_config
+        self.pool = ConnectionPool(
+            connect=self._connect,
+            is_healthy=_snowflake_is_healthy,
+            min_size=min_size,
+            max_size=max_size,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+        )
+
+    def _connect(self):
+        """Open a new Snowflake session"""
+        try:
+            if isinstance(self.connection_config, str):
+                # Named connection from connections.toml
+                return snowflake.connector.connect(
+                    connection_name=self.connection_config
+                )
+            return snowflake.connector.connect(**self.connection_config)
+        except SnowflakeError as e:
+            logger.error("Error connecting to Snowflake: %s", e)
+            raise
+
+    def get_connection(self):
+        """Borrow a Snowflake session from the pool (context manager)"""
+        return self.pool.connection()
+
+    def warm(self) -> None:
+        """Open ``min_size`` Snowflake sessions ahead of the first query"""
+        self.pool.warm()
+
+    def close(self) -> None:
+        """Close all idle pooled Snowflake sessions"""
+        self.pool.close_all()
+
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query and return results as list of dictionaries"""
+        columns, rows = self.execute_query_columnar(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query and return column names with row tuples"""
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, tuple(params or ()))
+                    rows = cursor.fetchall()
+                    columns = [description[0] for description in cursor.description]
+                    return columns, rows
+        except SnowflakeError as e:
+            logger.error("Error executing query: %s (%s)", query, e)
+            raise
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a SELECT query and yield row tuples in chunks of ``chunk_size``.
+
+        The pooled session is held until the stream is exhausted or closed;
+        result batches are downloaded as chunks are consumed.
+        """
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, tuple(params or ()))
+                    columns = [description[0] for description in cursor.description]
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield columns, rows
+                finally:
+                    try:
+                        cursor.close()
+                    except SnowflakeError:
+                        # The pool discards the connection of an abandoned stream
+                        pass
+        except SnowflakeError as e:
+            logger.error("Error streaming query: %s (%s)", query, e)
+            raise
+
+    def execute_count_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> int:
+        """Execute a COUNT query and return the result"""
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, tuple(params or ()))
+                    row = cursor.fetchone()
+                    result = row[0] if row else None
+                    return result if result is not None else 0
+        except SnowflakeError as e:
+            logger.error("Error executing count query: %s (%s)", query, e)
+            raise
+
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """
+        Execute write statements in one transaction.
+
+        DDL statements commit implicitly in Snowflake, so only DML is atomic.
+        """
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("BEGIN")
+                    try:
+                        for query, params in statements:
+                            cursor.execute(query, tuple(params or ()))
+                        connection.commit()
+                    except SnowflakeError:
+                        connection.rollback()
+                        raise
+        except SnowflakeError as e:
+            logger.error("Error executing write statements: %s", e)
+            raise
+
+    def get_table_columns(self, table_name: str) -> List[Dict[str, str]]:
+        """Get column information for a table"""
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DESCRIBE TABLE {table_name}")
+                    return [
+                        {"column_name": row[0], "column_type": row[1]}
+                        for row in cursor.fetchall()
+                    ]
+        except SnowflakeError as e:
+            logger.error("Error getting table columns: %s", e)
+            raise
+
+    def get_table_count(self, table_name: str) -> int:
+        """Get total row count for a table"""
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                    return cursor.fetchone()[0]
+        except SnowflakeError as e:
+            logger.error("Error getting table count: %s", e)
+            raise
+
+    def get_table_indexes(self, table_name: str) -> List[List[str]]:
+        """Snowflake has no secondary indexes (micro-partition pruning instead)"""
+        return []
+
+    def get_table_statistics(self, table_name: str) -> Dict[str, Any]:
+        """Get the row count Snowflake keeps in table metadata"""
+        *schema, name = table_name.split(".")
+        query = (
+            "SELECT ROW_COUNT FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = %s"
+        )
+        params = [name.strip('"').upper()]
+        if schema:
+            query += " AND TABLE_SCHEMA = %s"
+            params.append(schema[-1].strip('"').upper())
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    row = cursor.fetchone()
+                    return {"rows": row[0] if row else None, "distinct": {}}
+        except SnowflakeError as e:
+            logger.error("Error getting table statistics: %s", e)
+            raise
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the EXPLAIN USING TEXT plan of a query"""
+        try:
+            with self.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN USING TEXT {query}", tuple(params or ()))
+                    return [
+                        line for row in cursor.fetchall() for line in row[0].splitlines()
+                    ]
+        except SnowflakeError as e:
+            logger.error("Error explaining query: %s (%s)", query, e)
             raise
 
 
 class DatabaseManager:
     """
     Generic Database Manager that works with different database types.
+
+    Reads are spread over the configured read replicas (falling back to the
+    primary) and writes go to the primary. A table sharded across several
+    databases is read by fanning queries out to every shard: result rows are
+    concatenated, counts summed, and pages merge-sorted on their sort keys
+    (see ``execute_fanout_query``); writes are applied to every shard.
     """
 
     def __init__(self, config: DatabaseConfig):
@@ -189,41 +1031,360 @@ class DatabaseManager:
             config: DatabaseConfig instance specifying database type and connection details
         """
         self.config = config
-        self.connection = self._create_connection()
+        self.shards = [
+            self._create_connection(connection_string) for connection_string in config.shards
+        ]
+        self.connection = (
+            self.shards[0] if self.shards else self._create_connection(config.connection_string)
+        )
+        self.replicas = ReplicaSet(
+            self.connection,
+            [self._create_connection(connection_string) for connection_string in config.replicas],
+            retry_after=config.replica_retry_after,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._fanout_executor: Optional[ThreadPoolExecutor] = None
 
-    def _create_connection(self) -> DatabaseConnection:
+    def _create_connection(self, connection_string: Any) -> DatabaseConnection:
         """Create appropriate database connection based on config"""
         if self.config.database_type == "sqlite":
-            return SQLiteConnection(self.config.connection_string)
+            return SQLiteConnection(
+                connection_string,
+                idle_timeout=self.config.pool_idle_timeout,
+                health_check_interval=self.config.pool_health_check_interval,
+                statement_cache_size=self.config.statement_cache_size,
+            )
         elif self.config.database_type == "mysql":
-            return MySQLConnection(self.config.connection_string)
+            return MySQLConnection(
+                connection_string,
+                min_size=self.config.pool_min_size,
+                max_size=self.config.pool_max_size,
+                idle_timeout=self.config.pool_idle_timeout,
+                health_check_interval=self.config.pool_health_check_interval,
+                statement_cache_size=self.config.statement_cache_size,
+            )
+        elif self.config.database_type == "duckdb":
+            return DuckDBConnection(
+                connection_string,
+                idle_timeout=self.config.pool_idle_timeout,
+                health_check_interval=self.config.pool_health_check_interval,
+            )
         elif self.config.database_type == "snowflake":
-            # For future implementation - would require snowflake-connector-python
-            raise NotImplementedError("Snowflake connection not yet implemented")
+            return SnowflakeConnection(
+                connection_string,
+                min_size=self.config.pool_min_size,
+                max_size=self.config.pool_max_size,
+                idle_timeout=self.config.pool_idle_timeout,
+                health_check_interval=self.config.pool_health_check_interval,
+            )
         else:
             raise ValueError(f"Unsupported database type: {self.config.database_type}")
 
-    def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Execute a SELECT query and return results"""
-        return self.connection.execute_query(query)
+    @property
+    def is_sharded(self) -> bool:
+        """Check if the table is split across more than one shard"""
+        return len(self.shards) > 1
 
-    def execute_count_query(self, query: str) -> int:
-        """Execute a COUNT query and return the result"""
-        return self.connection.execute_count_query(query)
+    def shards_for(self, predicate: Predicate) -> Optional[List[int]]:
+        """Shards that can hold rows matching a filter predicate (None for all)"""
+        if not self.is_sharded:
+            return None
+        return prune_shards(predicate, self.config.shard_key, len(self.shards))
+
+    def _fan_out(self, operation, shards: Optional[Sequence[int]] = None) -> List[Any]:
+        """Run an operation (connection -> result) on every (selected) shard in parallel"""
+        targets = self.shards if shards is None else [self.shards[index] for index in shards]
+        if len(targets) == 1:
+            return [operation(targets[0])]
+        if self._fanout_executor is None:
+            # Separate from the query executor, whose threads wait on these tasks
+            self._fanout_executor = ThreadPoolExecutor(
+                max_workers=self.config.executor_max_workers * len(self.shards),
+                thread_name_prefix="ssrm-shard",
+            )
+        return list(self._fanout_executor.map(operation, targets))
+
+    def _read(self, operation: Callable[[DatabaseConnection], Any], primary: bool = False) -> Any:
+        """Run a read on a replica, or on the primary for tables only it has (side tables)"""
+        if primary:
+            return operation(self.connection)
+        return self.replicas.run(operation)
+
+    def execute_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, primary: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query with bound parameters and return results"""
+        if self.is_sharded:
+            pages = self._fan_out(lambda connection: connection.execute_query(query, params))
+            return [row for page in pages for row in page]
+        return self._read(lambda connection: connection.execute_query(query, params), primary)
+
+    def execute_query_columnar(
+        self, query: str, params: Optional[Sequence[Any]] = None, primary: bool = False
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a SELECT query and return (column names, row tuples)"""
+        if self.is_sharded:
+            results = self._fan_out(
+                lambda connection: connection.execute_query_columnar(query, params)
+            )
+            return results[0][0], [row for _, rows in results for row in rows]
+        return self._read(
+            lambda connection: connection.execute_query_columnar(query, params), primary
+        )
+
+    def execute_count_query(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        shards: Optional[Sequence[int]] = None,
+        primary: bool = False,
+    ) -> int:
+        """
+        Execute a COUNT query with bound parameters and return the result.
+
+        On a sharded table the per-shard counts are summed, which is exact for
+        ``COUNT(*)`` since every row lives on exactly one shard.
+        """
+        if self.is_sharded:
+            return sum(
+                self._fan_out(
+                    lambda connection: connection.execute_count_query(query, params), shards
+                )
+            )
+        return self._read(
+            lambda connection: connection.execute_count_query(query, params), primary
+        )
+
+    def execute_fanout_query(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        sort_keys: Sequence[Tuple[str, bool]] = (),
+        skip: int = 0,
+        limit: Optional[int] = None,
+        columnar: bool = False,
+        shards: Optional[Sequence[int]] = None,
+    ) -> Union[List[Dict[str, Any]], Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a page query on every shard and merge the pages.
+
+        Each shard must return its leading ``skip + limit`` rows sorted on
+        ``sort_keys``; the merged order is sliced to the requested page.
+
+        Args:
+            query: SELECT query with placeholders
+            params: Bound parameters
+            sort_keys: (column, descending) pairs of the query's ORDER BY
+            skip: Rows of the merged order before the page
+            limit: Rows in the page (None for all remaining rows)
+            columnar: Return (column names, row tuples) instead of row dictionaries
+            shards: Shards to query (None for all)
+        """
+        if not self.is_sharded:
+            shards = None
+        if columnar:
+            results = (
+                self._fan_out(
+                    lambda connection: connection.execute_query_columnar(query, params), shards
+                )
+                if self.is_sharded
+                else [self.execute_query_columnar(query, params)]
+            )
+            columns = results[0][0]
+            pages = [rows for _, rows in results]
+            return columns, merge_sorted_pages(
+                pages, sort_keys, skip, limit, columns, null_order=self.null_order
+            )
+
+        pages = (
+            self._fan_out(lambda connection: connection.execute_query(query, params), shards)
+            if self.is_sharded
+            else [self.execute_query(query, params)]
+        )
+        return merge_sorted_pages(pages, sort_keys, skip, limit, null_order=self.null_order)
+
+    def stream_query(
+        self, query: str, params: Optional[Sequence[Any]] = None, chunk_size: int = 5000
+    ) -> Iterator[Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """
+        Execute a SELECT query and yield (column names, row tuples) chunks.
+
+        On a sharded table the shards are streamed one after another, so an
+        ORDER BY only holds within each shard.
+        """
+        if self.is_sharded:
+            return itertools.chain.from_iterable(
+                shard.stream_query(query, params, chunk_size) for shard in self.shards
+            )
+        return self.replicas.run(
+            lambda connection: connection.stream_query(query, params, chunk_size)
+        )
+
+    def execute_write(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """
+        Execute (query, params) write statements in one transaction.
+
+        On a sharded table the statements run on every shard, each shard in
+        its own transaction.
+        """
+        if self.is_sharded:
+            self._fan_out(lambda connection: connection.execute_write(statements))
+            return
+        self.connection.execute_write(statements)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Bounded thread pool used to run blocking queries off the event loop"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.executor_max_workers,
+                thread_name_prefix="ssrm-db",
+            )
+        return self._executor
+
+    async def execute_query_async(
+        self, query: str, params: Optional[Sequence[Any]] = None, primary: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Execute a SELECT query on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        execute = partial(self.execute_query, primary=True) if primary else self.execute_query
+        return await loop.run_in_executor(self.executor, execute, query, params)
+
+    async def execute_query_columnar_async(
+        self, query: str, params: Optional[Sequence[Any]] = None, primary: bool = False
+    ) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        """Execute a columnar SELECT on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        execute = (
+            partial(self.execute_query_columnar, primary=True)
+            if primary
+            else self.execute_query_columnar
+        )
+        return await loop.run_in_executor(self.executor, execute, query, params)
+
+    async def execute_count_query_async(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        shards: Optional[Sequence[int]] = None,
+        primary: bool = False,
+    ) -> int:
+        """Execute a COUNT query on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        execute = (
+            partial(self.execute_count_query, primary=True)
+            if primary
+            else self.execute_count_query
+        )
+        return await loop.run_in_executor(self.executor, execute, query, params, shards)
+
+    async def execute_fanout_query_async(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        **kwargs: Any,
+    ) -> Union[List[Dict[str, Any]], Tuple[List[str], List[Tuple[Any, ...]]]]:
+        """Run ``execute_fanout_query`` on the executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: self.execute_fanout_query(query, params, **kwargs),
+        )
 
     def get_table_columns(self) -> List[Dict[str, str]]:
         """Get column information for the configured table"""
         return self.connection.get_table_columns(self.config.table_name)
 
     def get_table_count(self) -> int:
-        """Get total row count for the configured table"""
+        """Get total row count for the configured table (summed over shards)"""
+        if self.is_sharded:
+            return sum(
+                self._fan_out(
+                    lambda connection: connection.get_table_count(self.config.table_name)
+                )
+            )
         return self.connection.get_table_count(self.config.table_name)
 
+    def get_table_indexes(self) -> List[List[str]]:
+        """Get the column list of every index on the configured table"""
+        return self.connection.get_table_indexes(self.config.table_name)
+
+    def get_table_statistics(self) -> Dict[str, Any]:
+        """
+        Get the database's statistics for the configured table.
+
+        Returns:
+            Dict[str, Any]: ``rows`` (estimated row count or None) and
+            ``distinct`` (column -> estimated distinct values, where known)
+        """
+        if not self.is_sharded:
+            return self.connection.get_table_statistics(self.config.table_name)
+
+        # Rows add up over shards; a shard's distinct count is a lower bound
+        statistics = self._fan_out(
+            lambda connection: connection.get_table_statistics(self.config.table_name)
+        )
+        rows = [shard["rows"] for shard in statistics]
+        distinct: Dict[str, int] = {}
+        for shard in statistics:
+            for column, count in shard["distinct"].items():
+                distinct[column] = max(distinct.get(column, 0), count)
+        return {"rows": None if None in rows else sum(rows), "distinct": distinct}
+
+    def explain_query(
+        self, query: str, params: Optional[Sequence[Any]] = None
+    ) -> List[str]:
+        """Get the database's query plan for a SELECT query, one line per step"""
+        return self.connection.explain_query(query, params)
+
+    def _connections(self) -> List[DatabaseConnection]:
+        """Every connection: primary (or shards) and read replicas"""
+        return (self.shards or [self.connection]) + self.replicas.replicas
+
+    def warm(self) -> None:
+        """Pre-open pooled connections so the first request does not pay for connecting"""
+        for connection in self._connections():
+            connection.warm()
+
+    def close(self) -> None:
+        """Stop the query executors and close pooled connections"""
+        for executor in (self._executor, self._fanout_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._executor = None
+        self._fanout_executor = None
+        for connection in self._connections():
+            connection.close()
+
+    def routing_stats(self) -> dict:
+        """Get replica read counters and health, and the number of shards"""
+        return {"shards": len(self.shards), **self.replicas.stats()}
+
     @property
     def table_name(self) -> str:
         """Get the configured table name"""
         return self.config.table_name
 
+    @property
+    def keyset_column(self) -> Optional[str]:
+        """Get the unique tiebreaker column for keyset pagination, if enabled"""
+        return self.config.keyset_column
+
+    @property
+    def rollup_syntax(self) -> Optional[str]:
+        """Get the ROLLUP dialect of this database, or None if unsupported"""
+        return self.config.rollup_syntax
+
+    @property
+    def null_order(self) -> str:
+        """Get where this database sorts NULLs (see ``DatabaseConfig.null_order``)"""
+        return self.config.null_order
+
+    @property
+    def placeholder(self) -> str:
+        """Get the bind parameter marker used by this database's driver"""
+        return self.config.placeholder
+
     @property
     def escape_char(self) -> str:
         """Get the SQL escape character for this database"""
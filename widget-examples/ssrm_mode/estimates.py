@@ -0,0 +1,311 @@
+"""
+Estimated row counts for SSRM AgGrid application.
+
+For very large tables the exact ``COUNT(*)`` is often the slowest part of a
+request. :class:`CountEstimator` answers unfiltered and equality-filtered
+counts from table statistics, and top-level group counts from HyperLogLog
+sketches, while the exact count is computed in the background and stored in
+the count cache for the following requests.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from cache import CountCache, TTLCache
+from database import DatabaseManager
+from models import AgGridOptions
+from schema import SchemaCache
+
+logger = logging.getLogger(__name__)
+
+
+class EstimatedCount(int):
+    """Row count known to be approximate (serializes as a plain int)"""
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count sketch.
+
+    Uses ``2 ** precision`` one-byte registers; the standard error is about
+    ``1.04 / sqrt(2 ** precision)`` (0.8% at the default precision of 14).
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    @staticmethod
+    def _hash(value: Any) -> int:
+        digest = hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def add(self, value: Any) -> None:
+        """Add one value to the sketch"""
+        hashed = self._hash(value)
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1-bit in the remaining 64 - p bits
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values: Iterable[Any]) -> None:
+        """Add many values to the sketch"""
+        for value in values:
+            self.add(value)
+
+    def count(self) -> int:
+        """Estimate the number of distinct values added"""
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Small range correction (linear counting)
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class CountEstimator:
+    """
+    Estimates SSRM row counts without running COUNT queries.
+
+    - Unfiltered flat views use the table row count from database statistics.
+    - Equality filters (set filters, ``equals``, expanded group keys) scale it
+      by ``values / distinct values`` of each column, assuming independence.
+    - Top-level group counts use the column's distinct count, from database
+      statistics or a HyperLogLog sketch built once in the background.
+
+    Views with other filters, and tables smaller than ``min_rows``, return None
+    so the exact count is used. Sketch builds and exact-count refinements run on
+    the estimator's own small thread pool, so these full scans never occupy the
+    threads serving grid requests.
+    """
+
+    def __init__(
+        self,
+        min_rows: int = 1_000_000,
+        stats_ttl: Optional[float] = 300.0,
+        sketch_precision: int = 14,
+        sketch_chunk_size: int = 50_000,
+        schema_cache: Optional[SchemaCache] = None,
+        background_workers: int = 1,
+    ):
+        """
+        Initialize count estimator.
+
+        Args:
+            min_rows: Tables with fewer (estimated) rows are always counted exactly
+            stats_ttl: Seconds table statistics and sketches stay valid
+            sketch_precision: HyperLogLog precision of column sketches
+            sketch_chunk_size: Rows fetched per chunk while building a sketch
+            schema_cache: Take table statistics from this cache instead of querying them
+            background_workers: Threads building sketches and refining counts
+        """
+        self.min_rows = min_rows
+        self.sketch_precision = sketch_precision
+        self.sketch_chunk_size = sketch_chunk_size
+        self.schema_cache = schema_cache
+        self.background_workers = background_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = TTLCache(max_entries=64, ttl=stats_ttl)
+        self._sketches = TTLCache(max_entries=256, ttl=stats_ttl)
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self.estimates = 0
+        self.refinements = 0
+
+    def _table_statistics(self, db_manager: DatabaseManager) -> Dict[str, Any]:
+        if self.schema_cache is not None:
+            return self.schema_cache.get(db_manager).statistics
+        stats = self._stats.get(db_manager.table_name)
+        if stats is None:
+            try:
+                stats = db_manager.get_table_statistics()
+            except Exception as e:
+                logger.warning("Could not read table statistics: %s", e)
+                stats = {"rows": None, "distinct": {}}
+            self._stats.set(db_manager.table_name, stats)
+        return stats
+
+    def _distinct(self, db_manager: DatabaseManager, column: str) -> Optional[int]:
+        """Distinct count of a column from statistics or its sketch (built on first use)"""
+        distinct = self._table_statistics(db_manager)["distinct"].get(column)
+        if distinct:
+            return distinct
+
+        sketch = self._sketches.get((db_manager.table_name, column))
+        if sketch is not None:
+            return max(sketch.count(), 1)
+
+        self._schedule(
+            (db_manager.table_name, "sketch", column),
+            self._build_sketch,
+            db_manager,
+            column,
+        )
+        return None
+
+    def _build_sketch(self, db_manager: DatabaseManager, column: str) -> None:
+        started = time.perf_counter()
+        sketch = HyperLogLog(self.sketch_precision)
+        escaped = f"{db_manager.escape_char}{column}{db_manager.escape_char}"
+        for _, rows in db_manager.stream_query(
+            f"SELECT {escaped} FROM {db_manager.table_name}",
+            chunk_size=self.sketch_chunk_size,
+        ):
+            sketch.update(row[0] for row in rows if row[0] is not None)
+        self._sketches.set((db_manager.table_name, column), sketch)
+        logger.info(
+            "Built distinct-count sketch of %s.%s in %.0f ms",
+            db_manager.table_name,
+            column,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool of sketch builds and count refinements, apart from the query executor"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.background_workers, thread_name_prefix="ssrm-estimate"
+            )
+        return self._executor
+
+    def _schedule(self, key: Tuple, function, *args) -> None:
+        """Run a background task on the estimator's executor unless already running"""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        def run():
+            try:
+                function(*args)
+            except Exception:
+                logger.exception("Background count task %s failed", key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        self.executor.submit(run)
+
+    def _equality_values(self, options: AgGridOptions) -> Optional[Dict[str, int]]:
+        """Column -> number of accepted values, or None if a filter cannot be estimated"""
+        values: Dict[str, int] = {}
+        for index, _ in enumerate(options.groupKeys or []):
+            if index < len(options.rowGroupCols):
+                group_col = options.rowGroupCols[index]
+                values[group_col.get("field", group_col.get("id", ""))] = 1
+
+        for field_name, filter_config in (options.filterModel or {}).items():
+            if filter_config.get("filterType") == "set":
+                count = len(filter_config.get("values") or [])
+                if not count:
+                    continue  # Empty set filters add no condition
+                values[field_name] = min(values.get(field_name, count), count)
+            elif filter_config.get("type") == "equals" and filter_config.get("filter") not in (
+                None,
+                "",
+            ):
+                values[field_name] = 1
+            else:
+                return None
+        return values
+
+    def estimate(
+        self, db_manager: DatabaseManager, options: AgGridOptions
+    ) -> Optional[int]:
+        """
+        Estimate the row (or group) count of a request.
+
+        Returns:
+            Optional[int]: The estimate, or None if the exact count should be used
+        """
+        if options.pivotMode and options.pivotCols:
+            return None
+
+        rows = self._table_statistics(db_manager)["rows"]
+        if rows is None or rows < self.min_rows:
+            return None
+
+        equality = self._equality_values(options)
+        if equality is None:
+            return None
+
+        if options.is_doing_grouping():
+            group_col = options.get_row_group_column()
+            if not group_col or equality:
+                # Distinct counts within a filtered subset are not estimable
+                return None
+            estimate = self._distinct(db_manager, group_col.get("id", group_col.get("field", "")))
+        else:
+            estimate = float(rows)
+            for column, value_count in equality.items():
+                distinct = self._distinct(db_manager, column)
+                if distinct is None:
+                    return None
+                estimate *= min(value_count / distinct, 1.0)
+
+        if estimate is None:
+            return None
+        self.estimates += 1
+        return int(round(estimate))
+
+    async def estimate_async(
+        self, db_manager: DatabaseManager, options: AgGridOptions
+    ) -> Optional[int]:
+        """Run ``estimate`` on the database executor (statistics may need a query)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            db_manager.executor, self.estimate, db_manager, options
+        )
+
+    def refine(
+        self,
+        db_manager: DatabaseManager,
+        options: AgGridOptions,
+        count_query: str,
+        count_params: Sequence[Any],
+        count_cache: Optional[CountCache],
+    ) -> None:
+        """Compute the exact count in the background and store it in the count cache"""
+        if count_cache is None:
+            return
+
+        # Taken now: the count must not outlive a write made while it is queued
+        version = count_cache.table_version(db_manager.table_name)
+
+        def run_count():
+            total_count = db_manager.execute_count_query(count_query, count_params)
+            count_cache.set(db_manager.table_name, options, total_count, version=version)
+            self.refinements += 1
+
+        key = ("refine",) + CountCache.make_key(db_manager.table_name, options)
+        self._schedule(key, run_count)
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Drop cached statistics and sketches, e.g. after a bulk load"""
+        if table_name is None:
+            return self._stats.invalidate() + self._sketches.invalidate()
+        return self._stats.invalidate(lambda key: key == table_name) + self._sketches.invalidate(
+            lambda key: key[0] == table_name
+        )
+
+    def stats(self) -> dict:
+        """Get estimate/refinement counters and the number of built sketches"""
+        return {
+            "estimates": self.estimates,
+            "refinements": self.refinements,
+            "sketches": len(self._sketches),
+            "pending_tasks": len(self._pending),
+        }
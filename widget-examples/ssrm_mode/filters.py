@@ -0,0 +1,625 @@
+"""
+Filter predicates for SSRM AgGrid application.
+
+Parses AG Grid filter models (text, number, date and set filters, including
+combined filters with an ``operator`` and ``conditions``) into a predicate
+tree, simplifies it and renders it as parameterized SQL. Simplification merges
+the conditions on each column before they reach the database: ranges are
+intersected (AND) or united (OR), IN-lists are deduplicated and intersected,
+and contradictory filters collapse to a constant false condition.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+SqlFragment = Tuple[str, List[Any]]
+
+
+class Predicate:
+    """Base class of filter predicates; equal predicates render identical SQL"""
+
+    def key(self) -> tuple:
+        raise NotImplementedError
+
+    def to_sql(self, escape_column: Callable[[str], str], placeholder: str) -> SqlFragment:
+        raise NotImplementedError
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Predicate) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.key()[1:]}"
+
+
+class Const(Predicate):
+    """Condition that is always true or always false"""
+
+    def __init__(self, value: bool):
+        self.value = value
+
+    def key(self) -> tuple:
+        return ("const", self.value)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        return ("1 = 1" if self.value else "1 = 0"), []
+
+
+TRUE = Const(True)
+FALSE = Const(False)
+
+
+class Raw(Predicate):
+    """
+    Condition on one column that is passed through unchanged (LIKE, blank, ...).
+
+    ``template`` may reference ``{column}`` and ``{p}`` (the placeholder).
+    """
+
+    def __init__(self, field: str, template: str, params: Sequence[Any] = ()):
+        self.field = field
+        self.template = template
+        self.params = tuple(params)
+
+    def key(self) -> tuple:
+        return ("raw", self.field, self.template, self.params)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        sql = self.template.format(column=escape_column(self.field), p=placeholder)
+        return sql, list(self.params)
+
+
+class TextMatch(Raw):
+    """
+    LIKE condition of a text filter, kept recognizable for text search indexes.
+
+    Renders exactly like the equivalent :class:`Raw` condition.
+    """
+
+    PATTERNS = {
+        "contains": "%{}%",
+        "notContains": "%{}%",
+        "startsWith": "{}%",
+        "endsWith": "%{}",
+    }
+
+    def __init__(self, field: str, condition_type: str, value: Any):
+        self.condition_type = condition_type
+        self.value = value
+        operator = "NOT LIKE" if condition_type == "notContains" else "LIKE"
+        super().__init__(
+            field,
+            f"{{column}} {operator} {{p}}",
+            [self.PATTERNS[condition_type].format(value)],
+        )
+
+
+def _unique(values: Sequence[Any]) -> Tuple[Any, ...]:
+    """Values without duplicates, in first-seen order"""
+    seen = []
+    for value in values:
+        if value not in seen:
+            seen.append(value)
+    return tuple(seen)
+
+
+class InValues(Predicate):
+    """``column IN (values)``, rendered as ``=`` for a single value"""
+
+    def __init__(self, field: str, values: Sequence[Any]):
+        self.field = field
+        self.values = _unique(values)
+
+    def key(self) -> tuple:
+        return ("in", self.field, self.values)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        column = escape_column(self.field)
+        if len(self.values) == 1:
+            return f"{column} = {placeholder}", list(self.values)
+        placeholders = ", ".join([placeholder] * len(self.values))
+        return f"{column} IN ({placeholders})", list(self.values)
+
+
+class NotInValues(Predicate):
+    """``column NOT IN (values)``, rendered as ``!=`` for a single value"""
+
+    def __init__(self, field: str, values: Sequence[Any]):
+        self.field = field
+        self.values = _unique(values)
+
+    def key(self) -> tuple:
+        return ("not_in", self.field, self.values)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        column = escape_column(self.field)
+        if len(self.values) == 1:
+            return f"{column} != {placeholder}", list(self.values)
+        placeholders = ", ".join([placeholder] * len(self.values))
+        return f"{column} NOT IN ({placeholders})", list(self.values)
+
+
+class Range(Predicate):
+    """
+    Interval condition on one column; a None bound is unbounded.
+
+    A range without bounds only excludes NULLs, like any comparison.
+    """
+
+    def __init__(
+        self,
+        field: str,
+        low: Any = None,
+        low_inclusive: bool = True,
+        high: Any = None,
+        high_inclusive: bool = True,
+    ):
+        self.field = field
+        self.low = low
+        self.low_inclusive = low_inclusive if low is not None else True
+        self.high = high
+        self.high_inclusive = high_inclusive if high is not None else True
+
+    def key(self) -> tuple:
+        return (
+            "range",
+            self.field,
+            self.low,
+            self.low_inclusive,
+            self.high,
+            self.high_inclusive,
+        )
+
+    def is_empty(self) -> bool:
+        """Check if no value satisfies the range"""
+        if self.low is None or self.high is None:
+            return False
+        if self.low == self.high:
+            return not (self.low_inclusive and self.high_inclusive)
+        return self.low > self.high
+
+    def contains(self, value: Any) -> bool:
+        """Check if a value lies in the range"""
+        if self.low is not None:
+            if value < self.low or (value == self.low and not self.low_inclusive):
+                return False
+        if self.high is not None:
+            if value > self.high or (value == self.high and not self.high_inclusive):
+                return False
+        return True
+
+    def intersect(self, other: "Range") -> "Range":
+        """Range of the values in both ranges"""
+        low, low_inclusive = self.low, self.low_inclusive
+        if other.low is not None and (
+            low is None or other.low > low or (other.low == low and not other.low_inclusive)
+        ):
+            low, low_inclusive = other.low, other.low_inclusive
+        high, high_inclusive = self.high, self.high_inclusive
+        if other.high is not None and (
+            high is None
+            or other.high < high
+            or (other.high == high and not other.high_inclusive)
+        ):
+            high, high_inclusive = other.high, other.high_inclusive
+        return Range(self.field, low, low_inclusive, high, high_inclusive)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        column = escape_column(self.field)
+        if self.low is not None and self.high is not None and (
+            self.low_inclusive and self.high_inclusive
+        ):
+            return (
+                f"{column} BETWEEN {placeholder} AND {placeholder}",
+                [self.low, self.high],
+            )
+
+        parts, params = [], []
+        if self.low is not None:
+            parts.append(f"{column} {'>=' if self.low_inclusive else '>'} {placeholder}")
+            params.append(self.low)
+        if self.high is not None:
+            parts.append(f"{column} {'<=' if self.high_inclusive else '<'} {placeholder}")
+            params.append(self.high)
+        if not parts:
+            return f"{column} IS NOT NULL", []
+        return " AND ".join(parts), params
+
+
+class And(Predicate):
+    """Conjunction of predicates"""
+
+    def __init__(self, children: Sequence[Predicate]):
+        self.children = tuple(children)
+
+    def key(self) -> tuple:
+        return ("and", self.children)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        parts, params = [], []
+        for child in self.children:
+            sql, child_params = child.to_sql(escape_column, placeholder)
+            parts.append(sql)
+            params.extend(child_params)
+        return " AND ".join(parts), params
+
+
+class Or(Predicate):
+    """Disjunction of predicates"""
+
+    def __init__(self, children: Sequence[Predicate]):
+        self.children = tuple(children)
+
+    def key(self) -> tuple:
+        return ("or", self.children)
+
+    def to_sql(self, escape_column, placeholder) -> SqlFragment:
+        parts, params = [], []
+        for child in self.children:
+            sql, child_params = child.to_sql(escape_column, placeholder)
+            if isinstance(child, (And, Raw)) or (
+                isinstance(child, Range) and child.low is not None and child.high is not None
+            ):
+                sql = f"({sql})"
+            parts.append(sql)
+            params.extend(child_params)
+        return f"({' OR '.join(parts)})", params
+
+
+# Parsing AG Grid filter models
+
+
+def _parse_text(field: str, config: Dict[str, Any]) -> Optional[Predicate]:
+    condition_type = config.get("type", "contains")
+    filter_value = config.get("filter", "")
+
+    if condition_type == "notBlank":
+        return Raw(field, "{column} IS NOT NULL AND {column} != ''")
+    if condition_type == "blank":
+        return Raw(field, "({column} IS NULL OR {column} = '')")
+    if not filter_value:
+        # If filter value is empty, return no condition
+        return None
+
+    if condition_type in TextMatch.PATTERNS:
+        return TextMatch(field, condition_type, filter_value)
+    if condition_type == "equals":
+        return InValues(field, [filter_value])
+    if condition_type == "notEqual":
+        return NotInValues(field, [filter_value])
+    return None
+
+
+def _parse_number(field: str, config: Dict[str, Any]) -> Optional[Predicate]:
+    condition_type = config.get("type", "equals")
+    filter_value = config.get("filter", 0)
+
+    if condition_type == "notBlank":
+        return Raw(field, "{column} IS NOT NULL AND {column} != 0")
+    if condition_type == "blank":
+        return Raw(field, "({column} IS NULL OR {column} = 0)")
+    if filter_value is None:
+        return None
+
+    if condition_type == "equals":
+        return InValues(field, [filter_value])
+    if condition_type == "notEqual":
+        return NotInValues(field, [filter_value])
+    if condition_type == "greaterThan":
+        return Range(field, low=filter_value, low_inclusive=False)
+    if condition_type == "greaterThanOrEqual":
+        return Range(field, low=filter_value)
+    if condition_type == "lessThan":
+        return Range(field, high=filter_value, high_inclusive=False)
+    if condition_type == "lessThanOrEqual":
+        return Range(field, high=filter_value)
+    if condition_type == "inRange":
+        filter_to = config.get("filterTo", filter_value)
+        return Range(field, low=filter_value, high=filter_to)
+    return None
+
+
+def _parse_date_value(value: Any) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Parse an AG Grid date filter value ("YYYY-MM-DD HH:MM:SS").
+
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: (day, next day) for midnight values,
+        which filter whole days; (timestamp, None) for values with a time
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.time() == datetime.min.time():
+        day = parsed.date()
+        return day.isoformat(), (day + timedelta(days=1)).isoformat()
+    return parsed.isoformat(sep=" "), None
+
+
+def _parse_date(field: str, config: Dict[str, Any]) -> Optional[Predicate]:
+    """
+    Whole-day date conditions become half-open ranges ``[day, next day)``.
+
+    This matches DATE columns as well as DATETIME columns and ISO-8601 text
+    (SQLite), without applying a function to the column. ``inRange`` includes
+    both end days, like the number filter's ``inRange``.
+    """
+    condition_type = config.get("type", "equals")
+    if condition_type == "blank":
+        return Raw(field, "{column} IS NULL")
+    if condition_type == "notBlank":
+        return Raw(field, "{column} IS NOT NULL")
+
+    parsed = _parse_date_value(config.get("dateFrom"))
+    if parsed is None:
+        return None
+    value, next_value = parsed
+
+    if next_value is None:
+        # Exact timestamp
+        if condition_type == "equals":
+            return InValues(field, [value])
+        if condition_type == "notEqual":
+            return NotInValues(field, [value])
+        if condition_type == "greaterThan":
+            return Range(field, low=value, low_inclusive=False)
+        if condition_type == "lessThan":
+            return Range(field, high=value, high_inclusive=False)
+    else:
+        if condition_type == "equals":
+            return Range(field, low=value, high=next_value, high_inclusive=False)
+        if condition_type == "notEqual":
+            return Or(
+                [
+                    Range(field, high=value, high_inclusive=False),
+                    Range(field, low=next_value),
+                ]
+            )
+        if condition_type == "greaterThan":
+            return Range(field, low=next_value)
+        if condition_type == "lessThan":
+            return Range(field, high=value, high_inclusive=False)
+
+    if condition_type == "inRange":
+        parsed_to = _parse_date_value(config.get("dateTo")) or parsed
+        value_to, next_value_to = parsed_to
+        if next_value_to is None:
+            return Range(field, low=value, high=value_to)
+        return Range(field, low=value, high=next_value_to, high_inclusive=False)
+    return None
+
+
+def _parse_set(field: str, config: Dict[str, Any]) -> Optional[Predicate]:
+    values = config.get("values", [])
+    if not values:
+        return None
+    return InValues(field, [str(v) for v in values])
+
+
+FILTER_PARSERS = {
+    "text": _parse_text,
+    "number": _parse_number,
+    "date": _parse_date,
+    "set": _parse_set,
+}
+
+
+def parse_filter(field: str, config: Dict[str, Any]) -> Optional[Predicate]:
+    """
+    Parse the filter model of one column.
+
+    Supports simple models, combined models (``operator`` with ``conditions``,
+    or the older ``condition1``/``condition2``) and multi filters.
+
+    Returns:
+        Optional[Predicate]: None if the filter adds no condition
+    """
+    filter_type = config.get("filterType", "text")
+
+    if filter_type == "multi":
+        children = [
+            parse_filter(field, model) for model in config.get("filterModels") or [] if model
+        ]
+        children = [child for child in children if child is not None]
+        return And(children) if children else None
+
+    conditions = config.get("conditions")
+    if conditions is None and "condition1" in config:
+        conditions = [config.get("condition1"), config.get("condition2")]
+    if conditions is not None:
+        children = []
+        for condition in conditions:
+            if condition:
+                child = parse_filter(field, {"filterType": filter_type, **condition})
+                if child is not None:
+                    children.append(child)
+        if not children:
+            return None
+        if str(config.get("operator", "AND")).upper() == "OR":
+            return Or(children)
+        return And(children)
+
+    parser = FILTER_PARSERS.get(filter_type)
+    return parser(field, config) if parser else None
+
+
+# Simplification
+
+MERGEABLE = (InValues, NotInValues, Range)
+
+
+def _value_kind(value: Any) -> Any:
+    """Type family whose values compare like the database compares them"""
+    if isinstance(value, (int, float)):
+        return "number"
+    return type(value)
+
+
+def _check_comparable(predicates: List[Predicate]) -> None:
+    """
+    Raise TypeError unless all values of the conditions have the same type family.
+
+    Python equality does not match the database's comparison across types
+    (``'2021' != 2021`` in Python, while the database coerces one side), so
+    such conditions must be left for the database to compare.
+    """
+    kinds = set()
+    for predicate in predicates:
+        if isinstance(predicate, Range):
+            values = [v for v in (predicate.low, predicate.high) if v is not None]
+        else:
+            values = predicate.values
+        kinds.update(_value_kind(value) for value in values)
+    if len(kinds) > 1:
+        raise TypeError(f"values of different types: {sorted(map(str, kinds))}")
+
+
+def _merge_and(field: str, predicates: List[Predicate]) -> List[Predicate]:
+    """Merge the ANDed mergeable conditions on one column"""
+    _check_comparable(predicates)
+    values = None
+    excluded: List[Any] = []
+    bounds = Range(field)
+    for predicate in predicates:
+        if isinstance(predicate, InValues):
+            values = (
+                list(predicate.values)
+                if values is None
+                else [value for value in values if value in predicate.values]
+            )
+        elif isinstance(predicate, NotInValues):
+            excluded.extend(predicate.values)
+        else:
+            bounds = bounds.intersect(predicate)
+
+    if bounds.is_empty():
+        return [FALSE]
+    if values is not None:
+        # The IN-list makes the other conditions a filter on its values
+        values = [v for v in values if v not in excluded and bounds.contains(v)]
+        return [InValues(field, values)] if values else [FALSE]
+    if bounds.low is not None and bounds.low == bounds.high:
+        # Only a closed point range survives is_empty()
+        return [FALSE] if bounds.low in excluded else [InValues(field, [bounds.low])]
+
+    merged: List[Predicate] = []
+    if bounds.low is not None or bounds.high is not None:
+        merged.append(bounds)
+    excluded = [value for value in excluded if bounds.contains(value)]
+    if excluded:
+        merged.append(NotInValues(field, excluded))
+    return merged
+
+
+def _union_ranges(ranges: List[Range]) -> List[Range]:
+    """Merge overlapping or touching ranges of one column"""
+    ordered = sorted(
+        ranges, key=lambda r: (r.low is not None, r.low, not r.low_inclusive)
+    )
+    merged = [ordered[0]]
+    for current in ordered[1:]:
+        last = merged[-1]
+        touching = (
+            last.high is None
+            or current.low is None
+            or current.low < last.high
+            or (current.low == last.high and (last.high_inclusive or current.low_inclusive))
+        )
+        if not touching:
+            merged.append(current)
+            continue
+        if last.high is None or current.high is None:
+            high, high_inclusive = None, True
+        elif current.high > last.high:
+            high, high_inclusive = current.high, current.high_inclusive
+        elif current.high == last.high:
+            high, high_inclusive = last.high, last.high_inclusive or current.high_inclusive
+        else:
+            high, high_inclusive = last.high, last.high_inclusive
+        merged[-1] = Range(last.field, last.low, last.low_inclusive, high, high_inclusive)
+    return merged
+
+
+def _merge_or(field: str, predicates: List[Predicate]) -> List[Predicate]:
+    """Merge the ORed mergeable conditions on one column"""
+    values: List[Any] = []
+    ranges: List[Range] = []
+    others: List[Predicate] = []
+    for predicate in predicates:
+        if isinstance(predicate, InValues):
+            values.extend(predicate.values)
+        elif isinstance(predicate, Range):
+            ranges.append(predicate)
+        else:
+            others.append(predicate)
+
+    merged: List[Predicate] = []
+    if ranges:
+        ranges = _union_ranges(ranges)
+        values = [v for v in values if not any(r.contains(v) for r in ranges)]
+    if values:
+        merged.append(InValues(field, values))
+    return merged + ranges + others
+
+
+def simplify(predicate: Optional[Predicate]) -> Predicate:
+    """
+    Normalize a predicate tree into an equivalent, tighter one.
+
+    Nested conjunctions and disjunctions are flattened, duplicates removed,
+    constants folded and the IN/NOT IN/range conditions on each column merged.
+    Conditions whose values have different types (e.g. a string group key and a
+    number filter) are kept as given, for the database to compare.
+    """
+    if predicate is None:
+        return TRUE
+    if not isinstance(predicate, (And, Or)):
+        if isinstance(predicate, (InValues, Range)):
+            try:
+                merged = _merge_and(predicate.field, [predicate])
+            except TypeError:
+                return predicate
+            return merged[0] if len(merged) == 1 else And(merged)
+        return predicate
+
+    is_and = isinstance(predicate, And)
+    absorbing, neutral = (FALSE, TRUE) if is_and else (TRUE, FALSE)
+
+    children: List[Predicate] = []
+    for child in map(simplify, predicate.children):
+        if type(child) is type(predicate):
+            children.extend(child.children)
+        else:
+            children.append(child)
+
+    # Slots keep the first-seen order of columns and other conditions
+    slots: Dict[Any, List[Predicate]] = {}
+    for child in children:
+        if child == absorbing:
+            return absorbing
+        if child == neutral:
+            continue
+        slot = ("field", child.field) if isinstance(child, MERGEABLE) else child
+        slots.setdefault(slot, []).append(child)
+
+    result: List[Predicate] = []
+    for slot, members in slots.items():
+        if not isinstance(slot, tuple) or slot[0] != "field" or len(members) == 1:
+            result.append(members[0])
+            continue
+        try:
+            merged = (_merge_and if is_and else _merge_or)(slot[1], members)
+        except TypeError:
+            # Values of different types cannot be ordered; keep them unmerged
+            merged = list(_unique(members))
+        if absorbing in merged:
+            return absorbing
+        result.extend(merged)
+
+    if not result:
+        return neutral
+    if len(result) == 1:
+        return result[0]
+    return And(result) if is_and else Or(result)
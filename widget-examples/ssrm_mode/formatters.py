@@ -3,8 +3,20 @@ Generic data formatting utilities for SSRM AgGrid application.
 Handles data conversion without hardcoded field mappings.
 """
 
+import datetime
+import decimal
+import json
 import math
-from typing import Any, Dict, List
+import sys
+from json.encoder import encode_basestring
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore[import]
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 
 def clean_json_data(data):
@@ -78,3 +90,166 @@ def format_query_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         formatted_results.append(formatted_row)
 
     return formatted_results
+
+
+def clean_json_column(values: Sequence[Any]) -> List[Any]:
+    """
+    Replace NaN and infinity values of one result column with None.
+
+    Columns without floats are returned untouched. All-float columns are checked
+    in one vectorized ``isfinite`` pass when NumPy is installed; only the
+    offending positions are rewritten.
+
+    Args:
+        values: Column values in row order
+
+    Returns:
+        List[Any]: Column values safe for JSON serialization
+    """
+    values = list(values)
+    kinds = set(map(type, values))
+    if float not in kinds:
+        return values
+
+    if NUMPY_AVAILABLE and kinds == {float}:
+        array = np.fromiter(values, dtype=np.float64, count=len(values))
+        bad_indexes = np.flatnonzero(~np.isfinite(array)).tolist()
+    else:
+        bad_indexes = [
+            index
+            for index, value in enumerate(values)
+            if type(value) is float and not math.isfinite(value)
+        ]
+
+    for index in bad_indexes:
+        values[index] = None
+    return values
+
+
+def json_default(value: Any) -> Any:
+    """Convert driver types the json module does not know about"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def _encode_json_value(value: Any) -> str:
+    if value is None:
+        return "null"
+    return json.dumps(value, ensure_ascii=False, default=json_default)
+
+
+def encode_json_column(values: Sequence[Any]) -> List[str]:
+    """
+    Encode every value of a cleaned column as a JSON fragment.
+
+    Homogeneous str/int/float columns are encoded with a single C-level ``map``;
+    mixed columns fall back to per-value encoding.
+    """
+    kinds = set(map(type, values))
+    if kinds == {str}:
+        return list(map(encode_basestring, values))
+    if kinds == {int} or kinds == {float}:
+        return list(map(repr, values))
+    if kinds <= {int, float, type(None)}:
+        return ["null" if value is None else repr(value) for value in values]
+    return [_encode_json_value(value) for value in values]
+
+
+class ColumnarRows:
+    """
+    Result block stored column by column.
+
+    Built straight from driver tuples without creating a dict per row; NaN/Inf
+    cleaning runs per column and ``to_json`` renders the JSON array of row
+    objects directly from the columns.
+    """
+
+    def __init__(self, columns: List[str], data: List[List[Any]]):
+        """
+        Initialize columnar block.
+
+        Args:
+            columns: Column names in select order
+            data: One list of cleaned values per column, all of equal length
+        """
+        self.columns = columns
+        self.data = data
+
+    @classmethod
+    def from_tuples(
+        cls, columns: List[str], rows: Sequence[Tuple[Any, ...]]
+    ) -> "ColumnarRows":
+        """Build a cleaned columnar block from driver row tuples"""
+        if not rows:
+            return cls(columns, [[] for _ in columns])
+        return cls(columns, [clean_json_column(column) for column in zip(*rows)])
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarRows":
+        """Build a cleaned columnar block from row dictionaries"""
+        columns = list(records[0].keys()) if records else []
+        return cls.from_tuples(
+            columns, [tuple(record.get(column) for column in columns) for record in records]
+        )
+
+    def __len__(self) -> int:
+        return len(self.data[0]) if self.data else 0
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Get one row as a dictionary (e.g. the last row for keyset cursors)"""
+        return {column: values[index] for column, values in zip(self.columns, self.data)}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert to the list-of-dicts shape produced by ``format_query_results``"""
+        return [dict(zip(self.columns, row)) for row in zip(*self.data)]
+
+    def size_bytes(self) -> int:
+        """Estimate the memory held by the block's values, in bytes"""
+        size = sys.getsizeof(self.data)
+        for values in self.data:
+            size += sys.getsizeof(values) + sum(map(sys.getsizeof, values))
+        return size
+
+    def to_json(self) -> str:
+        """Render the block as a JSON array of row objects"""
+        return "[" + self.to_json_rows() + "]"
+
+    def to_json_rows(self) -> str:
+        """
+        Render the rows as comma-separated JSON objects, without the enclosing brackets.
+
+        Every column is encoded once, then each row is produced by a single
+        %-format of a precompiled row template.
+        """
+        if not self.columns or not len(self):
+            return ""
+
+        # Column names become literal template text, so their "%" must be escaped
+        row_template = "{" + ",".join(
+            encode_basestring(column).replace("%", "%%") + ":%s"
+            for column in self.columns
+        ) + "}"
+        encoded_columns = [encode_json_column(values) for values in self.data]
+        return ",".join(row_template % row for row in zip(*encoded_columns))
+
+
+def render_ssrm_response(rows: ColumnarRows, **fields: Any) -> str:
+    """
+    Render an SSRM response body with ``rowData`` taken from a columnar block.
+
+    Args:
+        rows: Result block rendered as the ``rowData`` array
+        **fields: Other response fields (rowCount, pivotResultFields, ...)
+
+    Returns:
+        str: JSON response body
+    """
+    parts = [f'"rowData":{rows.to_json()}']
+    for name, value in fields.items():
+        parts.append(f"{encode_basestring(name)}:{_encode_json_value(value)}")
+    return "{" + ",".join(parts) + "}"
@@ -0,0 +1,368 @@
+"""
+Hierarchical grouping engine for SSRM AgGrid application.
+
+Computes every requested ``rowGroupCols`` level of a filtered view in a single
+query and keeps the result in memory, so expanding a group is answered from the
+cached hierarchy instead of running a new GROUP BY scan plus COUNT(DISTINCT).
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from aggregates import ROW_COUNT_ALIAS, MaterializedAggregate, partial_alias
+from cache import TTLCache, normalize_filter_model
+from config import SUPPORTED_AGG_FUNCTIONS, nulls_sort_first
+from database import DatabaseManager
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+from routing import SortKey
+
+# Cached in place of the hierarchy of a view with more than max_groups groups,
+# so later requests go straight to the per-level GROUP BY queries
+_TOO_LARGE = object()
+
+
+def _group_field(group_col: Dict[str, Any]) -> str:
+    return group_col.get("field", group_col.get("id", ""))
+
+
+def _value_field(value_col: Dict[str, Any]) -> str:
+    return value_col.get("field", value_col.get("id", ""))
+
+
+def _agg_func(value_col: Dict[str, Any]) -> str:
+    agg_func = value_col.get("aggFunc", "sum")
+    return agg_func if agg_func in SUPPORTED_AGG_FUNCTIONS else "sum"
+
+
+def _needed_partials(value_cols: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    Partial aggregates each value column's aggFunc is computed from.
+
+    Only these are queried: sum() is not defined for every column type (e.g.
+    VARCHAR on DuckDB), while count, min and max on such columns are.
+    """
+    needed: Dict[str, set] = {}
+    for value_col in value_cols:
+        agg_func = _agg_func(value_col)
+        partials = ("sum", "count") if agg_func == "avg" else (agg_func,)
+        needed.setdefault(_value_field(value_col), set()).update(partials)
+    return {field: sorted(partials) for field, partials in sorted(needed.items())}
+
+
+def _merge_partials(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """Fold one group's partial aggregates into another's (NULLs are ignored like SQL)"""
+    for key, value in source.items():
+        if value is None:
+            continue
+        current = target.get(key)
+        if current is None:
+            target[key] = value
+        elif key == ROW_COUNT_ALIAS or key.endswith("__sum") or key.endswith("__count"):
+            target[key] = current + value
+        elif key.endswith("__min"):
+            target[key] = min(current, value)
+        elif key.endswith("__max"):
+            target[key] = max(current, value)
+
+
+class GroupHierarchy:
+    """
+    All levels of one grouped view: parent key path -> {group value: partial aggregates}.
+
+    The parent key path is the tuple of ``str`` group keys leading to a level,
+    matching the string ``groupKeys`` AG Grid sends when a group is expanded.
+    """
+
+    def __init__(self, group_fields: List[str]):
+        self.group_fields = group_fields
+        self.levels: Dict[Tuple[str, ...], Dict[Any, Dict[str, Any]]] = {}
+
+    def add(self, path: Tuple[Any, ...], partials: Dict[str, Any]) -> None:
+        """Record the aggregates of the group identified by ``path`` (one value per level)"""
+        parent = tuple(str(value) for value in path[:-1])
+        children = self.levels.setdefault(parent, {})
+        existing = children.get(path[-1])
+        if existing is None:
+            children[path[-1]] = dict(partials)
+        else:
+            _merge_partials(existing, partials)
+
+    def children(self, group_keys: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Get the groups directly below the expanded ``group_keys`` path"""
+        return self.levels.get(tuple(str(key) for key in group_keys), {})
+
+
+class GroupingEngine:
+    """
+    Builds and caches :class:`GroupHierarchy` objects per filtered view.
+
+    The hierarchy query groups by every ``rowGroupCols`` level at once. On
+    databases with ROLLUP support each level's subtotals come straight from the
+    database; elsewhere the leaf level is fetched and rolled up in memory from
+    the partial aggregates (sum, count, min, max) the requested aggFuncs need.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        ttl: Optional[float] = 300.0,
+        max_groups: int = 100_000,
+    ):
+        """
+        Initialize grouping engine.
+
+        Args:
+            max_entries: Maximum number of grouped views kept in memory
+            ttl: Seconds a hierarchy stays valid; None keeps it until invalidated
+            max_groups: Views with more leaf groups than this are not
+                materialized and fall back to per-level GROUP BY queries
+        """
+        self.max_groups = max_groups
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def make_key(table_name: str, options: AgGridOptions) -> Tuple[str, str]:
+        """Build the cache key: everything that changes the hierarchy's contents"""
+        payload = json.dumps(
+            {
+                "filterModel": normalize_filter_model(options.filterModel),
+                "rowGroupCols": [_group_field(col) for col in options.rowGroupCols],
+                "partials": _needed_partials(options.valueCols),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return table_name, payload
+
+    def build_hierarchy_query(
+        self,
+        db_manager: DatabaseManager,
+        options: AgGridOptions,
+        materialized: Optional[MaterializedAggregate] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the single query computing all grouping levels of a view.
+
+        Args:
+            db_manager: Database manager of the source table
+            options: Grouped request
+            materialized: Side table covering the view; its partials are rolled
+                up instead of aggregating the source table
+
+        Returns:
+            Tuple[str, List[Any]]: SQL with placeholders and its parameters
+        """
+        # Only the user filters apply; group keys select a level of the result
+        view_options = options.model_copy(update={"groupKeys": [], "sortModel": []})
+        builder = QueryBuilder(
+            ag_rows=AgRows(query="", options=view_options, escape=db_manager.escape_char),
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+        )
+        where_sql, params = builder.create_where_sql()
+
+        group_cols = [
+            builder.escape_column(_group_field(col)) for col in options.rowGroupCols
+        ]
+        select_parts = list(group_cols)
+        for field, partials in _needed_partials(options.valueCols).items():
+            for agg in partials:
+                alias = partial_alias(field, agg)
+                expression = (
+                    materialized.rollup_sql(alias, builder.escape_column)
+                    if materialized is not None
+                    else f"{agg}({builder.escape_column(field)})"
+                )
+                select_parts.append(f"{expression} AS {builder.escape_column(alias)}")
+        row_count = (
+            materialized.rollup_sql(ROW_COUNT_ALIAS, builder.escape_column)
+            if materialized is not None
+            else "count(*)"
+        )
+        select_parts.append(f"{row_count} AS {builder.escape_column(ROW_COUNT_ALIAS)}")
+
+        rollup_syntax = db_manager.rollup_syntax
+        if rollup_syntax:
+            # GROUPING(col) = 1 marks rows where col was rolled up into a subtotal,
+            # which distinguishes subtotal rows from genuine NULL group values
+            select_parts.extend(
+                f"GROUPING({col}) AS {builder.escape_column(f'__grouping{index}')}"
+                for index, col in enumerate(group_cols)
+            )
+
+        group_by_sql = ", ".join(group_cols)
+        if rollup_syntax == "with_rollup":
+            group_by_sql = f"{group_by_sql} WITH ROLLUP"
+        elif rollup_syntax == "rollup":
+            group_by_sql = f"ROLLUP({group_by_sql})"
+
+        source_table = (
+            materialized.table_name if materialized is not None else db_manager.table_name
+        )
+        query = (
+            f"SELECT {', '.join(select_parts)} FROM {source_table}"
+            f"{where_sql} GROUP BY {group_by_sql} LIMIT {db_manager.placeholder}"
+        )
+        # One extra row tells us the view exceeded max_groups
+        return query, params + [self.max_groups + 1]
+
+    def _build_hierarchy(
+        self,
+        rows: List[Dict[str, Any]],
+        group_fields: List[str],
+        rolled_up: bool,
+    ) -> GroupHierarchy:
+        hierarchy = GroupHierarchy(group_fields)
+        depth = len(group_fields)
+        for row in rows:
+            partials = {
+                key: value for key, value in row.items()
+                if key not in group_fields and not key.startswith("__grouping")
+            }
+            if rolled_up:
+                # Level of the row = number of leading group columns not rolled up
+                level = next(
+                    (i for i in range(depth) if row.get(f"__grouping{i}")), depth
+                )
+                if level == 0:
+                    continue  # Grand total row
+                hierarchy.add(tuple(row[field] for field in group_fields[:level]), partials)
+            else:
+                # Leaf row: contributes to itself and every ancestor level
+                for level in range(1, depth + 1):
+                    hierarchy.add(
+                        tuple(row[field] for field in group_fields[:level]), partials
+                    )
+        return hierarchy
+
+    async def get_hierarchy(
+        self,
+        db_manager: DatabaseManager,
+        options: AgGridOptions,
+        materialized: Optional[MaterializedAggregate] = None,
+    ) -> Optional[GroupHierarchy]:
+        """
+        Get the cached hierarchy for a view, computing it with one query on a miss.
+
+        The query reads ``materialized`` partials instead of the source table
+        when a covering side table is given.
+
+        Returns:
+            Optional[GroupHierarchy]: None if the view has more than ``max_groups``
+            groups; that outcome is cached too, so the hierarchy query runs once
+        """
+        key = self.make_key(db_manager.table_name, options)
+        hierarchy = self._cache.get(key)
+        if hierarchy is _TOO_LARGE:
+            return None
+        if hierarchy is not None:
+            return hierarchy
+
+        query, params = self.build_hierarchy_query(db_manager, options, materialized)
+        # Side tables are built on the primary and not replicated
+        rows = await db_manager.execute_query_async(
+            query, params, primary=materialized is not None
+        )
+        if len(rows) > self.max_groups:
+            # Remembered like a hierarchy, and invalidated with it
+            self._cache.set(key, _TOO_LARGE)
+            return None
+
+        group_fields = [_group_field(col) for col in options.rowGroupCols]
+        hierarchy = self._build_hierarchy(
+            rows, group_fields, rolled_up=bool(db_manager.rollup_syntax)
+        )
+        self._cache.set(key, hierarchy)
+        return hierarchy
+
+    async def get_group_rows(
+        self,
+        db_manager: DatabaseManager,
+        options: AgGridOptions,
+        materialized: Optional[MaterializedAggregate] = None,
+    ) -> Optional[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Answer a grouped SSRM request from the cached hierarchy.
+
+        Produces the same rows as the per-level GROUP BY query: the group column
+        plus one aggregate per value column (or a "count" column without value
+        columns), sorted and sliced to the requested block.
+
+        Returns:
+            Optional[Tuple[int, List[Dict[str, Any]]]]: (group count, rows), or
+            None if the view is too large to materialize
+        """
+        hierarchy = await self.get_hierarchy(db_manager, options, materialized)
+        if hierarchy is None:
+            return None
+
+        level = len(options.groupKeys or [])
+        group_field = hierarchy.group_fields[level]
+        children = hierarchy.children(options.groupKeys or [])
+
+        rows = []
+        for group_value, partials in children.items():
+            row = {group_field: group_value}
+            for value_col in options.valueCols:
+                field = _value_field(value_col)
+                agg_func = _agg_func(value_col)
+                if agg_func == "avg":
+                    total = partials.get(partial_alias(field, "sum"))
+                    count = partials.get(partial_alias(field, "count"))
+                    row[field] = total / count if count else None
+                else:
+                    row[field] = partials.get(partial_alias(field, agg_func))
+            if not options.valueCols:
+                row["count"] = partials.get(ROW_COUNT_ALIAS, 0)
+            rows.append(row)
+
+        self._sort_rows(rows, options, group_field, db_manager.null_order)
+
+        if options.startRow == 0 and options.endRow == 0:
+            return len(rows), rows
+        return len(rows), rows[options.startRow : options.endRow]
+
+    @staticmethod
+    def _sort_rows(
+        rows: List[Dict[str, Any]],
+        options: AgGridOptions,
+        group_field: str,
+        null_order: str = "low",
+    ) -> None:
+        """
+        Sort group rows like the SQL path: by the group or value columns only,
+        with NULLs where the database sorts them (see ``DatabaseConfig.null_order``).
+        """
+        allowed = {group_field} | {_value_field(col) for col in options.valueCols}
+        sort_items = [
+            (item.get("colId", ""), item.get("sort", "asc").lower() == "desc")
+            for item in options.sortModel or []
+            if item.get("colId", "") in allowed
+        ]
+        # Group value order is the stable default, as GROUP BY returns it
+        sort_items.append((group_field, False))
+
+        columns = [column for column, _ in sort_items]
+        descending = tuple(desc for _, desc in sort_items)
+        nulls_first = tuple(nulls_sort_first(null_order, desc) for desc in descending)
+        rows.sort(
+            key=lambda row: SortKey(
+                tuple(row.get(column) for column in columns), descending, nulls_first
+            )
+        )
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Drop cached hierarchies, e.g. after rows were written"""
+        if table_name is None:
+            return self._cache.invalidate()
+        return self._cache.invalidate(lambda key: key[0] == table_name)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and current size"""
+        return {
+            "entries": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+        }
@@ -8,63 +8,442 @@ This file contains the main helper functions that tie together all the modular c
 - All configured through DatabaseConfig
 """
 
+import asyncio
+import time
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Tuple, overload
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+    overload,
+)
 
+from aggregates import AggregateStore
+from cache import BlockCache, CountCache
 from config import DatabaseConfig
 from database import DatabaseManager
-from formatters import format_query_results
+from estimates import CountEstimator, EstimatedCount
+from formatters import ColumnarRows, format_query_results
+from grouping import GroupingEngine
+from index_advisor import IndexAdvisor
+from metrics import SlowQueryLog, StageTimer
 from models import AgRows
+from pagination import KeysetCursorStore
+from pivot import PivotEngine
+from prefetch import BlockPrefetcher
 from query_builder import QueryBuilder
+from text_search import TextSearchIndex
 
 
 async def perform_ssrm_query(
-    db_manager: DatabaseManager, ag_rows: AgRows
-) -> Tuple[int, List[Dict[str, Any]]]:
+    db_manager: DatabaseManager,
+    ag_rows: AgRows,
+    cursor_store: Optional[KeysetCursorStore] = None,
+    count_cache: Optional[CountCache] = None,
+    block_cache: Optional[BlockCache] = None,
+    grouping_engine: Optional[GroupingEngine] = None,
+    pivot_engine: Optional[PivotEngine] = None,
+    aggregate_store: Optional[AggregateStore] = None,
+    index_advisor: Optional[IndexAdvisor] = None,
+    timer: Optional[StageTimer] = None,
+    slow_query_log: Optional[SlowQueryLog] = None,
+    count_estimator: Optional[CountEstimator] = None,
+    prefetcher: Optional[BlockPrefetcher] = None,
+    text_index: Optional[TextSearchIndex] = None,
+    columnar: bool = False,
+) -> Tuple[int, Union[List[Dict[str, Any]], ColumnarRows]]:
     """
     Execute SSRM query using the modular components.
 
     This is the main function that:
     1. Creates a query builder from AgGrid configuration
     2. Builds both main and count queries
-    3. Executes queries
+    3. Executes both queries concurrently on the database executor
     4. Returns total count and formatted results
 
+    When the database is configured with a ``keyset_column`` and a cursor store
+    is given, a block that directly follows a previously served block is fetched
+    by seeking past that block's last row; other requests fall back to OFFSET.
+
+    With a count cache, the COUNT query only runs once per filtered view; later
+    blocks of the same view reuse the cached total.
+
+    With a block cache, a request identical to an earlier one (same sort, filter,
+    grouping and block range) is answered from memory without running SQL.
+
+    With a grouping engine, grouped requests are served from a cached hierarchy
+    computed once per filtered view, so expanding groups does not re-scan.
+
+    With a pivot engine, pivot mode requests get one conditional aggregate column
+    per (pivot key, value column), using pivot keys discovered once per view.
+
+    With an aggregate store, grouped requests covered by a materialized side
+    table (grouping, values and filters all materialized) roll up its partial
+    aggregates instead of scanning the source table.
+
+    With an index advisor, the columns each SQL-backed request filters, groups
+    and sorts on are recorded, together with the duration of every query.
+
+    With a stage timer, the time spent in each stage (cache lookup, pivot key
+    discovery, grouping, query build, count query, main query, formatting) is
+    recorded; queries slower than the slow query log's threshold are logged.
+
+    With a count estimator, a view whose count is not cached yet gets an
+    :class:`EstimatedCount` from table statistics instead of running COUNT; the
+    exact count is computed in the background and stored in the count cache,
+    so later blocks of the view report it. A short last block settles the
+    count immediately. Blocks with estimated counts are not block-cached.
+
+    With a prefetcher, the blocks adjacent to every served block are computed
+    in the background; a request for one of them is answered from the
+    prefetch cache, or waits for its prefetch if it is still running.
+
     Args:
         db_manager: Database manager instance
         ag_rows: AgGrid configuration and base query
+        cursor_store: Optional store of keyset cursors from previous blocks
+        count_cache: Optional cache of row counts per filtered view
+        block_cache: Optional cache of formatted result blocks
+        grouping_engine: Optional engine serving group rows from cached hierarchies
+        pivot_engine: Optional engine discovering pivot keys for pivot mode
+        aggregate_store: Optional registry of materialized aggregate tables
+        index_advisor: Optional recorder of access patterns
+        timer: Optional per-request stage timer
+        slow_query_log: Optional ring buffer of slow queries
+        count_estimator: Optional estimator answering counts from table statistics
+        prefetcher: Optional read-ahead of adjacent blocks
+        text_index: Optional trigram index serving substring text filters
+        columnar: Fetch row tuples and return a :class:`ColumnarRows` block
+            instead of a list of row dictionaries
 
     Returns:
-        Tuple[int, List[Dict[str, Any]]]: (total_count, formatted_results)
+        Tuple[int, Union[List[Dict[str, Any]], ColumnarRows]]: (total_count, formatted_results)
 
     Raises:
         Exception: If query execution fails
     """
     try:
+        block = None
+        if block_cache is not None:
+            with _stage(timer, "cache"):
+                block = block_cache.get(db_manager.table_name, ag_rows.options)
+            table_version = block_cache.table_version(db_manager.table_name)
+
+        components = dict(
+            cursor_store=cursor_store,
+            count_cache=count_cache,
+            grouping_engine=grouping_engine,
+            pivot_engine=pivot_engine,
+            aggregate_store=aggregate_store,
+            slow_query_log=slow_query_log,
+            count_estimator=count_estimator,
+            text_index=text_index,
+            columnar=columnar,
+        )
+
+        block_cached = block is not None
+        if block is None and prefetcher is not None:
+            with _stage(timer, "prefetch"):
+                block = await prefetcher.get(db_manager.table_name, ag_rows.options)
+
+        if block is None:
+            block = await _run_ssrm_query(
+                db_manager,
+                ag_rows,
+                index_advisor=index_advisor,
+                timer=timer,
+                **components,
+            )
+
+        total_count, formatted_results = block
+        if (
+            not block_cached
+            and block_cache is not None
+            and not isinstance(total_count, EstimatedCount)
+        ):
+            block_cache.set(
+                db_manager.table_name,
+                ag_rows.options,
+                total_count,
+                formatted_results,
+                version=table_version,
+            )
+
+        if prefetcher is not None:
+            # Prefetches are not timed and not recorded as access patterns
+            prefetcher.schedule(
+                db_manager.table_name,
+                ag_rows.options,
+                total_count,
+                lambda options: _run_ssrm_query(
+                    db_manager,
+                    ag_rows.model_copy(update={"options": options}),
+                    index_advisor=None,
+                    timer=None,
+                    **components,
+                ),
+                block_cache=block_cache,
+            )
+
+        return total_count, formatted_results
+
+    except Exception as e:
+        raise e
+
+
+async def _run_ssrm_query(
+    db_manager: DatabaseManager,
+    ag_rows: AgRows,
+    cursor_store: Optional[KeysetCursorStore],
+    count_cache: Optional[CountCache],
+    grouping_engine: Optional[GroupingEngine],
+    pivot_engine: Optional[PivotEngine],
+    aggregate_store: Optional[AggregateStore],
+    index_advisor: Optional[IndexAdvisor],
+    timer: Optional[StageTimer],
+    slow_query_log: Optional[SlowQueryLog],
+    count_estimator: Optional[CountEstimator],
+    text_index: Optional[TextSearchIndex],
+    columnar: bool,
+) -> Tuple[int, Union[List[Dict[str, Any]], ColumnarRows]]:
+    """Compute one SSRM block (see ``perform_ssrm_query``), bypassing the block cache"""
+    if db_manager.is_sharded and ag_rows.options.pivotMode and ag_rows.options.pivotCols:
+        raise ValueError("Pivot mode is not supported on sharded tables")
+
+    pivot_keys = None
+    if pivot_engine is not None and pivot_engine.is_pivot_request(ag_rows.options):
+        with _stage(timer, "pivot_keys"):
+            pivot_keys = await pivot_engine.get_pivot_keys(db_manager, ag_rows.options)
+
+    materialized = None
+    if (
+        aggregate_store is not None
+        and pivot_keys is None
+        and ag_rows.options.is_doing_grouping()
+    ):
+        materialized = aggregate_store.find(db_manager.table_name, ag_rows.options)
+
+    if (
+        grouping_engine is not None
+        and pivot_keys is None
+        and ag_rows.options.is_doing_grouping()
+    ):
+        with _stage(timer, "grouping"):
+            grouped = await grouping_engine.get_group_rows(
+                db_manager, ag_rows.options, materialized
+            )
+        if grouped is not None:
+            total_count, results = grouped
+            with _stage(timer, "format"):
+                if columnar:
+                    return total_count, ColumnarRows.from_records(results)
+                return total_count, format_query_results(results)
+
+    if db_manager.is_sharded and ag_rows.options.is_doing_grouping():
+        # Per-shard GROUP BY pages cannot be merged; groups come from the
+        # grouping engine, whose hierarchy merges the partials of all shards
+        raise ValueError(
+            "Grouped views of sharded tables need the grouping engine and no more "
+            "than its max_groups groups"
+        )
+
+    keyset_column = db_manager.keyset_column if cursor_store is not None else None
+    cursor = cursor_store.get(db_manager.table_name, ag_rows.options) if keyset_column else None
+
+    with _stage(timer, "build"):
         # Create query builder with database-specific settings
         query_builder = QueryBuilder(
             ag_rows=ag_rows,
             table_name=db_manager.table_name,
             escape_char=db_manager.escape_char,
+            keyset_column=keyset_column,
+            cursor=cursor,
+            placeholder=db_manager.placeholder,
+            pivot_keys=pivot_keys,
+            materialized=materialized,
+            fanout=db_manager.is_sharded,
+            text_index=text_index,
+            null_order=db_manager.null_order,
         )
 
-        # Build queries
-        main_query = query_builder.build_query()
-        count_query = query_builder.build_count_query()
+        # Build parameterized queries
+        main_query, main_params = query_builder.build_query()
+        count_query, count_params = query_builder.build_count_query()
 
-        # Execute count query first
-        total_count = db_manager.execute_count_query(count_query)
+    execute_query = (
+        db_manager.execute_query_columnar_async
+        if columnar
+        else db_manager.execute_query_async
+    )
+    execute_count_query = db_manager.execute_count_query_async
+    if db_manager.is_sharded:
+        # Fan out to the shards the filter can match and merge-sort their pages
+        skip, limit = query_builder.get_fanout_window()
+        shards = db_manager.shards_for(query_builder.create_where_predicate())
+        execute_query = partial(
+            db_manager.execute_fanout_query_async,
+            sort_keys=query_builder.get_merge_sort(),
+            skip=skip,
+            limit=limit,
+            columnar=columnar,
+            shards=shards,
+        )
+        execute_count_query = partial(db_manager.execute_count_query_async, shards=shards)
+    elif materialized is not None:
+        # Side tables are built on the primary and not replicated
+        execute_query = partial(execute_query, primary=True)
+        execute_count_query = partial(execute_count_query, primary=True)
 
-        # Execute main query
-        results = db_manager.execute_query(main_query)
+    async def timed(stage, execute, query, params):
+        started = time.perf_counter()
+        result = await execute(query, params)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if timer is not None:
+            timer.add(stage, duration_ms)
+        if slow_query_log is not None:
+            slow_query_log.record(db_manager, stage, query, params, duration_ms)
+        return result
 
-        # Format results for JSON response
-        formatted_results = format_query_results(results)
+    if index_advisor is not None and materialized is None:
+        index_advisor.record(db_manager, ag_rows.options)
 
-        return total_count, formatted_results
+    total_count = None
+    if count_cache is not None:
+        # Read before the count query, so a write invalidating meanwhile wins
+        count_version = count_cache.table_version(db_manager.table_name)
+        total_count = count_cache.get(db_manager.table_name, ag_rows.options)
 
-    except Exception as e:
-        raise e
+    estimated = None
+    if total_count is None and count_estimator is not None:
+        with _stage(timer, "estimate"):
+            estimated = await count_estimator.estimate_async(db_manager, ag_rows.options)
+
+    if total_count is None and estimated is None:
+        # Run count and page queries concurrently without blocking the event loop
+        total_count, results = await asyncio.gather(
+            timed("count", execute_count_query, count_query, count_params),
+            timed("main", execute_query, main_query, main_params),
+        )
+        if count_cache is not None:
+            count_cache.set(
+                db_manager.table_name, ag_rows.options, total_count, version=count_version
+            )
+    else:
+        results = await timed("main", execute_query, main_query, main_params)
+
+    with _stage(timer, "format"):
+        if columnar:
+            # Transposed and NaN-cleaned per column, without per-row dictionaries
+            results = ColumnarRows.from_tuples(*results)
+
+        if keyset_column:
+            cursor_store.remember(db_manager.table_name, ag_rows.options, results, keyset_column)
+
+        if not columnar:
+            # Format results for JSON response
+            results = format_query_results(results)
+
+    if estimated is not None:
+        total_count = _settle_estimate(estimated, ag_rows, len(results))
+        if isinstance(total_count, EstimatedCount):
+            count_estimator.refine(
+                db_manager, ag_rows.options, count_query, count_params, count_cache
+            )
+        elif count_cache is not None:
+            count_cache.set(
+                db_manager.table_name, ag_rows.options, total_count, version=count_version
+            )
+
+    return total_count, results
+
+
+def _settle_estimate(estimated: int, ag_rows: AgRows, block_rows: int) -> int:
+    """
+    Reconcile an estimated count with the rows a block actually returned.
+
+    A block shorter than requested is the last one, which makes the count
+    exact; otherwise the estimate is raised to at least the rows seen so far.
+    """
+    seen = ag_rows.options.startRow + block_rows
+    if block_rows < ag_rows.options.page_size():
+        return seen
+    return EstimatedCount(max(estimated, seen))
+
+
+def _stage(timer: Optional[StageTimer], stage: str):
+    """Time a block as ``stage`` when a timer is given"""
+    return timer.stage(stage) if timer is not None else nullcontext()
+
+
+async def stream_ssrm_query(
+    db_manager: DatabaseManager,
+    ag_rows: AgRows,
+    count_cache: Optional[CountCache] = None,
+    chunk_size: int = 5000,
+    timer: Optional[StageTimer] = None,
+    text_index: Optional[TextSearchIndex] = None,
+) -> Tuple[int, Iterator[str]]:
+    """
+    Execute an SSRM query whose rowData is streamed instead of materialized.
+
+    The row count is resolved up front (from the count cache when possible);
+    the page query only runs once the returned iterator is consumed, yielding
+    each chunk of ``chunk_size`` rows as comma-separated JSON objects.
+
+    Streamed blocks bypass the block cache and keyset cursors, and grouped or
+    pivot requests should use ``perform_ssrm_query`` instead.
+
+    Args:
+        db_manager: Database manager instance
+        ag_rows: AgGrid configuration and base query
+        count_cache: Optional cache of row counts per filtered view
+        chunk_size: Number of rows fetched and rendered per chunk
+        timer: Optional per-request stage timer (query build and count only;
+            the main query runs while the response is being sent)
+        text_index: Optional trigram index serving substring text filters
+
+    Returns:
+        Tuple[int, Iterator[str]]: (total_count, rowData JSON fragments)
+    """
+    with _stage(timer, "build"):
+        query_builder = QueryBuilder(
+            ag_rows=ag_rows,
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+            text_index=text_index,
+        )
+        main_query, main_params = query_builder.build_query()
+
+    total_count = None
+    if count_cache is not None:
+        count_version = count_cache.table_version(db_manager.table_name)
+        total_count = count_cache.get(db_manager.table_name, ag_rows.options)
+    if total_count is None:
+        count_query, count_params = query_builder.build_count_query()
+        with _stage(timer, "count"):
+            total_count = await db_manager.execute_count_query_async(
+                count_query, count_params
+            )
+        if count_cache is not None:
+            count_cache.set(
+                db_manager.table_name, ag_rows.options, total_count, version=count_version
+            )
+
+    def render_chunks() -> Iterator[str]:
+        for columns, rows in db_manager.stream_query(
+            main_query, main_params, chunk_size
+        ):
+            yield ColumnarRows.from_tuples(columns, rows).to_json_rows()
+
+    return total_count, render_chunks()
 
 
 @overload
@@ -76,6 +455,16 @@ def create_database_manager(
 ) -> DatabaseManager: ...
 
 
+@overload
+def create_database_manager(
+    database_type: Literal["duckdb"],
+    file_path: Path | str = None,
+    table_name: str = "data",
+    parquet_path: Path | str = None,
+    **kwargs,
+) -> DatabaseManager: ...
+
+
 @overload
 def create_database_manager(
     database_type: Literal["snowflake", "mysql"],
@@ -85,21 +474,34 @@ def create_database_manager(
 
 
 def create_database_manager(
-    database_type: Literal["sqlite", "snowflake", "mysql"] = "sqlite",
+    database_type: Literal["sqlite", "duckdb", "snowflake", "mysql"] = "sqlite",
     file_path: Path | str = None,
     connection_string: str = None,
     table_name: str = "data",
     schema: str = None,
+    keyset_column: str = None,
+    parquet_path: Path | str = None,
+    replicas: List[Any] = None,
+    shards: List[Any] = None,
+    shard_key: str = None,
     **mysql_params,
 ) -> DatabaseManager:
     """
     Create a database manager with the specified configuration.
 
     Args:
-        database_type: Type of database ('sqlite', 'snowflake', 'mysql')
+        database_type: Type of database ('sqlite', 'duckdb', 'snowflake', 'mysql')
+        file_path: Database file (for SQLite, and DuckDB where None means in-memory)
         connection_string: Database connection string (for SQLite and Snowflake)
         table_name: Name of the table to query
         schema: Schema name (for databases that support it)
+        keyset_column: Unique column enabling keyset pagination (opt-in)
+        parquet_path: Parquet file or glob exposed as ``table_name`` (DuckDB only)
+        replicas: Read replicas, given like the primary's connection string
+            (file paths for SQLite, connection parameter dicts for MySQL)
+        shards: Databases the table is sharded across, given like ``replicas``;
+            the primary connection is then not used
+        shard_key: Column rows are distributed by (see ``routing.shard_for_value``)
         **mysql_params: MySQL connection parameters (host, database, user, password, port)
 
     Returns:
@@ -109,6 +511,19 @@ def create_database_manager(
         # SQLite
         db_manager = create_database_manager("sqlite", "data.db", "my_table")
 
+        # SQLite with two read replicas
+        db_manager = create_database_manager(
+            "sqlite",
+            "data.db",
+            table_name="my_table",
+            replicas=["replica1.db", "replica2.db"],
+        )
+
+        # DuckDB scanning a Parquet file in place
+        db_manager = create_database_manager(
+            "duckdb", table_name="my_table", parquet_path="data/*.parquet"
+        )
+
         # MySQL
         db_manager = create_database_manager(
             "mysql",
@@ -119,8 +534,21 @@ def create_database_manager(
             password="pass"
         )
     """
+    routing = {"replicas": replicas, "shards": shards, "shard_key": shard_key}
     if database_type == "sqlite":
-        config = DatabaseConfig.for_sqlite(db_path=file_path, table_name=table_name)
+        routing["replicas"] = [Path(path).resolve() for path in replicas or []]
+        routing["shards"] = [Path(path).resolve() for path in shards or []]
+        config = DatabaseConfig.for_sqlite(
+            db_path=file_path, table_name=table_name, keyset_column=keyset_column, **routing
+        )
+    elif database_type == "duckdb":
+        config = DatabaseConfig.for_duckdb(
+            db_path=file_path,
+            table_name=table_name,
+            parquet_path=parquet_path,
+            keyset_column=keyset_column,
+            **routing,
+        )
     elif database_type == "mysql":
         # Extract MySQL parameters
         host = mysql_params.get("host", "localhost")
@@ -141,10 +569,16 @@ def create_database_manager(
             password=password,
             table_name=table_name,
             port=port,
+            keyset_column=keyset_column,
+            **routing,
         )
     elif database_type == "snowflake":
         config = DatabaseConfig.for_snowflake(
-            connection_string=connection_string, table_name=table_name, schema=schema
+            connection_string=connection_string,
+            table_name=table_name,
+            schema=schema,
+            keyset_column=keyset_column,
+            **routing,
         )
     else:
         raise ValueError(f"Unsupported database type: {database_type}")
@@ -0,0 +1,307 @@
+"""
+Index advisor for SSRM AgGrid application.
+
+Records which columns grid requests filter, group and sort on, recommends
+composite indexes for the most frequent access patterns (optionally creating
+them), and reports the slowest queries of the slow query log with their plans.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database import DatabaseManager
+from metrics import SlowQueryLog
+from models import AgGridOptions
+
+logger = logging.getLogger(__name__)
+
+# Filter conditions an index can answer with an equality lookup
+EQUALITY_CONDITIONS = {"equals"}
+
+# Filter conditions an index can answer with a range scan
+RANGE_CONDITIONS = {
+    "greaterThan",
+    "lessThan",
+    "greaterThanOrEqual",
+    "lessThanOrEqual",
+    "inRange",
+    "startsWith",
+}
+
+# Databases without secondary indexes (recommendations are reported only)
+INDEXLESS_DATABASES = {"snowflake"}
+
+# Widest composite index recommended
+MAX_INDEX_COLUMNS = 4
+
+
+def index_columns_for(options: AgGridOptions) -> Tuple[str, ...]:
+    """
+    Composite index columns that would serve a request best.
+
+    Follows the equality, sort, range rule: columns compared for equality come
+    first (in a canonical order, as their order does not matter), then the
+    columns the result is grouped or sorted by, then one range-filtered column.
+
+    Returns:
+        Tuple[str, ...]: Index columns, empty if no column would benefit
+    """
+    equality = set()
+    ranges = []
+
+    for index, _ in enumerate(options.groupKeys or []):
+        if index < len(options.rowGroupCols):
+            group_col = options.rowGroupCols[index]
+            equality.add(group_col.get("field", group_col.get("id", "")))
+
+    for field_name, filter_config in (options.filterModel or {}).items():
+        filter_type = filter_config.get("filterType", "text")
+        condition = filter_config.get("type")
+        if filter_type == "set" or condition in EQUALITY_CONDITIONS:
+            equality.add(field_name)
+        elif condition in RANGE_CONDITIONS:
+            ranges.append(field_name)
+
+    ordering = []
+    if options.is_doing_grouping():
+        group_col = options.get_row_group_column()
+        if group_col:
+            ordering.append(group_col.get("id", group_col.get("field", "")))
+    else:
+        ordering.extend(item.get("colId", "") for item in options.sortModel or [])
+
+    columns = []
+    for column in sorted(equality) + ordering + ranges[:1]:
+        if column and column not in columns:
+            columns.append(column)
+    return tuple(columns[:MAX_INDEX_COLUMNS])
+
+
+class IndexAdvisor:
+    """
+    Collects access patterns of SSRM requests and turns them into index advice.
+
+    Every request contributes one candidate index (see ``index_columns_for``).
+    Candidates used at least ``min_uses`` times that are not already served by
+    the leading columns of an existing index are recommended; with
+    ``auto_create`` they are created in the background once they qualify.
+    Index DDL runs one statement at a time on its own thread, never on the
+    query executor, so a long index build cannot hold up grid requests.
+    """
+
+    def __init__(
+        self,
+        min_uses: int = 20,
+        auto_create: bool = False,
+        slow_query_log: Optional[SlowQueryLog] = None,
+    ):
+        """
+        Initialize index advisor.
+
+        Args:
+            min_uses: Requests sharing a candidate index before it is recommended
+            auto_create: Create recommended indexes as soon as they qualify
+            slow_query_log: Log whose slow queries are included in the report
+        """
+        self.min_uses = min_uses
+        self.auto_create = auto_create
+        self.slow_query_log = slow_query_log
+        self._patterns: Counter = Counter()
+        self._columns: Counter = Counter()
+        self._scheduled: set = set()
+        self._lock = threading.Lock()
+        self._ddl_executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def ddl_executor(self) -> ThreadPoolExecutor:
+        """Single thread running index DDL, apart from the query executor"""
+        if self._ddl_executor is None:
+            self._ddl_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ssrm-ddl")
+        return self._ddl_executor
+
+    def record(self, db_manager: DatabaseManager, options: AgGridOptions) -> None:
+        """Record the access pattern of one SSRM request that ran SQL"""
+        columns = index_columns_for(options)
+        if not columns:
+            return
+
+        key = (db_manager.table_name, columns)
+        with self._lock:
+            self._patterns[key] += 1
+            for column in columns:
+                self._columns[(db_manager.table_name, column)] += 1
+            schedule = (
+                self.auto_create
+                and self._patterns[key] >= self.min_uses
+                and key not in self._scheduled
+            )
+            if schedule:
+                self._scheduled.add(key)
+
+        if schedule:
+            self.ddl_executor.submit(self.apply, db_manager, [columns])
+
+    @staticmethod
+    def index_name(table_name: str, columns: Sequence[str]) -> str:
+        """Deterministic name of the index created for a column list"""
+        digest = hashlib.sha1(repr((table_name, tuple(columns))).encode()).hexdigest()
+        return f"ssrm_idx_{digest[:10]}"
+
+    @staticmethod
+    def _is_covered(columns: Sequence[str], existing: List[List[str]]) -> bool:
+        """Check if an existing index starts with exactly these columns"""
+        return any(
+            [column.lower() for column in index[: len(columns)]]
+            == [column.lower() for column in columns]
+            for index in existing
+        )
+
+    def recommendations(self, db_manager: DatabaseManager) -> List[Dict[str, Any]]:
+        """
+        Get indexes worth creating for the configured table, most used first.
+
+        Returns:
+            List[Dict[str, Any]]: columns, uses and the CREATE INDEX statement
+        """
+        existing = db_manager.get_table_indexes()
+        with self._lock:
+            patterns = [
+                (columns, uses)
+                for (table_name, columns), uses in self._patterns.most_common()
+                if table_name == db_manager.table_name and uses >= self.min_uses
+            ]
+
+        candidates = [
+            (columns, uses)
+            for columns, uses in patterns
+            if not self._is_covered(columns, existing)
+        ]
+        recommended = []
+        for columns, uses in candidates:
+            # A recommended wider index also serves every prefix of it
+            if any(
+                len(other) > len(columns) and other[: len(columns)] == columns
+                for other, _ in candidates
+            ):
+                continue
+            recommended.append(
+                {
+                    "columns": list(columns),
+                    "uses": uses,
+                    "ddl": self._create_index_sql(db_manager, columns),
+                }
+            )
+        return recommended
+
+    def _create_index_sql(self, db_manager: DatabaseManager, columns: Sequence[str]) -> str:
+        escape_char = db_manager.escape_char
+        column_list = ", ".join(f"{escape_char}{column}{escape_char}" for column in columns)
+        return (
+            f"CREATE INDEX {self.index_name(db_manager.table_name, columns)} "
+            f"ON {db_manager.table_name} ({column_list})"
+        )
+
+    def apply(
+        self,
+        db_manager: DatabaseManager,
+        candidates: Optional[List[Sequence[str]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Create indexes.
+
+        Args:
+            db_manager: Database manager of the indexed table
+            candidates: Column lists to index; defaults to all current recommendations
+
+        Returns:
+            List[Dict[str, Any]]: columns, DDL and outcome of each attempt
+        """
+        if db_manager.config.database_type in INDEXLESS_DATABASES:
+            return []
+
+        if candidates is None:
+            candidates = [item["columns"] for item in self.recommendations(db_manager)]
+
+        table_columns = {
+            column["column_name"].lower() for column in db_manager.get_table_columns()
+        }
+        existing = db_manager.get_table_indexes()
+
+        results = []
+        for columns in candidates:
+            ddl = self._create_index_sql(db_manager, columns)
+            if any(column.lower() not in table_columns for column in columns):
+                results.append({"columns": list(columns), "ddl": ddl, "status": "unknown column"})
+                continue
+            if self._is_covered(columns, existing):
+                results.append({"columns": list(columns), "ddl": ddl, "status": "exists"})
+                continue
+            try:
+                db_manager.execute_write([(ddl, [])])
+                existing.append(list(columns))
+                results.append({"columns": list(columns), "ddl": ddl, "status": "created"})
+            except Exception as e:
+                logger.error("Error creating index: %s (%s)", ddl, e)
+                results.append({"columns": list(columns), "ddl": ddl, "status": str(e)})
+        return results
+
+    def slow_queries(self, db_manager: DatabaseManager) -> List[Dict[str, Any]]:
+        """
+        Get the slow query log's queries with their query plans, slowest first.
+
+        Repeated executions of one SQL text are reported once, with the
+        parameters and plan of the slowest.
+        """
+        if self.slow_query_log is None:
+            return []
+
+        # SQL text -> (slowest entry, slow calls)
+        by_query: Dict[str, Tuple[Dict[str, Any], int]] = {}
+        for entry in self.slow_query_log.entries():
+            slowest, calls = by_query.get(entry["query"], (entry, 0))
+            if entry["duration_ms"] > slowest["duration_ms"]:
+                slowest = entry
+            by_query[entry["query"]] = (slowest, calls + 1)
+
+        report = []
+        for query, (slowest, calls) in sorted(
+            by_query.items(), key=lambda item: item[1][0]["duration_ms"], reverse=True
+        ):
+            plan = slowest["plan"]
+            if plan is None:
+                try:
+                    plan = db_manager.explain_query(query, slowest["params"])
+                except Exception as e:
+                    plan = [f"EXPLAIN failed: {e}"]
+            report.append(
+                {
+                    "query": query,
+                    "params": slowest["params"],
+                    "max_duration_ms": slowest["duration_ms"],
+                    "slow_calls": calls,
+                    "plan": plan,
+                }
+            )
+        return report
+
+    def report(self, db_manager: DatabaseManager) -> Dict[str, Any]:
+        """Full advisor report for the configured table"""
+        with self._lock:
+            column_usage = {
+                column: uses
+                for (table_name, column), uses in self._columns.most_common()
+                if table_name == db_manager.table_name
+            }
+        return {
+            "generated_at": time.time(),
+            "indexes_supported": db_manager.config.database_type not in INDEXLESS_DATABASES,
+            "column_usage": column_usage,
+            "existing_indexes": db_manager.get_table_indexes(),
+            "recommendations": self.recommendations(db_manager),
+            "slow_queries": self.slow_queries(db_manager),
+        }
@@ -1,15 +1,76 @@
 import json
+import logging
+import tempfile
+from functools import partial
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any, Dict, List, Optional
 
 from fastapi import Body, FastAPI, HTTPException
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from helpers import create_database_manager, perform_ssrm_query
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from aggregates import AggregateStore
+from cache import BlockCache, CountCache
+from changes import ChangeFeed
+from coalesce import RequestCoalescer
+from config import (
+    AGGREGATE_SNAPSHOT_FILE,
+    CHANGE_FEED,
+    CHANGE_FEED_CREATED_AT_COLUMN,
+    CHANGE_FEED_KEY_COLUMN,
+    CHANGE_FEED_UPDATED_AT_COLUMN,
+    COALESCE_REQUESTS,
+    COLUMNAR_RESULTS,
+    DEFAULT_AGGREGATE_MAX_AGE,
+    DEFAULT_BLOCK_CACHE_MAX_BYTES,
+    DEFAULT_CHANGE_FEED_MAX_CHANGES,
+    DEFAULT_CHANGE_LOG_RETENTION,
+    DEFAULT_COUNT_CACHE_SIZE,
+    DEFAULT_COUNT_CACHE_TTL,
+    DEFAULT_INDEX_ADVISOR_MIN_USES,
+    DEFAULT_PREFETCH_MAX_BYTES,
+    DEFAULT_PREFETCH_TTL,
+    DEFAULT_SCHEMA_DDL_CHECK_INTERVAL,
+    DEFAULT_SCHEMA_REFRESH_INTERVAL,
+    DEFAULT_SLOW_QUERY_LOG_SIZE,
+    DEFAULT_SLOW_QUERY_MS,
+    DEFAULT_STREAM_CHUNK_SIZE,
+    DEFAULT_ESTIMATE_MIN_ROWS,
+    DEFAULT_STREAM_MIN_ROWS,
+    DEFAULT_TEXT_SEARCH_MAX_IN_VALUES,
+    DEFAULT_TEXT_SEARCH_MAX_VALUES,
+    DEFAULT_VALUES_CACHE_SIZE,
+    DEFAULT_VALUES_MAX,
+    DEFAULT_VALUES_REFRESH_INTERVAL,
+    ESTIMATED_COUNTS,
+    FAST_JSON_RESPONSES,
+    INDEX_ADVISOR_AUTO_CREATE,
+    PREFETCH_BACKWARD,
+    PREFETCH_DEPTH,
+    SCHEMA_SNAPSHOT_FILE,
+    STREAM_RESPONSES,
+    TEXT_SEARCH_COLUMNS,
+    TEXT_SEARCH_MODE,
+)
+from estimates import CountEstimator, EstimatedCount
+from formatters import ColumnarRows, render_ssrm_response
+from grouping import GroupingEngine
+from index_advisor import IndexAdvisor
+from metrics import MetricsRegistry, SlowQueryLog, StageTimer
+from helpers import create_database_manager, perform_ssrm_query, stream_ssrm_query
+from pagination import KeysetCursorStore
+from pivot import PivotEngine
+from prefetch import BlockPrefetcher
+from responses import FastJSONResponse, StreamingSSRMResponse
+from schema import SchemaCache
+from text_search import TextSearchIndex
+from values import DistinctValuesCache
 
 # Import our custom models and helper functions
 from models import AgGridOptions, AgRows
 
+logger = logging.getLogger(__name__)
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Demo SSRM AgGrid API",
@@ -34,8 +95,186 @@ db_manager = create_database_manager(
     database_type="sqlite",
     file_path=Path(__file__).parent / "demo_data.db",
     table_name="demo_data",
+    # Set to a unique column (e.g. "id") to enable keyset pagination
+    keyset_column=None,
+)
+
+# Cursors of served blocks, used to seek to the next block instead of OFFSET
+keyset_cursors = KeysetCursorStore() if db_manager.keyset_column else None
+
+# Row counts per filtered view, so scrolling one view runs COUNT only once
+count_cache = CountCache(
+    max_entries=DEFAULT_COUNT_CACHE_SIZE, ttl=DEFAULT_COUNT_CACHE_TTL
+)
+
+# Formatted result blocks, so re-requested blocks (group re-expansion, tab
+# switches) are served without running SQL again
+block_cache = BlockCache(max_bytes=DEFAULT_BLOCK_CACHE_MAX_BYTES)
+
+# Blocks adjacent to each served block, computed ahead of the grid's scrolling
+prefetcher = (
+    BlockPrefetcher(
+        depth=PREFETCH_DEPTH,
+        backward=PREFETCH_BACKWARD,
+        max_bytes=DEFAULT_PREFETCH_MAX_BYTES,
+        ttl=DEFAULT_PREFETCH_TTL,
+    )
+    if PREFETCH_DEPTH > 0
+    else None
+)
+
+# Identical requests in flight at the same time (e.g. a dashboard opened by
+# many users at once) share one execution
+request_coalescer = RequestCoalescer() if COALESCE_REQUESTS else None
+
+# All rowGroupCols levels of a filtered view, computed in one query, so group
+# expansion is answered from memory
+grouping_engine = GroupingEngine()
+
+# Distinct pivot keys per filtered view for server-side pivot mode
+pivot_engine = PivotEngine()
+
+# Partial aggregates of common groupings, kept in side tables. Register the
+# groupings the grid uses most, e.g.:
+#   aggregate_store.register(db_manager.table_name, ["sector", "region"], ["revenue"])
+# One worker builds them at startup; the others adopt its build from the snapshot
+aggregate_store = AggregateStore(
+    snapshot_path=Path(tempfile.gettempdir()) / AGGREGATE_SNAPSHOT_FILE,
+    max_age=DEFAULT_AGGREGATE_MAX_AGE,
+)
+
+# Most recent slow queries with their SQL and query plan
+slow_query_log = SlowQueryLog(
+    threshold_ms=DEFAULT_SLOW_QUERY_MS, max_entries=DEFAULT_SLOW_QUERY_LOG_SIZE
+)
+
+# Columns requests filter, group and sort on, turned into index recommendations
+index_advisor = IndexAdvisor(
+    min_uses=DEFAULT_INDEX_ADVISOR_MIN_USES,
+    auto_create=INDEX_ADVISOR_AUTO_CREATE,
+    slow_query_log=slow_query_log,
+)
+
+# Column names/types and statistics, used to validate requests without
+# metadata queries; reloaded on schema changes and every refresh interval
+schema_cache = SchemaCache(
+    snapshot_path=Path(tempfile.gettempdir()) / SCHEMA_SNAPSHOT_FILE,
+    refresh_interval=DEFAULT_SCHEMA_REFRESH_INTERVAL,
+    ddl_check_interval=DEFAULT_SCHEMA_DDL_CHECK_INTERVAL,
+)
+
+# Distinct values per column and filter for AG Grid set filters
+distinct_values = DistinctValuesCache(
+    max_values=DEFAULT_VALUES_MAX,
+    refresh_interval=DEFAULT_VALUES_REFRESH_INTERVAL,
+    max_entries=DEFAULT_VALUES_CACHE_SIZE,
+)
+
+# Trigram index serving contains/startsWith/endsWith filters on text columns
+text_index = (
+    TextSearchIndex(
+        TEXT_SEARCH_COLUMNS,
+        mode=TEXT_SEARCH_MODE,
+        max_values=DEFAULT_TEXT_SEARCH_MAX_VALUES,
+        max_in_values=DEFAULT_TEXT_SEARCH_MAX_IN_VALUES,
+    )
+    if TEXT_SEARCH_COLUMNS
+    else None
 )
 
+# Rows changed since a client's version, applied by the grid as transactions
+change_feed = (
+    ChangeFeed(
+        key_column=CHANGE_FEED_KEY_COLUMN,
+        updated_at_column=CHANGE_FEED_UPDATED_AT_COLUMN,
+        max_changes=DEFAULT_CHANGE_FEED_MAX_CHANGES,
+        retention=DEFAULT_CHANGE_LOG_RETENTION,
+        created_at_column=CHANGE_FEED_CREATED_AT_COLUMN,
+    )
+    if CHANGE_FEED
+    else None
+)
+
+# Row counts of huge tables from database statistics, refined in the background
+count_estimator = (
+    CountEstimator(min_rows=DEFAULT_ESTIMATE_MIN_ROWS, schema_cache=schema_cache)
+    if ESTIMATED_COUNTS
+    else None
+)
+
+# Process-wide request/stage timings exported on /metrics
+metrics = MetricsRegistry()
+metrics.describe("ssrm_requests_total", "SSRM requests served, by request kind")
+metrics.describe("ssrm_request_errors_total", "SSRM requests that failed, by request kind")
+metrics.describe("ssrm_request_duration_seconds", "End-to-end SSRM request duration")
+metrics.describe("ssrm_stage_duration_seconds", "Duration of each SSRM pipeline stage")
+metrics.describe(
+    "ssrm_requests_coalesced_total",
+    "SSRM requests answered by another identical request's execution",
+)
+metrics.describe("ssrm_cache_hits", "Hits of the in-process SSRM caches")
+metrics.describe("ssrm_cache_misses", "Misses of the in-process SSRM caches")
+metrics.gauge(
+    "ssrm_cache_hits",
+    lambda: {
+        (("cache", name),): stats["hits"]
+        for name, stats in get_ssrm_cache_stats().items()
+        if stats and "hits" in stats
+    },
+)
+metrics.gauge(
+    "ssrm_cache_misses",
+    lambda: {
+        (("cache", name),): stats["misses"]
+        for name, stats in get_ssrm_cache_stats().items()
+        if stats and "misses" in stats
+    },
+)
+
+
+def request_kind(ag_options: AgGridOptions) -> str:
+    """Metric label describing the kind of grid interaction"""
+    if ag_options.pivotMode and ag_options.pivotCols:
+        return "pivot"
+    if ag_options.is_doing_grouping():
+        return "grouped"
+    return "flat"
+
+
+def finish_request(response: Response, timer: StageTimer, kind: str) -> Response:
+    """Attach the Server-Timing header and record the request's timings"""
+    response.headers["Server-Timing"] = timer.server_timing_header()
+    metrics.inc("ssrm_requests_total", kind=kind)
+    metrics.observe("ssrm_request_duration_seconds", timer.total_ms() / 1000, kind=kind)
+    for stage, duration_ms in timer.timings.items():
+        metrics.observe(
+            "ssrm_stage_duration_seconds", duration_ms / 1000, stage=stage, kind=kind
+        )
+    return response
+
+
+@app.on_event("startup")
+def open_connection_pool():
+    """Open pooled database connections before the first grid request"""
+    db_manager.warm()
+    # Load the table schema (or adopt another worker's snapshot) and watch it
+    schema_cache.get(db_manager)
+    schema_cache.start(db_manager)
+    if text_index is not None:
+        text_index.refresh(db_manager)
+    if change_feed is not None:
+        change_feed.refresh(db_manager)
+    # Build registered materialized aggregates (in one worker); requests fall
+    # back to the source table until they are ready
+    aggregate_store.build_once(db_manager)
+
+
+@app.on_event("shutdown")
+def close_connection_pool():
+    """Close pooled database connections when the server stops"""
+    schema_cache.stop()
+    db_manager.close()
+
 
 @app.get("/")
 def get_root():
@@ -89,7 +328,7 @@ async def get_data_ssrm(
             - debug_info: Query execution information
 
     Raises:
-        HTTPException: 500 error if database query fails
+        HTTPException: 400 error for unknown columns, 500 error if database query fails
 
     Example Request:
         ```json
@@ -121,6 +360,20 @@ async def get_data_ssrm(
         }
         ```
     """
+    timer = StageTimer()
+    kind = request_kind(ag_options)
+
+    schema = schema_cache.get(db_manager)
+    unknown_columns = schema.unknown_columns(ag_options)
+    if unknown_columns:
+        metrics.inc("ssrm_request_errors_total", kind=kind)
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown_columns)}"
+        )
+    if ag_options.filterModel:
+        # Filters sent without a filterType are parsed according to the column type
+        ag_options.filterModel = schema.with_filter_types(ag_options.filterModel)
+
     try:
         # Convert SSRM request to AgGrid options
 
@@ -130,22 +383,280 @@ async def get_data_ssrm(
             query=base_query, options=ag_options, escape=db_manager.escape_char
         )
 
+        if (
+            STREAM_RESPONSES
+            # startRow == endRow == 0 requests every row, the largest block of all
+            and (
+                ag_options.page_size() >= DEFAULT_STREAM_MIN_ROWS
+                or ag_options.startRow == ag_options.endRow == 0
+            )
+            and not ag_options.is_doing_grouping()
+            and not pivot_engine.is_pivot_request(ag_options)
+            # Shard streams are concatenated, which would break the sort order
+            and not db_manager.is_sharded
+        ):
+            # Large flat block: write rowData chunk by chunk from the cursor
+            total_count, row_chunks = await stream_ssrm_query(
+                db_manager,
+                ag_rows,
+                count_cache=count_cache,
+                chunk_size=DEFAULT_STREAM_CHUNK_SIZE,
+                timer=timer,
+                text_index=text_index,
+            )
+            return finish_request(
+                StreamingSSRMResponse(row_chunks, rowCount=total_count),
+                timer,
+                "stream",
+            )
+
         # Execute the SSRM query using our helper function
-        total_count, formatted_results = await perform_ssrm_query(db_manager, ag_rows)
+        run_query = partial(
+            perform_ssrm_query,
+            db_manager,
+            ag_rows,
+            cursor_store=keyset_cursors,
+            count_cache=count_cache,
+            block_cache=block_cache,
+            grouping_engine=grouping_engine,
+            pivot_engine=pivot_engine,
+            aggregate_store=aggregate_store,
+            index_advisor=index_advisor,
+            timer=timer,
+            slow_query_log=slow_query_log,
+            count_estimator=count_estimator,
+            prefetcher=prefetcher,
+            text_index=text_index,
+            columnar=COLUMNAR_RESULTS,
+        )
+        if request_coalescer is not None:
+            (total_count, formatted_results), coalesced = await request_coalescer.run(
+                db_manager.table_name, ag_options, run_query, timer=timer
+            )
+            if coalesced:
+                metrics.inc("ssrm_requests_coalesced_total", kind=kind)
+        else:
+            total_count, formatted_results = await run_query()
 
         # Results are already formatted and cleaned by our modular system
         clean_results = formatted_results
 
         # Prepare response, Must contain rowData + rowCount
-        response = {"rowData": clean_results, "rowCount": total_count}
+        response = {"rowData": clean_results, "rowCount": int(total_count)}
+
+        # Estimated counts are replaced by the exact count on a later block
+        if isinstance(total_count, EstimatedCount):
+            response["rowCountApproximate"] = True
+
+        # Pivot mode also needs the generated columns to build the pivot headers
+        if pivot_engine.is_pivot_request(ag_options):
+            response["pivotResultFields"] = await pivot_engine.get_result_fields(
+                db_manager, ag_options
+            )
 
-        return response
+        with timer.stage("serialize"):
+            if isinstance(clean_results, ColumnarRows):
+                # Render rowData straight from the columns, skipping per-row dicts
+                http_response = Response(
+                    content=render_ssrm_response(response.pop("rowData"), **response),
+                    media_type="application/json",
+                )
+            elif FAST_JSON_RESPONSES:
+                # Rendering here skips FastAPI's jsonable_encoder pass
+                http_response = FastJSONResponse(content=response)
+            else:
+                http_response = JSONResponse(content=jsonable_encoder(response))
+
+        return finish_request(http_response, timer, kind)
 
     except Exception as e:
+        metrics.inc("ssrm_request_errors_total", kind=kind)
+        logger.exception("Error processing SSRM request (%s)", kind)
         error_msg = f"Error processing SSRM request: {str(e)}"
         raise HTTPException(status_code=500, detail=error_msg)
 
 
+@app.post("/data-ssrm/invalidate")
+async def invalidate_ssrm_caches(
+    changed_groups: Annotated[
+        Optional[List[Dict[str, Any]]], Body(alias="changedGroups", embed=True)
+    ] = None,
+):
+    """
+    Drop cached SSRM results for the configured table.
+
+    Call this after writing to the table so the next grid request sees fresh
+    counts and blocks. Materialized aggregates are refreshed first: pass
+    ``{"changedGroups": [{"sector": "Tech"}]}`` to only recompute the groups a
+    write touched, otherwise they are fully rebuilt.
+    """
+    aggregates_refreshed = await aggregate_store.refresh_async(
+        db_manager, changed_groups
+    )
+    if request_coalescer is not None:
+        # Requests arriving from now on must not join executions started before the write
+        request_coalescer.invalidate(db_manager.table_name)
+    if text_index is not None:
+        # In-process trigram indexes are rebuilt; FTS5/FULLTEXT sync themselves
+        text_index.invalidate(db_manager.table_name)
+        await text_index.refresh_async(db_manager)
+    return {
+        "aggregates_refreshed": aggregates_refreshed,
+        "counts_dropped": count_cache.invalidate(db_manager.table_name),
+        "table_version": block_cache.invalidate(db_manager.table_name),
+        "prefetch_version": (
+            prefetcher.invalidate(db_manager.table_name) if prefetcher is not None else 0
+        ),
+        "groupings_dropped": grouping_engine.invalidate(db_manager.table_name),
+        "pivot_keys_dropped": pivot_engine.invalidate(db_manager.table_name),
+        "estimates_dropped": (
+            count_estimator.invalidate(db_manager.table_name)
+            if count_estimator is not None
+            else 0
+        ),
+        "values_dropped": distinct_values.invalidate(db_manager.table_name),
+        "cursors_dropped": (
+            keyset_cursors.invalidate(db_manager.table_name) if keyset_cursors is not None else 0
+        ),
+    }
+
+
+@app.get("/data-ssrm/cache-stats")
+def get_ssrm_cache_stats():
+    """Hit/miss counters and sizes of the SSRM caches"""
+    return {
+        "counts": count_cache.stats(),
+        "blocks": block_cache.stats(),
+        "prefetch": prefetcher.stats() if prefetcher is not None else None,
+        "groupings": grouping_engine.stats(),
+        "aggregates": aggregate_store.stats(),
+        "estimates": count_estimator.stats() if count_estimator is not None else None,
+        "routing": db_manager.routing_stats(),
+        "schema": schema_cache.stats(),
+        "values": distinct_values.stats(),
+        "text_search": text_index.stats() if text_index is not None else None,
+        "coalescing": request_coalescer.stats() if request_coalescer is not None else None,
+        "changes": change_feed.stats() if change_feed is not None else None,
+    }
+
+
+@app.post("/data-ssrm/values/{column}")
+async def get_set_filter_values(
+    column: str,
+    filter_model: Annotated[
+        Optional[Dict[str, Any]], Body(alias="filterModel", embed=True)
+    ] = None,
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Distinct values of a column for an AG Grid set filter.
+
+    Pass the grid's ``filterModel`` to only list values of rows matching the
+    other active filters; the column's own filter is ignored. ``search``
+    narrows the list to values starting with the text (case-insensitive).
+    ``truncated`` is true when more values exist than were returned.
+    """
+    schema = schema_cache.get(db_manager)
+    unknown_columns = [
+        name for name in [column, *(filter_model or {})] if not schema.has_column(name)
+    ]
+    if unknown_columns:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown_columns)}"
+        )
+    if filter_model:
+        filter_model = schema.with_filter_types(filter_model)
+    return await distinct_values.get_values_async(
+        db_manager, column, filter_model=filter_model, search=search, limit=limit
+    )
+
+
+@app.post("/data-ssrm/changes")
+async def get_row_changes(
+    filter_model: Annotated[
+        Optional[Dict[str, Any]], Body(alias="filterModel", embed=True)
+    ] = None,
+    since: Optional[str] = None,
+):
+    """
+    Rows added, updated and removed since a version, as an AG Grid transaction.
+
+    Call without ``since`` before loading the grid to get the current
+    ``version``, then poll with ``since`` set to the last returned version and
+    apply ``add``/``update``/``remove`` with ``applyServerSideTransaction``.
+    Pass the grid's ``filterModel`` so rows outside the filters are left out.
+    On ``reset`` the version is too old to catch up and the grid must refresh;
+    ``more`` means further changes are waiting.
+    """
+    if change_feed is None:
+        raise HTTPException(status_code=404, detail="The change feed is not enabled")
+    schema = schema_cache.get(db_manager)
+    unknown_columns = [name for name in filter_model or {} if not schema.has_column(name)]
+    if unknown_columns:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown_columns)}"
+        )
+    if filter_model:
+        filter_model = schema.with_filter_types(filter_model)
+    try:
+        return await change_feed.get_changes_async(
+            db_manager, since=since, filter_model=filter_model
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/data-ssrm/slow-queries")
+def get_slow_queries(limit: int = 50):
+    """Most recent slow queries with their stage, SQL, parameters and query plan"""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.entries(limit),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Request and stage timings plus cache counters in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/data-ssrm/index-advisor")
+def get_index_advice():
+    """
+    Index recommendations for the configured table.
+
+    Reports how often each column is filtered, grouped or sorted on, the
+    existing indexes, recommended composite indexes with their CREATE INDEX
+    statements, and the slowest recorded queries with their query plans.
+    """
+    return index_advisor.report(db_manager)
+
+
+@app.post("/data-ssrm/index-advisor/apply")
+def apply_index_advice():
+    """
+    Create all currently recommended indexes.
+
+    Runs DDL against the database, so it is only enabled together with
+    ``INDEX_ADVISOR_AUTO_CREATE``.
+
+    Raises:
+        HTTPException: 403 error if index creation is not enabled
+    """
+    if not index_advisor.auto_create:
+        raise HTTPException(
+            status_code=403,
+            detail="Index creation is disabled; set INDEX_ADVISOR_AUTO_CREATE to enable it",
+        )
+    # On the advisor's DDL thread, queued behind any automatic index build
+    indexes = index_advisor.ddl_executor.submit(index_advisor.apply, db_manager).result()
+    # Pick up the new indexes without waiting for the next schema check
+    schema_cache.load(db_manager)
+    return {"indexes": indexes}
+
+
 @app.get("/widgets.json")
 def get_widgets():
     """Widgets configuration file for the OpenBB Terminal Pro"""
@@ -0,0 +1,242 @@
+"""
+Timing instrumentation for SSRM AgGrid application.
+
+Provides per-request stage timers (exported as a ``Server-Timing`` header),
+process-wide Prometheus-style metrics and a ring buffer of slow queries with
+their SQL, parameters and query plan.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the stages of one SSRM request, in milliseconds.
+
+    Stages run concurrently (count and main query) are timed independently;
+    a stage entered twice accumulates.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    def add(self, stage: str, duration_ms: float) -> None:
+        """Add a measured duration to a stage"""
+        self.timings[stage] = self.timings.get(stage, 0.0) + duration_ms
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as ``stage``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - started) * 1000)
+
+    def total_ms(self) -> float:
+        """Milliseconds since the timer was created"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing_header(self) -> str:
+        """Render the timings as a ``Server-Timing`` header value"""
+        parts = [f"{stage};dur={duration:.2f}" for stage, duration in self.timings.items()]
+        parts.append(f"total;dur={self.total_ms():.2f}")
+        return ", ".join(parts)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    Minimal thread-safe registry rendering the Prometheus text exposition format.
+
+    Supports counters, histograms and gauges computed on scrape, which is all
+    the SSRM endpoints need without depending on a metrics client library.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        # name -> labels -> (bucket counts, sum, count)
+        self._histograms: Dict[
+            str, Dict[Tuple[Tuple[str, str], ...], Tuple[List[int], float, int]]
+        ] = {}
+        self._gauges: Dict[str, Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, help_text: str) -> None:
+        """Set the HELP text of a metric"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Increment a counter"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Record one observation in a histogram"""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            bucket_counts, total, count = series.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    bucket_counts[index] += 1
+            series[key] = (bucket_counts, total + value, count + 1)
+
+    def gauge(
+        self, name: str, collect: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]
+    ) -> None:
+        """Register a gauge whose labelled values are collected on every scrape"""
+        self._gauges[name] = collect
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (list(buckets), total, count) for key, (buckets, total, count) in series.items()}
+                for name, series in self._histograms.items()
+            }
+
+        for name, series in counters.items():
+            lines.extend(self._header(name, "counter"))
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name, series in histograms.items():
+            lines.extend(self._header(name, "histogram"))
+            for labels, (bucket_counts, total, count) in series.items():
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    bucket_labels = labels + (("le", repr(bound)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for name, collect in self._gauges.items():
+            try:
+                series = collect()
+            except Exception:
+                logger.exception("Failed to collect gauge %s", name)
+                continue
+            lines.extend(self._header(name, "gauge"))
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, metric_type: str) -> List[str]:
+        header = []
+        if name in self._help:
+            header.append(f"# HELP {name} {self._help[name]}")
+        header.append(f"# TYPE {name} {metric_type}")
+        return header
+
+
+class SlowQueryLog:
+    """
+    Ring buffer of the most recent queries slower than ``threshold_ms``.
+
+    Each entry keeps the SQL, its parameters and the SSRM stage it ran in; the
+    query plan is captured in the background on the database executor so the
+    slow request is not delayed further.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 500.0,
+        max_entries: int = 100,
+        capture_plans: bool = True,
+    ):
+        """
+        Initialize slow query log.
+
+        Args:
+            threshold_ms: Queries at least this slow are logged
+            max_entries: Number of entries kept; the oldest are dropped first
+            capture_plans: Run EXPLAIN for every logged query
+        """
+        self.threshold_ms = threshold_ms
+        self.capture_plans = capture_plans
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        db_manager: DatabaseManager,
+        stage: str,
+        query: str,
+        params: Sequence[Any],
+        duration_ms: float,
+    ) -> None:
+        """Log a query if it was slow"""
+        if duration_ms < self.threshold_ms:
+            return
+
+        entry = {
+            "timestamp": time.time(),
+            "stage": stage,
+            "duration_ms": round(duration_ms, 3),
+            "query": query,
+            "params": list(params or ()),
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        logger.warning(
+            "Slow %s query (%.1f ms): %s",
+            stage,
+            duration_ms,
+            query,
+            extra={"ssrm_stage": stage, "duration_ms": duration_ms, "query": query},
+        )
+        if self.capture_plans:
+            db_manager.executor.submit(self._capture_plan, db_manager, entry)
+
+    @staticmethod
+    def _capture_plan(db_manager: DatabaseManager, entry: Dict[str, Any]) -> None:
+        try:
+            entry["plan"] = db_manager.explain_query(entry["query"], entry["params"])
+        except Exception as e:
+            entry["plan"] = [f"EXPLAIN failed: {e}"]
+
+    def entries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get logged queries, most recent first"""
+        with self._lock:
+            entries = [dict(entry) for entry in reversed(self._entries)]
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> int:
+        """Drop all entries, returning how many were dropped"""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            return dropped
@@ -5,6 +5,8 @@ This file contains all the essential data models needed for the Server-Side Row
 AgGrid functionality with any database table structure.
 """
 
+import hashlib
+import json
 from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
@@ -43,6 +45,23 @@ class AgGridOptions(BaseModel):
             return 0
         return self.endRow - self.startRow
 
+    def signature(self, include_rows: bool = True) -> str:
+        """
+        Canonical hash of the request, independent of dict key order.
+
+        Args:
+            include_rows: Include startRow/endRow; pass False to identify the
+                "view" (sort, filter, grouping) regardless of which block is requested
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        exclude = None if include_rows else {"startRow", "endRow"}
+        payload = json.dumps(
+            self.model_dump(exclude=exclude), sort_keys=True, default=str
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
 
 # AgRows Model - Bridge between AgGrid and SQL Query Builder
 class AgRows(BaseModel):
@@ -0,0 +1,111 @@
+"""
+Keyset (seek) pagination support for SSRM AgGrid application.
+Remembers where each served block ended so the following block can seek past it
+instead of skipping ``startRow`` rows with OFFSET.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from models import AgGridOptions
+
+
+def extract_cursor(
+    rows: Sequence[Dict[str, Any]], sort_model: list, keyset_column: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a seek cursor from the last row of a block.
+
+    Args:
+        rows: Rows returned for the block, in query order (list of dicts or ColumnarRows)
+        sort_model: AgGrid sortModel used to order the block
+        keyset_column: Unique tiebreaker column appended to the sort order
+
+    Returns:
+        Optional[Dict[str, Any]]: Column -> value of the last row (sort columns
+        may be NULL), or None if the block is empty, a sort column is missing or
+        the tiebreaker is NULL
+    """
+    if not rows:
+        return None
+
+    last_row = rows[-1]
+    columns = [item.get("colId", "") for item in sort_model or []]
+    if keyset_column not in columns:
+        columns.append(keyset_column)
+
+    cursor = {}
+    for column in columns:
+        if column not in last_row:
+            return None
+        cursor[column] = last_row.get(column)
+    if cursor[keyset_column] is None:
+        return None
+    return cursor
+
+
+class KeysetCursorStore:
+    """
+    Bounded LRU map of (table, view signature, row position) -> seek cursor.
+
+    A cursor stored for the block ending at row N is only used by a request
+    starting exactly at N for the same sort/filter/grouping view. Any other
+    request (a random jump, a changed view) misses and falls back to OFFSET.
+    Cursors are taken from the rows of one table version, so writes must
+    ``invalidate`` them.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize cursor store.
+
+        Args:
+            max_entries: Maximum number of cursors kept before evicting the oldest
+        """
+        self.max_entries = max_entries
+        self._cursors: "OrderedDict[Tuple[str, str, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, table_name: str, options: AgGridOptions) -> Optional[Dict[str, Any]]:
+        """Get the cursor for the block starting at ``options.startRow``, if known"""
+        if not options.startRow:
+            return None
+
+        key = (table_name, options.signature(include_rows=False), options.startRow)
+        with self._lock:
+            cursor = self._cursors.get(key)
+            if cursor is not None:
+                self._cursors.move_to_end(key)
+            return cursor
+
+    def remember(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        rows: Sequence[Dict[str, Any]],
+        keyset_column: str,
+    ) -> None:
+        """Store the cursor for the block that follows the one just served"""
+        if options.is_doing_grouping() or len(rows) < options.page_size():
+            # Group rows use OFFSET, and a short block means there is no next block
+            return
+
+        cursor = extract_cursor(rows, options.sortModel, keyset_column)
+        if cursor is None:
+            return
+
+        key = (table_name, options.signature(include_rows=False), options.endRow)
+        with self._lock:
+            self._cursors[key] = cursor
+            self._cursors.move_to_end(key)
+            while len(self._cursors) > self.max_entries:
+                self._cursors.popitem(last=False)
+
+    def invalidate(self, table_name: str) -> int:
+        """Drop the cursors of a table, e.g. after a write shifted its rows"""
+        with self._lock:
+            stale = [key for key in self._cursors if key[0] == table_name]
+            for key in stale:
+                del self._cursors[key]
+            return len(stale)
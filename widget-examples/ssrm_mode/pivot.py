@@ -0,0 +1,130 @@
+"""
+Server-side pivot support for SSRM AgGrid application.
+
+Discovers the distinct ``pivotCols`` value combinations of a filtered view with
+one cached query; :class:`QueryBuilder` then turns each combination into
+conditional aggregate columns so a whole pivoted block comes from one scan.
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+from cache import TTLCache, normalize_filter_model
+from database import DatabaseManager
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder, pivot_result_fields
+
+
+class PivotEngine:
+    """
+    Discovers and caches pivot keys per filtered view.
+
+    Keys are discovered over the whole filtered view (ignoring expanded group
+    keys), so every group level of the grid shows the same pivot columns.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = 300.0,
+        max_pivot_keys: int = 500,
+    ):
+        """
+        Initialize pivot engine.
+
+        Args:
+            max_entries: Maximum number of views whose pivot keys are kept
+            ttl: Seconds discovered keys stay valid; None keeps them until invalidated
+            max_pivot_keys: Maximum number of distinct pivot value combinations;
+                larger pivots are rejected instead of generating huge queries
+        """
+        self.max_pivot_keys = max_pivot_keys
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    @staticmethod
+    def is_pivot_request(options: AgGridOptions) -> bool:
+        """Check if a request asks for server-side pivoting"""
+        return bool(options.pivotMode and options.pivotCols)
+
+    @staticmethod
+    def make_key(table_name: str, options: AgGridOptions) -> Tuple[str, str]:
+        """Build the cache key: pivot columns and the filters that narrow their values"""
+        payload = json.dumps(
+            {
+                "filterModel": normalize_filter_model(options.filterModel),
+                "pivotCols": [
+                    col.get("field", col.get("id", "")) for col in options.pivotCols
+                ],
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return table_name, payload
+
+    def build_keys_query(
+        self, db_manager: DatabaseManager, options: AgGridOptions
+    ) -> Tuple[str, List[Any]]:
+        """
+        Build the query listing distinct pivot value combinations.
+
+        Returns:
+            Tuple[str, List[Any]]: SQL with placeholders and its parameters
+        """
+        view_options = options.model_copy(update={"groupKeys": [], "sortModel": []})
+        builder = QueryBuilder(
+            ag_rows=AgRows(query="", options=view_options, escape=db_manager.escape_char),
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+        )
+        where_sql, params = builder.create_where_sql()
+        pivot_cols = ", ".join(
+            builder.escape_column(col.get("field", col.get("id", "")))
+            for col in options.pivotCols
+        )
+        query = (
+            f"SELECT DISTINCT {pivot_cols} FROM {db_manager.table_name}{where_sql}"
+            f" ORDER BY {pivot_cols} LIMIT {db_manager.placeholder}"
+        )
+        # One extra row tells us the pivot exceeded max_pivot_keys
+        return query, params + [self.max_pivot_keys + 1]
+
+    async def get_pivot_keys(
+        self, db_manager: DatabaseManager, options: AgGridOptions
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Get the pivot keys of a view, discovering them with one query on a miss.
+
+        Raises:
+            ValueError: If the view has more than ``max_pivot_keys`` combinations
+        """
+        key = self.make_key(db_manager.table_name, options)
+        pivot_keys = self._cache.get(key)
+        if pivot_keys is not None:
+            return pivot_keys
+
+        query, params = self.build_keys_query(db_manager, options)
+        rows = await db_manager.execute_query_async(query, params)
+        if len(rows) > self.max_pivot_keys:
+            raise ValueError(
+                f"Pivot produces more than {self.max_pivot_keys} column combinations; "
+                "add filters or pivot on fewer columns"
+            )
+
+        pivot_fields = [col.get("field", col.get("id", "")) for col in options.pivotCols]
+        pivot_keys = [tuple(row[field] for field in pivot_fields) for row in rows]
+        self._cache.set(key, pivot_keys)
+        return pivot_keys
+
+    async def get_result_fields(
+        self, db_manager: DatabaseManager, options: AgGridOptions
+    ) -> List[str]:
+        """Get the pivotResultFields AG Grid needs to build the pivot column headers"""
+        pivot_keys = await self.get_pivot_keys(db_manager, options)
+        return pivot_result_fields(pivot_keys, options.valueCols)
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Drop cached pivot keys, e.g. after rows were written"""
+        if table_name is None:
+            return self._cache.invalidate()
+        return self._cache.invalidate(lambda key: key[0] == table_name)
@@ -0,0 +1,168 @@
+"""
+Read-ahead of SSRM blocks for SSRM AgGrid application.
+
+AG Grid scrolls sequentially, so after a block is served the blocks right
+after it (and optionally before it) are computed in the background and parked
+in a short-lived, byte-budgeted cache. When the grid asks for them, the
+request is answered from memory, or joins the prefetch if it is still running.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from cache import BlockCache
+from estimates import EstimatedCount
+from formatters import ColumnarRows
+from models import AgGridOptions
+
+logger = logging.getLogger(__name__)
+
+Block = Tuple[int, Union[List[Dict[str, Any]], ColumnarRows]]
+
+
+class BlockPrefetcher:
+    """
+    Computes adjacent blocks of served SSRM requests ahead of time.
+
+    Prefetched blocks have the same sort, filters and grouping as the served
+    block, shifted by whole page sizes. They are kept for ``ttl`` seconds
+    within ``max_bytes``; writes invalidate them like the block cache.
+    """
+
+    def __init__(
+        self,
+        depth: int = 1,
+        backward: bool = False,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl: Optional[float] = 30.0,
+        max_concurrent: int = 2,
+    ):
+        """
+        Initialize block prefetcher.
+
+        Args:
+            depth: Blocks computed ahead of each served block
+            backward: Also compute the block before each served block
+            max_bytes: Approximate memory budget for prefetched rows
+            ttl: Seconds a prefetched block stays valid
+            max_concurrent: Prefetch queries running at the same time
+        """
+        self.depth = depth
+        self.backward = backward
+        self.max_concurrent = max_concurrent
+        self.cache = BlockCache(max_bytes=max_bytes, ttl=ttl)
+        # (table, signature) -> task returning (table version, block or None)
+        self._inflight: Dict[Tuple[str, str], "asyncio.Task[Tuple[int, Optional[Block]]]"] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.scheduled = 0
+        self.joined = 0
+        self.failed = 0
+
+    @staticmethod
+    def _shifted(options: AgGridOptions, blocks: int) -> Optional[AgGridOptions]:
+        """Options of the block ``blocks`` pages after (or before) a request"""
+        page_size = options.page_size()
+        start_row = options.startRow + blocks * page_size
+        if page_size <= 0 or start_row < 0:
+            return None
+        return options.model_copy(
+            update={"startRow": start_row, "endRow": start_row + page_size}
+        )
+
+    async def get(self, table_name: str, options: AgGridOptions) -> Optional[Block]:
+        """Get a prefetched block, waiting for its prefetch if still running"""
+        block = self.cache.get(table_name, options)
+        if block is not None:
+            return block
+
+        task = self._inflight.get((table_name, options.signature()))
+        if task is None:
+            return None
+        self.joined += 1
+        # Shielded so a cancelled request does not cancel the shared prefetch
+        version, block = await asyncio.shield(task)
+        if version != self.cache.table_version(table_name):
+            return None  # Table written while the prefetch ran
+        return block
+
+    def schedule(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        total_count: int,
+        compute: Callable[[AgGridOptions], Awaitable[Block]],
+        block_cache: Optional[BlockCache] = None,
+    ) -> int:
+        """
+        Start prefetching the blocks adjacent to a served request.
+
+        Args:
+            table_name: Table the request was served from
+            options: The served request
+            total_count: Row count of the served request; no block past it is prefetched
+            compute: Coroutine function computing the block of given options
+            block_cache: Blocks already in this cache are not prefetched
+
+        Returns:
+            int: Number of prefetches started
+        """
+        offsets = list(range(1, self.depth + 1))
+        if self.backward:
+            offsets.append(-1)
+
+        started = 0
+        for offset in offsets:
+            adjacent = self._shifted(options, offset)
+            if adjacent is None or adjacent.startRow >= total_count:
+                continue
+            key = (table_name, adjacent.signature())
+            if (
+                key in self._inflight
+                or self.cache.contains(table_name, adjacent)
+                or (block_cache is not None and block_cache.contains(table_name, adjacent))
+            ):
+                continue
+
+            task = asyncio.create_task(self._prefetch(table_name, adjacent, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+            self.scheduled += 1
+            started += 1
+        return started
+
+    async def _prefetch(
+        self,
+        table_name: str,
+        options: AgGridOptions,
+        compute: Callable[[AgGridOptions], Awaitable[Block]],
+    ) -> Tuple[int, Optional[Block]]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        async with self._semaphore:
+            version = self.cache.table_version(table_name)
+            try:
+                block = await compute(options)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(
+                    "Prefetch of rows %s-%s failed: %s", options.startRow, options.endRow, e
+                )
+                return version, None
+        if not isinstance(block[0], EstimatedCount):
+            self.cache.set(table_name, options, block[0], block[1], version=version)
+        return version, block
+
+    def invalidate(self, table_name: str) -> int:
+        """Mark all prefetched blocks of a table stale, returning its new version"""
+        return self.cache.invalidate(table_name)
+
+    def stats(self) -> dict:
+        """Get prefetch counters and the state of the prefetch cache"""
+        return {
+            **self.cache.stats(),
+            "scheduled": self.scheduled,
+            "joined": self.joined,
+            "failed": self.failed,
+            "inflight": len(self._inflight),
+        }
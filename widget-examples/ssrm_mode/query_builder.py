@@ -1,12 +1,47 @@
 """
 Generic SQL Query Builder for AgGrid Server-Side Row Model.
 Works with any database table structure without hardcoded field mappings.
+
+Filter values, group keys and pagination bounds are never spliced into the SQL;
+they are returned as bound parameters next to placeholder SQL, so the statement
+text only depends on the query shape and can be prepared once and reused.
 """
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from config import SUPPORTED_AGG_FUNCTIONS
+from aggregates import ROW_COUNT_ALIAS, MaterializedAggregate
+from config import SUPPORTED_AGG_FUNCTIONS, nulls_sort_first
+from filters import TRUE, And, InValues, Predicate, parse_filter, simplify
 from models import AgRows
+from text_search import TextSearchIndex
+
+# Separator AG Grid uses to split pivot result fields into column header groups
+PIVOT_FIELD_SEPARATOR = "_"
+
+
+def pivot_result_field(pivot_key: Tuple[Any, ...], value_field: str) -> str:
+    """
+    Name of the result column holding ``value_field`` for one pivot key.
+
+    e.g. pivot key ("Tech", "Q1") and value "revenue" -> "Tech_Q1_revenue",
+    which AG Grid renders as nested "Tech" > "Q1" > "revenue" headers.
+    """
+    parts = [str(value) for value in pivot_key] + [value_field]
+    return PIVOT_FIELD_SEPARATOR.join(parts)
+
+
+def pivot_result_fields(
+    pivot_keys: List[Tuple[Any, ...]], value_cols: List[Dict[str, Any]]
+) -> List[str]:
+    """Names of all pivot result columns, in select order ("count" without value columns)"""
+    value_fields = [
+        value_col.get("field", value_col.get("id", "")) for value_col in value_cols
+    ] or ["count"]
+    return [
+        pivot_result_field(pivot_key, value_field)
+        for pivot_key in pivot_keys
+        for value_field in value_fields
+    ]
 
 
 class QueryBuilder:
@@ -15,7 +50,20 @@ class QueryBuilder:
     Builds SQL queries based on AgGrid configuration without hardcoded mappings.
     """
 
-    def __init__(self, ag_rows: AgRows, table_name: str, escape_char: str = '"'):
+    def __init__(
+        self,
+        ag_rows: AgRows,
+        table_name: str,
+        escape_char: str = '"',
+        keyset_column: Optional[str] = None,
+        cursor: Optional[Dict[str, Any]] = None,
+        placeholder: str = "?",
+        pivot_keys: Optional[List[Tuple[Any, ...]]] = None,
+        materialized: Optional[MaterializedAggregate] = None,
+        fanout: bool = False,
+        text_index: Optional[TextSearchIndex] = None,
+        null_order: str = "low",
+    ):
         """
         Initialize query builder.
 
@@ -23,15 +71,178 @@ class QueryBuilder:
             ag_rows: AgRows object containing query and options
             table_name: Name of the database table to query
             escape_char: SQL escape character for column names
+            keyset_column: Unique column used as sort tiebreaker for keyset pagination
+            cursor: Sort/tiebreaker values of the last row of the previous block;
+                when given, the page is fetched with a seek predicate instead of OFFSET
+            placeholder: Bind parameter marker of the database driver ("?" or "%s")
+            pivot_keys: Distinct pivotCols value combinations; in pivot mode one
+                conditional aggregate column is generated per key and value column
+            materialized: Side table of partial aggregates covering the request;
+                group queries then roll up its partials instead of scanning the table
+            fanout: The query runs on every shard of a sharded table; each shard
+                returns the leading rows up to the end of the block, which are
+                merge-sorted and sliced afterwards (see ``get_fanout_window``)
+            text_index: Trigram index that substring text filters are rewritten to use
+            null_order: Where the database sorts NULLs (see ``DatabaseConfig.null_order``);
+                keyset seeks include the NULL rows that sort after the cursor
         """
         self.ag_rows = ag_rows
         self.table_name = table_name
         self.escape_char = escape_char
+        self.keyset_column = keyset_column
+        self.cursor = cursor
+        self.placeholder = placeholder
+        self.pivot_keys = pivot_keys
+        self.materialized = materialized
+        self.fanout = fanout
+        self.text_index = text_index
+        self.null_order = null_order
 
     def escape_column(self, column_name: str) -> str:
         """Escape a column name for SQL safety"""
         return f"{self.escape_char}{column_name}{self.escape_char}"
 
+    def placeholders(self, count: int) -> str:
+        """Comma-separated bind parameter markers, e.g. ``?, ?, ?``"""
+        return ", ".join([self.placeholder] * count)
+
+    def is_pivoting(self) -> bool:
+        """Check if the request is in pivot mode and pivot keys are known"""
+        options = self.ag_rows.options
+        return bool(options.pivotMode and options.pivotCols) and self.pivot_keys is not None
+
+    def get_pivot_result_fields(self) -> List[str]:
+        """Get the names of all pivot result columns, in select order"""
+        if not self.is_pivoting():
+            return []
+        return pivot_result_fields(self.pivot_keys, self.ag_rows.options.valueCols)
+
+    def uses_materialized(self) -> bool:
+        """Check if group queries are routed to the materialized aggregate table"""
+        return (
+            self.materialized is not None
+            and self.ag_rows.options.is_doing_grouping()
+            and not self.is_pivoting()
+        )
+
+    def get_source_table(self) -> str:
+        """Get the table the query reads from (the side table when routed)"""
+        if self.uses_materialized():
+            return self.materialized.table_name
+        return self.table_name
+
+    def uses_keyset(self) -> bool:
+        """Check if keyset pagination applies (opt-in, non-grouped queries only)"""
+        return (
+            bool(self.keyset_column)
+            and not self.ag_rows.options.is_doing_grouping()
+            and not self.is_pivoting()
+        )
+
+    def get_keyset_sort(self) -> List[Tuple[str, str]]:
+        """
+        Get the full ordering used for keyset pagination.
+
+        Returns:
+            List[Tuple[str, str]]: (column, direction) pairs from the sortModel,
+            followed by the ascending tiebreaker column unless already sorted on
+        """
+        sort_keys = [
+            (item.get("colId", ""), item.get("sort", "asc").upper())
+            for item in self.ag_rows.options.sortModel or []
+        ]
+        if self.keyset_column not in [column for column, _ in sort_keys]:
+            sort_keys.append((self.keyset_column, "ASC"))
+        return sort_keys
+
+    def get_merge_sort(self) -> List[Tuple[str, bool]]:
+        """
+        Get the ordering per-shard pages are merged on.
+
+        Returns:
+            List[Tuple[str, bool]]: (column, descending) pairs matching the ORDER BY
+        """
+        if self.uses_keyset():
+            sort_keys = self.get_keyset_sort()
+        else:
+            sort_keys = [
+                (item.get("colId", ""), item.get("sort", "asc").upper())
+                for item in self.ag_rows.options.sortModel or []
+            ]
+        return [(column, direction == "DESC") for column, direction in sort_keys]
+
+    def get_fanout_window(self) -> Tuple[int, Optional[int]]:
+        """
+        Get the (skip, limit) slice of the merged shard pages that forms the block.
+
+        Returns:
+            Tuple[int, Optional[int]]: Rows to skip and rows to keep (None for all)
+        """
+        options = self.ag_rows.options
+        if options.startRow == 0 and options.endRow == 0:
+            return 0, None
+        if self.create_seek_sql()[0]:
+            return 0, options.page_size()
+        return options.startRow, options.page_size()
+
+    def create_seek_sql(self) -> Tuple[str, List[Any]]:
+        """
+        Create the seek predicate that replaces OFFSET for keyset pagination.
+
+        For sort keys k1..kn the next page starts after the cursor row, i.e.
+        (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with ">" turned into "<" for
+        descending keys, so mixed sort directions are handled. NULLs are placed
+        where the database sorts them: ``k > v`` also matches NULLs when they
+        sort last, and a NULL cursor value compares with IS (NOT) NULL.
+
+        Returns:
+            Tuple[str, List[Any]]: Parenthesized seek condition and its parameters,
+            or ("", []) if not seeking
+        """
+        if not self.uses_keyset() or not self.cursor:
+            return "", []
+
+        sort_keys = self.get_keyset_sort()
+        if any(column not in self.cursor for column, _ in sort_keys):
+            return "", []
+
+        disjuncts = []
+        params = []
+        for index, (column, direction) in enumerate(sort_keys):
+            after_sql, after_params = self._seek_after_sql(column, direction == "DESC")
+            if not after_sql:
+                # Nothing sorts after a NULL cursor value in this column
+                continue
+            terms = []
+            for prev_column, _ in sort_keys[:index]:
+                value = self.cursor[prev_column]
+                if value is None:
+                    terms.append(f"{self.escape_column(prev_column)} IS NULL")
+                else:
+                    terms.append(f"{self.escape_column(prev_column)} = {self.placeholder}")
+                    params.append(value)
+            terms.append(after_sql)
+            params.extend(after_params)
+            disjuncts.append(f"({' AND '.join(terms)})")
+
+        if not disjuncts:
+            return "(1 = 0)", []
+        return f"({' OR '.join(disjuncts)})", params
+
+    def _seek_after_sql(self, column: str, descending: bool) -> Tuple[str, List[Any]]:
+        """Condition matching the values of a sort column that sort after the cursor's"""
+        escaped = self.escape_column(column)
+        value = self.cursor[column]
+        nulls_first = nulls_sort_first(self.null_order, descending)
+        if value is None:
+            return (f"{escaped} IS NOT NULL", []) if nulls_first else ("", [])
+
+        operator = "<" if descending else ">"
+        sql = f"{escaped} {operator} {self.placeholder}"
+        if not nulls_first:
+            sql = f"({sql} OR {escaped} IS NULL)"
+        return sql, [value]
+
     def create_select_sql(self) -> str:
         """
         Create the SELECT portion of the SQL query.
@@ -68,36 +279,94 @@ class QueryBuilder:
                     agg_func = "sum"
 
                 # Build aggregation SQL
-                agg_col_name = f"{agg_func}({self.escape_column(agg_field)})"
+                if self.uses_materialized():
+                    agg_col_name = self.materialized.aggregate_sql(
+                        agg_func, agg_field, self.escape_column
+                    )
+                else:
+                    agg_col_name = f"{agg_func}({self.escape_column(agg_field)})"
                 cols_to_select.append(
                     f"{agg_col_name} as {self.escape_column(agg_field)}"
                 )
 
             # If no value columns provided, add a count to make it a proper aggregated query
             if len(self.ag_rows.options.valueCols) == 0:
-                cols_to_select.append('count(*) as "count"')
+                if self.uses_materialized():
+                    cols_to_select.append(
+                        f'{self.materialized.rollup_sql(ROW_COUNT_ALIAS, self.escape_column)} as "count"'
+                    )
+                else:
+                    cols_to_select.append('count(*) as "count"')
 
             # Build complete SELECT clause
-            select_sql = f'SELECT {", ".join(cols_to_select)} FROM {self.table_name}'
+            select_sql = f'SELECT {", ".join(cols_to_select)} FROM {self.get_source_table()}'
             return select_sql
 
-    def create_where_sql(self) -> str:
+    def create_pivot_select_sql(self) -> Tuple[str, List[Any]]:
         """
-        Create WHERE clause from AgGrid filter model and group keys.
-
-        This method handles two types of WHERE conditions:
-        1. Group Keys: When groups are expanded, filter data to show only the selected group
-        2. Filter Model: Explicit filters applied by users
+        Create the SELECT clause for pivot mode.
 
-        Supports various filter types including:
-        - Text filters: contains, equals, startsWith, endsWith
-        - Number filters: equals, greaterThan, lessThan, inRange
-        - Set filters: in/not in lists
+        Every (pivot key, value column) pair becomes one conditional aggregate,
+        e.g. ``sum(CASE WHEN "quarter" = ? THEN "revenue" END) AS "Q1_revenue"``,
+        so all pivot cells of a block come from a single grouped scan.
 
         Returns:
-            str: WHERE SQL clause
+            Tuple[str, List[Any]]: SELECT SQL clause and the pivot key parameters
         """
-        where_parts = []
+        options = self.ag_rows.options
+        cols_to_select = []
+        params = []
+
+        if options.is_doing_grouping():
+            group_col = options.get_row_group_column()
+            cols_to_select.append(
+                self.escape_column(group_col.get("id", group_col.get("field", "")))
+            )
+
+        pivot_fields = [
+            pivot_col.get("field", pivot_col.get("id", "")) for pivot_col in options.pivotCols
+        ]
+        for pivot_key in self.pivot_keys:
+            conditions = []
+            key_params = []
+            for pivot_field, key_value in zip(pivot_fields, pivot_key):
+                if key_value is None:
+                    conditions.append(f"{self.escape_column(pivot_field)} IS NULL")
+                else:
+                    conditions.append(f"{self.escape_column(pivot_field)} = {self.placeholder}")
+                    key_params.append(key_value)
+            condition_sql = " AND ".join(conditions)
+
+            if not options.valueCols:
+                alias = self.escape_column(pivot_result_field(pivot_key, "count"))
+                cols_to_select.append(f"count(CASE WHEN {condition_sql} THEN 1 END) as {alias}")
+                params.extend(key_params)
+                continue
+
+            for value_col in options.valueCols:
+                agg_func = value_col.get("aggFunc", "sum")
+                agg_field = value_col.get("field", value_col.get("id", ""))
+                if agg_func not in SUPPORTED_AGG_FUNCTIONS:
+                    agg_func = "sum"
+
+                alias = self.escape_column(pivot_result_field(pivot_key, agg_field))
+                cols_to_select.append(
+                    f"{agg_func}(CASE WHEN {condition_sql} THEN {self.escape_column(agg_field)} END) as {alias}"
+                )
+                params.extend(key_params)
+
+        return f'SELECT {", ".join(cols_to_select)} FROM {self.table_name}', params
+
+    def create_where_predicate(self) -> Predicate:
+        """
+        Build the simplified filter predicate of the request.
+
+        Combines the expanded group keys with the filter model and normalizes
+        the result (see ``filters.simplify``), so conditions on the same column
+        are merged before they reach the database. With a text index, substring
+        conditions it can serve are then rewritten to use it.
+        """
+        conditions: List[Predicate] = []
 
         # Handle group keys - add WHERE conditions for expanded groups
         if self.ag_rows.options.groupKeys:
@@ -107,109 +376,46 @@ class QueryBuilder:
                     row_group_col = self.ag_rows.options.rowGroupCols[index]
                     col_field = row_group_col.get("field", row_group_col.get("id", ""))
 
-                    # Properly escape the key value to prevent SQL injection
-                    escaped_key = str(key).replace("'", "''")  # Escape single quotes
-                    escaped_col = self.escape_column(col_field)
-                    where_condition = f"{escaped_col} = '{escaped_key}'"
-                    where_parts.append(where_condition)
+                    # Group key is bound as a parameter, never spliced into the SQL
+                    conditions.append(InValues(col_field, [str(key)]))
 
         # Handle filter model - explicit user filters
         if self.ag_rows.options.filterModel:
             for field_name, filter_config in self.ag_rows.options.filterModel.items():
-                filter_type = filter_config.get("filterType", "text")
+                condition = parse_filter(field_name, filter_config)
+                if condition is not None:
+                    conditions.append(condition)
 
-                if filter_type == "text":
-                    where_clause = self._build_text_filter(field_name, filter_config)
-                    if where_clause:
-                        where_parts.append(where_clause)
+        predicate = simplify(And(conditions))
+        if self.text_index is not None and not self.uses_materialized():
+            # Materialized aggregate tables have no rows for the index to point at
+            predicate = self.text_index.rewrite(predicate, self.table_name)
+        return predicate
 
-                elif filter_type == "number":
-                    where_clause = self._build_number_filter(field_name, filter_config)
-                    if where_clause:
-                        where_parts.append(where_clause)
+    def create_where_sql(self) -> Tuple[str, List[Any]]:
+        """
+        Create WHERE clause from AgGrid filter model and group keys.
 
-                elif filter_type == "set":
-                    where_clause = self._build_set_filter(field_name, filter_config)
-                    if where_clause:
-                        where_parts.append(where_clause)
+        This method handles two types of WHERE conditions:
+        1. Group Keys: When groups are expanded, filter data to show only the selected group
+        2. Filter Model: Explicit filters applied by users
 
-        if where_parts:
-            where_clause = f" WHERE {' AND '.join(where_parts)}"
-            return where_clause
+        Supports various filter types including:
+        - Text filters: contains, notContains, equals, notEqual, startsWith, endsWith
+        - Number filters: equals, notEqual, greaterThan(OrEqual), lessThan(OrEqual), inRange
+        - Date filters: equals, notEqual, greaterThan, lessThan, inRange (whole days)
+        - Set filters: in lists
+        - Combined filters: ``operator`` (AND/OR) with ``conditions``
 
-        return ""
+        Returns:
+            Tuple[str, List[Any]]: WHERE SQL clause and its bound parameters
+        """
+        predicate = self.create_where_predicate()
+        if predicate == TRUE:
+            return "", []
 
-    def _build_text_filter(
-        self, field_name: str, filter_config: Dict[str, Any]
-    ) -> Optional[str]:
-        """Build WHERE clause for text filters"""
-        condition_type = filter_config.get("type", "contains")
-        filter_value = filter_config.get("filter", "")
-
-        escaped_field = self.escape_column(field_name)
-        if condition_type == "notBlank":
-            return f"{escaped_field} IS NOT NULL AND {escaped_field} != ''"
-        elif condition_type == "blank":
-            return f"{escaped_field} IS NULL OR {escaped_field} = ''"
-        elif not filter_value:
-            # If filter value is empty, return no condition
-            return None
-
-        escaped_value = filter_value.replace("'", "''")  # Escape single quotes
-
-        if condition_type == "contains":
-            return f"{escaped_field} LIKE '%{escaped_value}%'"
-        elif condition_type == "equals":
-            return f"{escaped_field} = '{escaped_value}'"
-        elif condition_type == "startsWith":
-            return f"{escaped_field} LIKE '{escaped_value}%'"
-        elif condition_type == "endsWith":
-            return f"{escaped_field} LIKE '%{escaped_value}'"
-        elif condition_type == "notContains":
-            return f"{escaped_field} NOT LIKE '%{escaped_value}%'"
-
-        return None
-
-    def _build_number_filter(
-        self, field_name: str, filter_config: Dict[str, Any]
-    ) -> Optional[str]:
-        """Build WHERE clause for number filters"""
-        condition_type = filter_config.get("type", "equals")
-        filter_value = filter_config.get("filter", 0)
-
-        escaped_field = self.escape_column(field_name)
-
-        if condition_type == "equals":
-            return f"{escaped_field} = {filter_value}"
-        elif condition_type == "greaterThan":
-            return f"{escaped_field} > {filter_value}"
-        elif condition_type == "lessThan":
-            return f"{escaped_field} < {filter_value}"
-        elif condition_type == "greaterThanOrEqual":
-            return f"{escaped_field} >= {filter_value}"
-        elif condition_type == "lessThanOrEqual":
-            return f"{escaped_field} <= {filter_value}"
-        elif condition_type == "inRange":
-            filter_to = filter_config.get("filterTo", filter_value)
-            return f"{escaped_field} BETWEEN {filter_value} AND {filter_to}"
-        elif condition_type == "notBlank":
-            return f"{escaped_field} IS NOT NULL AND {escaped_field} != 0"
-        elif condition_type == "blank":
-            return f"{escaped_field} IS NULL OR {escaped_field} = 0"
-
-        return None
-
-    def _build_set_filter(
-        self, field_name: str, filter_config: Dict[str, Any]
-    ) -> Optional[str]:
-        """Build WHERE clause for set filters"""
-        values = filter_config.get("values", [])
-        if not values:
-            return None
-
-        escaped_field = self.escape_column(field_name)
-        escaped_values = "', '".join(str(v).replace("'", "''") for v in values)
-        return f"{escaped_field} IN ('{escaped_values}')"
+        where_sql, params = predicate.to_sql(self.escape_column, self.placeholder)
+        return f" WHERE {where_sql}", params
 
     def create_group_by_sql(self) -> str:
         """
@@ -238,6 +444,18 @@ class QueryBuilder:
         Returns:
             str: ORDER BY SQL clause
         """
+        if self.is_pivoting() and not self.ag_rows.options.is_doing_grouping():
+            # A pivot without row groups is a single aggregated row
+            return ""
+
+        if self.uses_keyset():
+            # Keyset pages need a total order, so the tiebreaker is always appended
+            sort_parts = [
+                f"{self.escape_column(column)} {direction}"
+                for column, direction in self.get_keyset_sort()
+            ]
+            return f" ORDER BY {', '.join(sort_parts)}"
+
         if not self.ag_rows.options.sortModel:
             return ""
 
@@ -271,6 +489,9 @@ class QueryBuilder:
             )
             allowed_sort_cols.update(value_col_ids)
 
+            # Add pivot result columns
+            allowed_sort_cols.update(self.get_pivot_result_fields())
+
             # Apply sort only for allowed columns
             for item in self.ag_rows.options.sortModel:
                 col_id = item.get("colId", "")
@@ -289,58 +510,92 @@ class QueryBuilder:
             return f" ORDER BY {', '.join(sort_parts)}"
         return ""
 
-    def create_limit_sql(self) -> str:
+    def create_limit_sql(self) -> Tuple[str, List[Any]]:
         """
         Create LIMIT clause for pagination.
 
         Returns:
-            str: LIMIT SQL clause with OFFSET
+            Tuple[str, List[Any]]: LIMIT SQL clause (with OFFSET unless a keyset
+            seek is used) and its bound parameters
         """
         if self.ag_rows.options.startRow == 0 and self.ag_rows.options.endRow == 0:
-            return ""
+            return "", []
 
         final_limit = self.ag_rows.options.page_size()
-        return f" LIMIT {final_limit} OFFSET {self.ag_rows.options.startRow}"
-
-    def build_query(self) -> str:
+        if self.create_seek_sql()[0]:
+            return f" LIMIT {self.placeholder}", [final_limit]
+        if self.fanout:
+            # Any shard may hold every row up to the end of the block
+            return f" LIMIT {self.placeholder}", [self.ag_rows.options.startRow + final_limit]
+        return (
+            f" LIMIT {self.placeholder} OFFSET {self.placeholder}",
+            [final_limit, self.ag_rows.options.startRow],
+        )
+
+    def build_query(self) -> Tuple[str, List[Any]]:
         """
         Build complete SQL query combining all clauses.
 
         Returns:
-            str: Complete SQL query
+            Tuple[str, List[Any]]: Complete SQL query with placeholders and the
+            parameters to bind, in order
         """
         try:
+            where_sql, params = self.create_where_sql()
+            seek_sql, seek_params = self.create_seek_sql()
+            if seek_sql:
+                # Seek only narrows the page; the count query keeps the plain WHERE
+                where_sql = (
+                    f"{where_sql} AND {seek_sql}" if where_sql else f" WHERE {seek_sql}"
+                )
+                params = params + seek_params
+
+            if self.is_pivoting():
+                select_sql, select_params = self.create_pivot_select_sql()
+                params = select_params + params
+            else:
+                select_sql = self.create_select_sql()
+
+            limit_sql, limit_params = self.create_limit_sql()
             query = (
-                f"{self.create_select_sql()}"
-                f"{self.create_where_sql()}"
+                f"{select_sql}"
+                f"{where_sql}"
                 f"{self.create_group_by_sql()}"
                 f"{self.create_order_by_sql()}"
-                f"{self.create_limit_sql()}"
+                f"{limit_sql}"
             )
 
-            return query.strip()
+            return query.strip(), params + limit_params
         except Exception as e:
             import traceback
 
             traceback.print_exc()
             raise e
 
-    def build_count_query(self) -> str:
+    def build_count_query(self) -> Tuple[str, List[Any]]:
         """
         Build COUNT query for total row calculation.
 
         Returns:
-            str: COUNT SQL query
+            Tuple[str, List[Any]]: COUNT SQL query with placeholders and its parameters
         """
         try:
+            where_sql, params = self.create_where_sql()
+            if self.is_pivoting() and not self.ag_rows.options.is_doing_grouping():
+                # Pivot without row groups aggregates everything into a single row
+                return "SELECT 1", []
+
             if self.ag_rows.options.is_doing_grouping():
                 # For grouped queries, count distinct groups
                 group_col = self.ag_rows.options.get_row_group_column()
                 if group_col:
                     group_col_id = group_col.get("id", group_col.get("field", ""))
-                    return f"SELECT COUNT(DISTINCT {self.escape_column(group_col_id)}) FROM {self.table_name}{self.create_where_sql()}"
+                    return (
+                        f"SELECT COUNT(DISTINCT {self.escape_column(group_col_id)}) FROM {self.get_source_table()}{where_sql}",
+                        params,
+                    )
 
             # Regular count query
-            return f"SELECT COUNT(*) FROM {self.table_name}{self.create_where_sql()}"
+            return f"SELECT COUNT(*) FROM {self.table_name}{where_sql}", params
         except Exception as e:
             raise e
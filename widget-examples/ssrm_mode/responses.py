@@ -0,0 +1,82 @@
+"""
+Response classes for SSRM AgGrid application.
+Provides a JSON response rendered with orjson when installed, and a streaming
+response that writes ``rowData`` chunk by chunk as rows are read from the cursor.
+"""
+
+import json
+from json.encoder import encode_basestring
+from typing import Any, Iterator
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from formatters import json_default
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    Serialize content to compact UTF-8 JSON.
+
+    Uses orjson when installed (NaN/Inf become null, NumPy arrays are
+    supported); otherwise falls back to the standard json module.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with :func:`dumps_json`"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class StreamingSSRMResponse(StreamingResponse):
+    """
+    SSRM response whose ``rowData`` array is written as it is produced.
+
+    The other response fields are written first, so only one chunk of rows is
+    held in memory at a time regardless of the block size.
+    """
+
+    def __init__(self, row_chunks: Iterator[str], **fields: Any):
+        """
+        Initialize streaming response.
+
+        Args:
+            row_chunks: Comma-separated JSON row objects, one string per chunk
+            **fields: Other response fields (rowCount, ...)
+        """
+        super().__init__(
+            self._render(row_chunks, fields), media_type="application/json"
+        )
+
+    @staticmethod
+    def _render(row_chunks: Iterator[str], fields: dict) -> Iterator[str]:
+        head = "".join(
+            f"{encode_basestring(name)}:{dumps_json(value).decode('utf-8')},"
+            for name, value in fields.items()
+        )
+        yield "{" + head + '"rowData":['
+
+        first = True
+        for chunk in row_chunks:
+            if not chunk:
+                continue
+            yield chunk if first else "," + chunk
+            first = False
+        yield "]}"
@@ -0,0 +1,233 @@
+"""
+Replica and shard routing for SSRM AgGrid application.
+
+Read queries can be spread over read replicas with health-based failover, and
+tables split horizontally across shards are queried by fanning out to every
+shard and merge-sorting the per-shard pages on the sort keys.
+"""
+
+import heapq
+import itertools
+import logging
+import numbers
+import threading
+import time
+import zlib
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from config import nulls_sort_first
+from filters import And, InValues, Predicate
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Fill value of exhausted shards when interleaving unsorted pages
+_MISSING = object()
+
+
+def shard_for_value(value: Any, shard_count: int) -> int:
+    """
+    Shard owning the rows whose shard key equals ``value``.
+
+    Rows must be distributed with the same function for shard pruning to be
+    correct: ``crc32(str(value)) % shard_count``.
+    """
+    return zlib.crc32(str(value).encode("utf-8")) % shard_count
+
+
+def prune_shards(
+    predicate: Predicate, shard_key: Optional[str], shard_count: int
+) -> Optional[List[int]]:
+    """
+    Shards that can hold rows matching a filter predicate.
+
+    Only a top-level IN/equality condition on the shard key prunes shards.
+
+    Returns:
+        Optional[List[int]]: Shard indexes, or None if every shard must be queried
+    """
+    if not shard_key:
+        return None
+    conditions = predicate.children if isinstance(predicate, And) else (predicate,)
+    for condition in conditions:
+        if isinstance(condition, InValues) and condition.field == shard_key:
+            return sorted({shard_for_value(value, shard_count) for value in condition.values})
+    return None
+
+
+def _type_rank(value: Any) -> int:
+    """Order of incomparable value types: numbers, then text, then bytes, as SQLite sorts them"""
+    if isinstance(value, numbers.Number):
+        return 0
+    if isinstance(value, str):
+        return 1
+    if isinstance(value, (bytes, bytearray)):
+        return 2
+    return 3
+
+
+class SortKey:
+    """
+    Sort key comparing rows like ORDER BY: per-column directions, NULLs placed
+    per column, and values of mixed types ordered by type instead of raising.
+    """
+
+    __slots__ = ("values", "descending", "nulls_first")
+
+    def __init__(
+        self,
+        values: Tuple[Any, ...],
+        descending: Tuple[bool, ...],
+        nulls_first: Tuple[bool, ...],
+    ):
+        self.values = values
+        self.descending = descending
+        self.nulls_first = nulls_first
+
+    def __lt__(self, other: "SortKey") -> bool:
+        for mine, theirs, descending, nulls_first in zip(
+            self.values, other.values, self.descending, self.nulls_first
+        ):
+            if mine == theirs:
+                continue
+            if mine is None or theirs is None:
+                return (mine is None) == nulls_first
+            try:
+                less = mine < theirs
+            except TypeError:
+                if _type_rank(mine) == _type_rank(theirs):
+                    continue
+                less = _type_rank(mine) < _type_rank(theirs)
+            return not less if descending else less
+        return False
+
+
+def merge_sorted_pages(
+    pages: Sequence[List[Any]],
+    sort_keys: Sequence[Tuple[str, bool]],
+    skip: int = 0,
+    limit: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None,
+    null_order: str = "low",
+) -> List[Any]:
+    """
+    Merge per-shard pages, each sorted on ``sort_keys``, into one global page.
+
+    Without sort keys the pages are interleaved round-robin, which is still a
+    deterministic order that only depends on each shard's leading rows.
+
+    Args:
+        pages: Rows of every shard (dicts, or tuples when ``columns`` is given)
+        sort_keys: (column, descending) pairs the pages are sorted by
+        skip: Leading rows of the merged order to drop
+        limit: Rows to keep after ``skip`` (None keeps all)
+        columns: Column names of tuple rows
+        null_order: Where the shards' database sorts NULLs (see
+            ``DatabaseConfig.null_order``)
+    """
+    if sort_keys:
+        if columns is not None:
+            indexes = [list(columns).index(column) for column, _ in sort_keys]
+            extract = lambda row: tuple(row[index] for index in indexes)
+        else:
+            names = [column for column, _ in sort_keys]
+            extract = lambda row: tuple(row.get(name) for name in names)
+        descending = tuple(desc for _, desc in sort_keys)
+        nulls_first = tuple(nulls_sort_first(null_order, desc) for desc in descending)
+        merged: Iterable[Any] = heapq.merge(
+            *pages, key=lambda row: SortKey(extract(row), descending, nulls_first)
+        )
+    else:
+        merged = (
+            row
+            for group in itertools.zip_longest(*pages, fillvalue=_MISSING)
+            for row in group
+            if row is not _MISSING
+        )
+    stop = skip + limit if limit is not None else None
+    return list(itertools.islice(merged, skip, stop))
+
+
+class ReplicaSet:
+    """
+    Round-robin routing of reads over replicas, failing over on unhealthy ones.
+
+    A replica whose query fails is probed with ``SELECT 1``. If the probe fails
+    too, the replica is taken out of rotation for ``retry_after`` seconds and
+    the query is retried on the next replica, then on the primary. Errors of
+    the query itself (the probe succeeds) are raised unchanged.
+    """
+
+    def __init__(self, primary: Any, replicas: Sequence[Any], retry_after: float = 30.0):
+        """
+        Initialize replica set.
+
+        Args:
+            primary: Connection used for writes, and for reads when no replica is healthy
+            replicas: Read replica connections
+            retry_after: Seconds an unhealthy replica stays out of rotation
+        """
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.retry_after = retry_after
+        self._down_until = [0.0] * len(self.replicas)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.reads = [0] * len(self.replicas)
+        self.primary_reads = 0
+        self.failovers = 0
+
+    def _candidates(self) -> List[int]:
+        """Healthy replicas, starting with the next one in round-robin order"""
+        if not self.replicas:
+            return []
+        now = time.monotonic()
+        start = next(self._next) % len(self.replicas)
+        indexes = [(start + offset) % len(self.replicas) for offset in range(len(self.replicas))]
+        return [index for index in indexes if self._down_until[index] <= now]
+
+    @staticmethod
+    def _probe(connection: Any) -> bool:
+        try:
+            connection.execute_count_query("SELECT 1", [])
+            return True
+        except Exception:
+            return False
+
+    def run(self, operation: Callable[[Any], T]) -> T:
+        """Run a read operation (connection -> result) on a healthy replica"""
+        for index in self._candidates():
+            replica = self.replicas[index]
+            try:
+                result = operation(replica)
+            except Exception as e:
+                if self._probe(replica):
+                    raise
+                with self._lock:
+                    self._down_until[index] = time.monotonic() + self.retry_after
+                    self.failovers += 1
+                logger.warning("Read replica %d unhealthy, failing over: %s", index, e)
+                continue
+            with self._lock:
+                self.reads[index] += 1
+            return result
+
+        with self._lock:
+            self.primary_reads += 1
+        return operation(self.primary)
+
+    def stats(self) -> dict:
+        """Get per-replica read counters and health"""
+        now = time.monotonic()
+        return {
+            "primary_reads": self.primary_reads,
+            "failovers": self.failovers,
+            "replicas": [
+                {
+                    "reads": self.reads[index],
+                    "healthy": self._down_until[index] <= now,
+                }
+                for index in range(len(self.replicas))
+            ],
+        }
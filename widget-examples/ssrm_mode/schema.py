@@ -0,0 +1,323 @@
+"""
+Schema introspection cache for SSRM AgGrid application.
+
+Column names and types, indexes and cardinality statistics of the configured
+table are loaded once at startup and kept in memory, so requests can validate
+column ids and pick filter types without metadata round-trips. A JSON snapshot
+on disk lets the other workers of the server start from the same schema, and a
+background task reloads it on a schedule or when the table's DDL changes.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from database import DatabaseManager
+from models import AgGridOptions
+
+logger = logging.getLogger(__name__)
+
+# Substrings of column types mapped to AG Grid filter types (checked in order)
+_FILTER_TYPE_PATTERNS = (
+    ("date", ("date", "time")),
+    ("number", ("int", "real", "float", "double", "decimal", "numeric", "number")),
+)
+
+
+class TableSchema:
+    """Columns, indexes and statistics of one table at one point in time"""
+
+    def __init__(
+        self,
+        table_name: str,
+        columns: List[Dict[str, str]],
+        indexes: List[List[str]],
+        statistics: Dict[str, Any],
+        loaded_at: Optional[float] = None,
+    ):
+        self.table_name = table_name
+        self.columns = columns
+        self.indexes = indexes
+        self.statistics = statistics
+        self.loaded_at = loaded_at if loaded_at is not None else time.time()
+        self._types = {column["column_name"]: column["column_type"] for column in columns}
+
+    @staticmethod
+    def fingerprint_of(columns: List[Dict[str, str]], indexes: List[List[str]]) -> str:
+        """Hash of the table's DDL-visible shape, used to detect schema changes"""
+        shape = json.dumps([columns, sorted(indexes)], sort_keys=True, default=str)
+        return hashlib.sha1(shape.encode("utf-8")).hexdigest()
+
+    @property
+    def fingerprint(self) -> str:
+        return self.fingerprint_of(self.columns, self.indexes)
+
+    def has_column(self, column: str) -> bool:
+        """Check if the table has a column"""
+        return column in self._types
+
+    def column_type(self, column: str) -> Optional[str]:
+        """Database type of a column, or None if unknown"""
+        return self._types.get(column)
+
+    def filter_type(self, column: str) -> str:
+        """AG Grid filter type matching a column's database type"""
+        column_type = (self._types.get(column) or "").lower()
+        for filter_type, patterns in _FILTER_TYPE_PATTERNS:
+            if any(pattern in column_type for pattern in patterns):
+                return filter_type
+        return "text"
+
+    def unknown_columns(self, options: AgGridOptions) -> List[str]:
+        """
+        Column ids of a request that the table does not have.
+
+        Sorts are only checked for flat requests, since grouped and pivot
+        requests may sort on group and pivot result columns.
+        """
+        referenced = list((options.filterModel or {}).keys())
+        columns = (options.rowGroupCols or []) + (options.valueCols or [])
+        for column in columns + (options.pivotCols or []):
+            referenced.append(column.get("field", column.get("id", "")))
+        if not options.is_doing_grouping() and not (options.pivotMode and options.pivotCols):
+            referenced.extend(item.get("colId", "") for item in options.sortModel or [])
+
+        unknown = []
+        for column in referenced:
+            if not self.has_column(column) and column not in unknown:
+                unknown.append(column)
+        return unknown
+
+    def with_filter_types(self, filter_model: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a filter model with missing ``filterType``s taken from column types"""
+        return {
+            column: (
+                config
+                if not isinstance(config, dict) or "filterType" in config
+                else {**config, "filterType": self.filter_type(column)}
+            )
+            for column, config in filter_model.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "table_name": self.table_name,
+            "columns": self.columns,
+            "indexes": self.indexes,
+            "statistics": self.statistics,
+            "loaded_at": self.loaded_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TableSchema":
+        return cls(
+            data["table_name"],
+            data["columns"],
+            data["indexes"],
+            data["statistics"],
+            loaded_at=data["loaded_at"],
+        )
+
+
+class SchemaCache:
+    """
+    Schema of the configured table, shared through memory and a disk snapshot.
+
+    ``get`` never queries the database once the schema is loaded. The
+    background task started by ``start`` checks the DDL fingerprint every
+    ``ddl_check_interval`` seconds (two metadata queries, no table scan) and
+    reloads everything, statistics included, when it changed or when the
+    schema is older than ``refresh_interval`` seconds. A snapshot written by
+    another worker within ``refresh_interval`` is adopted instead of reloading.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[Path] = None,
+        refresh_interval: Optional[float] = 600.0,
+        ddl_check_interval: Optional[float] = 30.0,
+    ):
+        """
+        Initialize schema cache.
+
+        Args:
+            snapshot_path: JSON file shared by the workers; None keeps the schema in memory only
+            refresh_interval: Seconds before columns and statistics are reloaded; None never
+            ddl_check_interval: Seconds between checks for schema changes; None never
+        """
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.refresh_interval = refresh_interval
+        self.ddl_check_interval = ddl_check_interval
+        self._schemas: Dict[str, TableSchema] = {}
+        self._lock = threading.Lock()
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.loads = 0
+        self.snapshot_loads = 0
+        self.ddl_changes = 0
+
+    @staticmethod
+    def _key(db_manager: DatabaseManager) -> str:
+        """Snapshot key of a table, without connection details such as passwords"""
+        config = db_manager.config
+        database = repr((config.database_type, config.connection_string))
+        digest = hashlib.sha1(database.encode("utf-8")).hexdigest()[:16]
+        return f"{digest}:{db_manager.table_name}"
+
+    def _is_fresh(self, schema: TableSchema) -> bool:
+        if self.refresh_interval is None:
+            return True
+        return time.time() - schema.loaded_at < self.refresh_interval
+
+    def get(self, db_manager: DatabaseManager) -> TableSchema:
+        """Get the table's schema, loading it from the snapshot or database on first use"""
+        schema = self._schemas.get(self._key(db_manager))
+        if schema is not None:
+            return schema
+        schema = self._read_snapshot(db_manager)
+        if schema is not None and self._is_fresh(schema):
+            with self._lock:
+                self._schemas[self._key(db_manager)] = schema
+            self.snapshot_loads += 1
+            return schema
+        return self.load(db_manager)
+
+    def load(self, db_manager: DatabaseManager) -> TableSchema:
+        """Reload the table's schema from the database and update the snapshot"""
+        started = time.perf_counter()
+        schema = TableSchema(
+            db_manager.table_name,
+            db_manager.get_table_columns(),
+            db_manager.get_table_indexes(),
+            db_manager.get_table_statistics(),
+        )
+        with self._lock:
+            self._schemas[self._key(db_manager)] = schema
+        self.loads += 1
+        self._write_snapshot(db_manager, schema)
+        logger.info(
+            "Loaded schema of %s (%d columns) in %.0f ms",
+            db_manager.table_name,
+            len(schema.columns),
+            (time.perf_counter() - started) * 1000,
+        )
+        return schema
+
+    def check(self, db_manager: DatabaseManager) -> bool:
+        """
+        Reload the schema if its DDL changed or it is due for a refresh.
+
+        Returns:
+            bool: Whether the schema was reloaded (or adopted from a newer snapshot)
+        """
+        schema = self._schemas.get(self._key(db_manager))
+        if schema is None:
+            self.get(db_manager)
+            return True
+
+        fingerprint = TableSchema.fingerprint_of(
+            db_manager.get_table_columns(), db_manager.get_table_indexes()
+        )
+        if fingerprint != schema.fingerprint:
+            self.ddl_changes += 1
+            logger.info("Schema of %s changed, reloading", db_manager.table_name)
+            self.load(db_manager)
+            return True
+
+        if self._is_fresh(schema):
+            return False
+        snapshot = self._read_snapshot(db_manager)
+        if (
+            snapshot is not None
+            and self._is_fresh(snapshot)
+            and snapshot.fingerprint == fingerprint
+        ):
+            # Another worker refreshed it already
+            with self._lock:
+                self._schemas[self._key(db_manager)] = snapshot
+            self.snapshot_loads += 1
+            return True
+        self.load(db_manager)
+        return True
+
+    def _read_snapshot(self, db_manager: DatabaseManager) -> Optional[TableSchema]:
+        if self.snapshot_path is None:
+            return None
+        try:
+            data = json.loads(self.snapshot_path.read_text())
+            entry = data.get(self._key(db_manager))
+            return TableSchema.from_dict(entry) if entry else None
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable schema snapshot %s: %s", self.snapshot_path, e)
+            return None
+
+    def _write_snapshot(self, db_manager: DatabaseManager, schema: TableSchema) -> None:
+        if self.snapshot_path is None:
+            return
+        try:
+            try:
+                data = json.loads(self.snapshot_path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            data[self._key(db_manager)] = schema.to_dict()
+            # Written aside and renamed, so other workers never read a partial file
+            partial_path = self.snapshot_path.with_name(
+                f"{self.snapshot_path.name}.{os.getpid()}.tmp"
+            )
+            partial_path.write_text(json.dumps(data, default=str))
+            os.replace(partial_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning("Could not write schema snapshot %s: %s", self.snapshot_path, e)
+
+    def start(self, db_manager: DatabaseManager) -> None:
+        """Start the background task checking for schema changes and refreshes"""
+        if self.ddl_check_interval is None or self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._watch(db_manager))
+
+    async def _watch(self, db_manager: DatabaseManager) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.ddl_check_interval)
+            try:
+                await loop.run_in_executor(db_manager.executor, self.check, db_manager)
+            except Exception as e:
+                logger.warning("Schema check of %s failed: %s", db_manager.table_name, e)
+
+    def stop(self) -> None:
+        """Stop the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def invalidate(self, db_manager: Optional[DatabaseManager] = None) -> int:
+        """Drop cached schemas (the snapshot is replaced on the next load)"""
+        with self._lock:
+            if db_manager is None:
+                dropped = len(self._schemas)
+                self._schemas.clear()
+                return dropped
+            return 1 if self._schemas.pop(self._key(db_manager), None) else 0
+
+    def stats(self) -> dict:
+        """Get load counters and the age of each cached schema"""
+        now = time.time()
+        return {
+            "loads": self.loads,
+            "snapshot_loads": self.snapshot_loads,
+            "ddl_changes": self.ddl_changes,
+            "tables": {
+                schema.table_name: {
+                    "columns": len(schema.columns),
+                    "age_seconds": round(now - schema.loaded_at, 1),
+                }
+                for schema in self._schemas.values()
+            },
+        }
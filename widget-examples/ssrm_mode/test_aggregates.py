@@ -0,0 +1,134 @@
+"""Tests for materialized aggregates"""
+
+import asyncio
+import shutil
+
+import pytest
+
+from aggregates import AggregateStore
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+
+ROWS = [
+    (1, "Tech", "AAPL", 10.0),
+    (2, "Tech", "MSFT", 25.0),
+    (3, "Tech", "AAPL", 30.0),
+    (4, "Energy", "XOM", 5.0),
+    (5, "Energy", "CVX", None),
+    (6, "Retail", "WMT", 7.0),
+]
+
+GROUP_COLS = [{"id": "sector", "field": "sector"}, {"id": "ticker", "field": "ticker"}]
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"ticker" TEXT', '"price" REAL'], ROWS
+    )
+    return create_database_manager("sqlite", path, "data")
+
+
+@pytest.fixture
+def store(db_manager):
+    store = AggregateStore()
+    store.register("data", ["sector", "ticker"], ["price"])
+    assert store.refresh(db_manager) == 1
+    return store
+
+
+def _query(db_manager, options, aggregate_store=None):
+    return asyncio.run(
+        perform_ssrm_query(
+            db_manager, AgRows(query="", options=options), aggregate_store=aggregate_store
+        )
+    )
+
+
+@pytest.mark.parametrize("group_keys", [[], ["Tech"]])
+@pytest.mark.parametrize("agg_func", ["sum", "avg", "min", "max", "count"])
+def test_rollup_matches_base_table(db_manager, store, group_keys, agg_func):
+    options = AgGridOptions(
+        startRow=0,
+        endRow=100,
+        rowGroupCols=GROUP_COLS,
+        groupKeys=group_keys,
+        valueCols=[{"id": "price", "field": "price", "aggFunc": agg_func}],
+        sortModel=[{"colId": "price", "sort": "desc"}],
+    )
+    assert _query(db_manager, options, store) == _query(db_manager, options)
+    assert store.stats()["hits"] == 1
+
+
+def test_filters_on_value_columns_fall_back_to_base_table(db_manager, store):
+    options = AgGridOptions(
+        rowGroupCols=GROUP_COLS[:1],
+        valueCols=[{"id": "price", "field": "price", "aggFunc": "sum"}],
+        filterModel={"price": {"filterType": "number", "type": "greaterThan", "filter": 8}},
+    )
+    assert store.find("data", options) is None
+    assert store.stats()["misses"] == 1
+
+
+def test_incremental_refresh_recomputes_changed_groups(db_manager, store):
+    db_manager.execute_write(
+        [
+            ("INSERT INTO data VALUES (?, ?, ?, ?)", [7, "Energy", "XOM", 15.0]),
+            ("DELETE FROM data WHERE id = ?", [2]),
+        ]
+    )
+    store.refresh(db_manager, [{"sector": "Energy", "ticker": "XOM"}, {"sector": "Tech"}])
+
+    options = AgGridOptions(
+        startRow=0,
+        endRow=100,
+        rowGroupCols=GROUP_COLS[:1],
+        valueCols=[{"id": "price", "field": "price", "aggFunc": "max"}],
+        sortModel=[{"colId": "sector", "sort": "asc"}],
+    )
+    _, rows = _query(db_manager, options, store)
+    assert [(row["sector"], row["price"]) for row in rows] == [
+        ("Energy", 15.0),
+        ("Retail", 7.0),
+        ("Tech", 30.0),
+    ]
+
+
+def test_side_tables_are_read_from_the_primary(sqlite_table, tmp_path):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"ticker" TEXT', '"price" REAL'], ROWS
+    )
+    # The replica was copied before the side table was built on the primary
+    replica_path = tmp_path / "replica.db"
+    shutil.copy(path, replica_path)
+    db_manager = create_database_manager("sqlite", path, "data", replicas=[replica_path])
+    store = AggregateStore()
+    store.register("data", ["sector", "ticker"], ["price"])
+    store.refresh(db_manager)
+
+    options = AgGridOptions(
+        rowGroupCols=GROUP_COLS,
+        valueCols=[{"id": "price", "field": "price", "aggFunc": "sum"}],
+    )
+    assert _query(db_manager, options, store) == _query(db_manager, options)
+    assert store.stats()["hits"] == 1
+
+
+def test_only_one_worker_builds_the_side_tables(db_manager, tmp_path):
+    snapshot_path = tmp_path / "aggregates.json"
+    workers = [AggregateStore(snapshot_path=snapshot_path, build_timeout=1) for _ in range(2)]
+    for worker in workers:
+        worker.register("data", ["sector"], ["price"])
+
+    # The second worker holds the lock: the first waits, then gives up
+    (tmp_path / "aggregates.json.lock").touch()
+    assert workers[0].build_once(db_manager, poll_interval=0.1) == 0
+    assert not workers[0].aggregates()[0].ready
+    (tmp_path / "aggregates.json.lock").unlink()
+
+    assert workers[1].build_once(db_manager) == 1
+    assert workers[0].build_once(db_manager) == 0
+    assert workers[0].aggregates()[0].ready
+    assert [worker.stats()["builds"] for worker in workers] == [0, 1]
+    assert workers[0].stats()["snapshot_loads"] == 1
+    assert not (tmp_path / "aggregates.json.lock").exists()
@@ -0,0 +1,55 @@
+"""Tests for the benchmark harness"""
+
+import json
+import sqlite3
+
+import pytest
+
+from benchmark import (
+    TABLE_NAME,
+    TRACES,
+    find_regressions,
+    generate_table,
+    main,
+    percentile,
+)
+
+
+def test_percentile_interpolates_between_samples():
+    samples = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(samples, 0) == 1.0
+    assert percentile(samples, 50) == 2.5
+    assert percentile(samples, 100) == 4.0
+
+
+def test_regressions_compare_p95_against_the_baseline():
+    baseline = {"a": {"p95_ms": 10.0}, "b": {"p95_ms": 10.0}}
+    results = {"a": {"p95_ms": 11.0}, "b": {"p95_ms": 13.0}, "c": {"p95_ms": 99.0}}
+    regressions = find_regressions(results, baseline, threshold=0.2)
+    assert [name for name, _ in regressions] == ["b"]
+    assert regressions[0][1] == pytest.approx(0.3)
+
+
+@pytest.mark.parametrize("trace", sorted(TRACES))
+def test_trace_filters_match_generated_values(tmp_path, trace):
+    path = generate_table("sqlite", tmp_path / "trades.db", 2000)
+    conn = sqlite3.connect(path)
+    for request in TRACES[trace](2000, 100):
+        for column, config in (request.get("filterModel") or {}).items():
+            for value in config["values"]:
+                assert conn.execute(
+                    f"SELECT 1 FROM {TABLE_NAME} WHERE {column} = ? LIMIT 1", [value]
+                ).fetchone(), (column, value)
+        for column, key in zip(request.get("rowGroupCols") or [], request.get("groupKeys") or []):
+            assert conn.execute(
+                f"SELECT 1 FROM {TABLE_NAME} WHERE {column['field']} = ? LIMIT 1", [key]
+            ).fetchone(), (column["field"], key)
+
+
+def test_baseline_run_reports_no_regression_against_itself(tmp_path):
+    results_path = tmp_path / "results.json"
+    argv = ["--rows", "2000", "--repeat", "1", "--data-dir", str(tmp_path), "--trace", "deep_scroll"]
+    assert main(argv + ["--json", str(results_path)]) == 0
+    results = json.loads(results_path.read_text())
+    assert results and all(summary["count"] > 0 for summary in results.values())
+    assert main(argv + ["--baseline", str(results_path), "--threshold", "1000"]) == 0
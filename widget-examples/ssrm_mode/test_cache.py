@@ -0,0 +1,143 @@
+"""Tests for the row count and result block caches"""
+
+import asyncio
+
+import pytest
+
+from cache import BlockCache, CountCache
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from pivot import PivotEngine
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"v" REAL'], [(i, i * 1.5) for i in range(10)])
+    return create_database_manager("sqlite", path, "data")
+
+
+def _options(start=0, end=5, **kwargs):
+    return AgGridOptions(startRow=start, endRow=end, **kwargs)
+
+
+def test_blocks_of_one_view_share_the_count():
+    cache = CountCache()
+    cache.set("data", _options(filterModel={"v": {"filterType": "number", "filter": 1}}), 3)
+    other_block = _options(
+        5, 10, sortModel=[{"colId": "v", "sort": "desc"}],
+        filterModel={"v": {"filterType": "number", "filter": 1}},
+    )
+    assert cache.get("data", other_block) == 3
+    assert cache.get("data", _options()) is None
+    assert cache.invalidate("data") == 1
+
+
+def test_set_filter_value_order_does_not_change_the_count_key():
+    cache = CountCache()
+    cache.set("data", _options(filterModel={"id": {"filterType": "set", "values": ["1", "2"]}}), 2)
+    reordered = _options(filterModel={"id": {"filterType": "set", "values": ["2", "1"]}})
+    assert cache.get("data", reordered) == 2
+
+
+def test_cached_count_skips_the_count_query(db_manager):
+    count_cache = CountCache()
+    counts = []
+    execute_count_query = db_manager.execute_count_query
+
+    def counting(query, params=None, shards=None):
+        counts.append(query)
+        return execute_count_query(query, params, shards)
+
+    db_manager.execute_count_query = counting
+    for start in (0, 5):
+        total, _ = asyncio.run(
+            perform_ssrm_query(
+                db_manager,
+                AgRows(query="", options=_options(start, start + 5)),
+                count_cache=count_cache,
+            )
+        )
+        assert total == 10
+    assert len(counts) == 1
+
+
+def test_pivot_count_is_not_served_to_the_flat_view(db_manager):
+    count_cache = CountCache()
+    pivot = _options(
+        pivotMode=True,
+        pivotCols=[{"id": "id", "field": "id"}],
+        valueCols=[{"id": "v", "field": "v", "aggFunc": "sum"}],
+    )
+    total, _ = asyncio.run(
+        perform_ssrm_query(
+            db_manager,
+            AgRows(query="", options=pivot),
+            count_cache=count_cache,
+            pivot_engine=PivotEngine(),
+        )
+    )
+    assert total == 1
+    total, _ = asyncio.run(
+        perform_ssrm_query(db_manager, AgRows(query="", options=_options()), count_cache=count_cache)
+    )
+    assert total == 10
+
+
+def test_count_finishing_after_an_invalidation_is_not_cached(db_manager):
+    count_cache = CountCache()
+    execute_count_query = db_manager.execute_count_query
+
+    def write_during_count(query, params=None, shards=None):
+        total = execute_count_query(query, params, shards)
+        # The write and its invalidation land while the count query runs
+        db_manager.execute_write([("DELETE FROM data WHERE id = ?", [0])])
+        count_cache.invalidate("data")
+        return total
+
+    db_manager.execute_count_query = write_during_count
+    ag_rows = AgRows(query="", options=_options())
+    total, _ = asyncio.run(perform_ssrm_query(db_manager, ag_rows, count_cache=count_cache))
+    assert total == 10
+    assert count_cache.get("data", ag_rows.options) is None
+    assert count_cache.stats()["stale_sets"] == 1
+
+    db_manager.execute_count_query = execute_count_query
+    total, _ = asyncio.run(perform_ssrm_query(db_manager, ag_rows, count_cache=count_cache))
+    assert total == 9 and count_cache.get("data", ag_rows.options) == 9
+
+
+def test_invalidating_all_tables_also_stales_pending_counts():
+    count_cache = CountCache()
+    version = count_cache.table_version("data")
+    count_cache.invalidate()
+    assert not count_cache.set("data", _options(), 10, version=version)
+    assert count_cache.set("data", _options(), 9, version=count_cache.table_version("data"))
+
+
+def test_block_cache_serves_repeated_requests_until_invalidated(db_manager):
+    block_cache = BlockCache()
+    ag_rows = AgRows(query="", options=_options())
+    first = asyncio.run(perform_ssrm_query(db_manager, ag_rows, block_cache=block_cache))
+    second = asyncio.run(perform_ssrm_query(db_manager, ag_rows, block_cache=block_cache))
+    assert first == second and block_cache.hits == 1
+
+    block_cache.invalidate("data")
+    assert block_cache.get("data", ag_rows.options) is None
+
+
+def test_block_cache_evicts_to_its_byte_budget():
+    rows = [{"id": i, "v": "x" * 100} for i in range(10)]
+    block_cache = BlockCache(max_bytes=len(rows) * 400)
+    assert block_cache.set("data", _options(0, 10), 10, rows)
+    assert block_cache.set("data", _options(10, 20), 10, rows)
+    assert block_cache.current_bytes <= block_cache.max_bytes
+    assert block_cache.evictions == 1
+    assert block_cache.get("data", _options(0, 10)) is None
+
+
+def test_block_computed_before_a_write_is_stale():
+    block_cache = BlockCache()
+    version = block_cache.table_version("data")
+    block_cache.invalidate("data")
+    block_cache.set("data", _options(), 1, [{"id": 1}], version=version)
+    assert block_cache.get("data", _options()) is None
@@ -0,0 +1,150 @@
+"""Tests for the change feed"""
+
+import pytest
+
+from changes import ChangeFeed, collapse_operations
+from helpers import create_database_manager
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"price" REAL', '"updated_at" INTEGER'],
+        [(1, "Tech", 10.0, 100), (2, "Energy", 5.0, 100), (3, "Tech", 7.0, 100)],
+    )
+    return create_database_manager("sqlite", path, "data")
+
+
+def _write(db_manager, *statements):
+    db_manager.execute_write([(sql, list(params)) for sql, *params in statements])
+
+
+def test_operations_collapse_to_their_net_effect():
+    entries = [
+        ("insert", 1),
+        ("update", 1),
+        ("update", 2),
+        ("delete", 2),
+        ("insert", 3),
+        ("delete", 3),
+        ("delete", 4),
+        ("insert", 4),
+    ]
+    assert collapse_operations(entries) == {1: "add", 2: "remove", 4: "update"}
+
+
+def test_log_reports_adds_updates_and_removes(db_manager):
+    feed = ChangeFeed()
+    version = feed.get_changes(db_manager)["version"]
+    _write(
+        db_manager,
+        ("INSERT INTO data VALUES (4, 'Retail', 3.0, 200)",),
+        ("UPDATE data SET price = 11.0 WHERE id = 1",),
+        ("DELETE FROM data WHERE id = 2",),
+        ("UPDATE data SET id = 30 WHERE id = 3",),
+    )
+    changes = feed.get_changes(db_manager, since=version)
+    assert [row["id"] for row in changes["add"]] == [4, 30]
+    assert changes["update"] == [{"id": 1, "sector": "Tech", "price": 11.0, "updated_at": 100}]
+    assert changes["remove"] == [{"id": 2}, {"id": 3}]
+    assert not changes["more"] and not changes["reset"]
+    assert feed.get_changes(db_manager, since=changes["version"])["add"] == []
+
+
+def test_rows_leaving_the_filter_are_removed(db_manager):
+    feed = ChangeFeed()
+    version = feed.get_changes(db_manager)["version"]
+    _write(
+        db_manager,
+        ("UPDATE data SET sector = 'Energy' WHERE id = 1",),
+        ("INSERT INTO data VALUES (4, 'Energy', 3.0, 200)",),
+    )
+    tech = {"sector": {"filterType": "set", "values": ["Tech"]}}
+    changes = feed.get_changes(db_manager, since=version, filter_model=tech)
+    assert changes["add"] == [] and changes["update"] == []
+    assert changes["remove"] == [{"id": 1}]
+
+
+def test_string_set_filter_values_match_integer_keys(db_manager):
+    feed = ChangeFeed()
+    version = feed.get_changes(db_manager)["version"]
+    _write(
+        db_manager,
+        ("INSERT INTO data VALUES (11, 'Retail', 3.0, 200)",),
+        ("UPDATE data SET price = 12.0 WHERE id = 1",),
+    )
+    filter_model = {"id": {"filterType": "set", "values": ["11", "1"]}}
+    changes = feed.get_changes(db_manager, since=version, filter_model=filter_model)
+    assert [row["id"] for row in changes["add"]] == [11]
+    assert [row["id"] for row in changes["update"]] == [1]
+    assert changes["remove"] == []
+
+
+def test_clients_behind_the_retained_log_are_reset(db_manager):
+    feed = ChangeFeed(max_changes=2, retention=3)
+    version = feed.get_changes(db_manager)["version"]
+    _write(db_manager, *[(f"UPDATE data SET price = {price} WHERE id = 1",) for price in range(3)])
+    page = feed.get_changes(db_manager, since=version)
+    assert page["more"] and len(page["update"]) == 1
+
+    _write(db_manager, *[(f"UPDATE data SET price = {price} WHERE id = 2",) for price in range(5)])
+    assert feed.get_changes(db_manager, since=version)["reset"]
+    assert feed.stats()["pruned"] == 1
+
+
+def test_watermark_mode_reports_rows_changed_since(db_manager):
+    feed = ChangeFeed(mode="watermark", updated_at_column="updated_at")
+    version = feed.get_changes(db_manager)["version"]
+    _write(db_manager, ("UPDATE data SET price = 8.0, updated_at = 150 WHERE id = 3",))
+    changes = feed.get_changes(db_manager, since=version)
+    assert [row["id"] for row in changes["update"]] == [3] and not changes["reset"]
+    assert feed.get_changes(db_manager, since=changes["version"])["update"] == []
+    assert feed.stats()["modes"] == {"data": "watermark"}
+
+    # Without a way to tell inserts from updates, a grown table is reset
+    _write(db_manager, ("INSERT INTO data VALUES (4, 'Retail', 3.0, 200)",))
+    assert feed.get_changes(db_manager, since=changes["version"])["reset"]
+
+
+def test_watermark_mode_adds_rows_above_the_keyset_watermark(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"price" REAL', '"updated_at" INTEGER'],
+        [(1, "Tech", 10.0, 100), (2, "Energy", 5.0, 100), (3, "Tech", 7.0, 100)],
+    )
+    db_manager = create_database_manager("sqlite", path, "data", keyset_column="id")
+    feed = ChangeFeed(mode="watermark", updated_at_column="updated_at")
+    version = feed.get_changes(db_manager)["version"]
+    _write(
+        db_manager,
+        ("INSERT INTO data VALUES (4, 'Tech', 3.0, 200)",),
+        ("INSERT INTO data VALUES (5, 'Energy', 3.0, 200)",),
+        ("UPDATE data SET sector = 'Energy', updated_at = 200 WHERE id = 1",),
+        ("UPDATE data SET price = 8.0, updated_at = 200 WHERE id = 3",),
+    )
+    tech = {"sector": {"filterType": "set", "values": ["Tech"]}}
+    changes = feed.get_changes(db_manager, since=version, filter_model=tech)
+    assert [row["id"] for row in changes["add"]] == [4]
+    assert [row["id"] for row in changes["update"]] == [3]
+    assert changes["remove"] == [{"id": 1}] and not changes["reset"]
+    assert "__ssrm_added" not in changes["update"][0]
+
+
+def test_watermark_mode_adds_rows_created_since(sqlite_table):
+    path = sqlite_table(
+        ['"id" TEXT PRIMARY KEY', '"created_at" INTEGER', '"updated_at" INTEGER'],
+        [("a", 100, 100), ("b", 100, 100)],
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    feed = ChangeFeed(
+        mode="watermark", updated_at_column="updated_at", created_at_column="created_at"
+    )
+    version = feed.get_changes(db_manager)["version"]
+    _write(
+        db_manager,
+        ("INSERT INTO data VALUES ('c', 200, 200)",),
+        ("UPDATE data SET updated_at = 200 WHERE id = 'a'",),
+    )
+    changes = feed.get_changes(db_manager, since=version)
+    assert [row["id"] for row in changes["add"]] == ["c"]
+    assert [row["id"] for row in changes["update"]] == ["a"]
+    assert feed.get_changes(db_manager, since="100")["reset"]
@@ -0,0 +1,92 @@
+"""Tests for request coalescing"""
+
+import asyncio
+
+import pytest
+
+from coalesce import RequestCoalescer
+from models import AgGridOptions
+
+
+def _options(start_row=0):
+    return AgGridOptions(startRow=start_row, endRow=start_row + 100)
+
+
+def test_identical_concurrent_requests_share_one_execution():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def run():
+        return await asyncio.gather(
+            coalescer.run("data", _options(), compute),
+            coalescer.run("data", _options(), compute),
+            coalescer.run("data", _options(100), compute),
+        )
+
+    results = asyncio.run(run())
+    assert results[0] == (2, False) and results[1] == (2, True)
+    assert results[2][1] is False
+    assert coalescer.stats() == {"executions": 2, "coalesced": 1, "failed": 0, "inflight": 0}
+
+
+def test_failure_is_shared_by_joined_requests():
+    coalescer = RequestCoalescer()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            coalescer.run("data", _options(), compute),
+            coalescer.run("data", _options(), compute),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert coalescer.stats()["failed"] == 1
+
+
+def test_cancelled_request_does_not_cancel_the_shared_execution():
+    coalescer = RequestCoalescer()
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "rows"
+
+    async def run():
+        first = asyncio.ensure_future(coalescer.run("data", _options(), compute))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(coalescer.run("data", _options(), compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == ("rows", True)
+
+
+def test_requests_after_a_write_run_again():
+    coalescer = RequestCoalescer()
+    versions = iter(["before", "after"])
+
+    async def compute():
+        version = next(versions)
+        await asyncio.sleep(0.01)
+        return version
+
+    async def run():
+        stale = asyncio.ensure_future(coalescer.run("data", _options(), compute))
+        await asyncio.sleep(0)
+        assert coalescer.invalidate("data") == 1
+        fresh = await coalescer.run("data", _options(), compute)
+        return await stale, fresh
+
+    assert asyncio.run(run()) == (("before", False), ("after", False))
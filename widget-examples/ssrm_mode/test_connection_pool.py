@@ -0,0 +1,113 @@
+"""Tests for connection pooling"""
+
+import threading
+
+import pytest
+
+from connection_pool import ConnectionPool, PoolTimeoutError, ThreadLocalConnectionPool
+
+
+class _Connection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _pool(**kwargs):
+    opened = []
+
+    def connect():
+        opened.append(_Connection())
+        return opened[-1]
+
+    pool = ConnectionPool(connect, lambda conn: not conn.closed, **kwargs)
+    return pool, opened
+
+
+def test_abandoned_streams_free_their_connections():
+    pool, opened = _pool(max_size=2, acquire_timeout=0.1)
+
+    def stream():
+        with pool.connection():
+            for chunk in range(3):
+                yield chunk
+
+    for _ in range(2):
+        rows = stream()
+        next(rows)
+        rows.close()
+
+    with pool.connection():
+        pass
+    # Connections left mid-stream may hold unread results, so they are not reused
+    assert opened[0].closed and opened[1].closed
+    assert pool.size == 1
+
+
+def test_pool_timeout_when_every_connection_is_in_use():
+    pool, _ = _pool(max_size=1, acquire_timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+
+
+def test_connections_are_reused_and_capped():
+    pool, opened = _pool(max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+    with pool.connection(), pool.connection():
+        assert pool.size == 2
+    assert len(opened) == 2
+
+
+def test_connections_that_raised_are_discarded():
+    pool, opened = _pool()
+    with pytest.raises(RuntimeError):
+        with pool.connection():
+            raise RuntimeError("broken socket")
+    assert opened[0].closed and pool.size == 0
+    with pool.connection() as conn:
+        assert conn is opened[1]
+
+
+def test_stale_connections_are_replaced_after_a_health_check():
+    pool, opened = _pool(health_check_interval=0)
+    with pool.connection():
+        pass
+    opened[0].closed = True
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    assert pool.size == 1
+
+
+def test_surplus_idle_connections_are_evicted():
+    pool, opened = _pool(min_size=1, max_size=3, idle_timeout=0)
+    pool.warm()
+    with pool.connection(), pool.connection():
+        pass
+    assert pool.size == 2
+    with pool.connection():
+        # The oldest surplus connection was closed; min_size are kept
+        assert pool.size == 1
+    assert sum(conn.closed for conn in opened) == 1
+
+
+def test_thread_local_pool_hands_each_thread_its_own_connection():
+    pool = ThreadLocalConnectionPool(_Connection, lambda conn: not conn.closed)
+    seen = []
+
+    def use():
+        with pool.connection() as conn:
+            seen.append(conn)
+        with pool.connection() as conn:
+            seen.append(conn)
+
+    thread = threading.Thread(target=use)
+    thread.start()
+    thread.join()
+    use()
+    assert seen[0] is seen[1] and seen[2] is seen[3] and seen[0] is not seen[2]
@@ -0,0 +1,66 @@
+"""Tests for the database manager"""
+
+import asyncio
+import threading
+
+import pytest
+
+from config import DatabaseConfig
+from helpers import create_database_manager
+
+
+def test_async_queries_run_on_the_executor(sqlite_table):
+    db_manager = create_database_manager(
+        "sqlite", sqlite_table(['"id" INTEGER'], [(1,), (2,)]), "data"
+    )
+    threads = []
+    execute_query = db_manager.execute_query
+
+    def recording(query, params=None):
+        threads.append(threading.current_thread().name)
+        return execute_query(query, params)
+
+    db_manager.execute_query = recording
+
+    async def run():
+        return await asyncio.gather(
+            db_manager.execute_query_async("SELECT * FROM data WHERE id = ?", [1]),
+            db_manager.execute_count_query_async("SELECT COUNT(*) FROM data"),
+        )
+
+    rows, count = asyncio.run(run())
+    assert rows == [{"id": 1}] and count == 2
+    assert threads and all(name.startswith("ssrm-db") for name in threads)
+
+
+def test_duckdb_and_snowflake_configs_carry_their_dialect():
+    duckdb_config = DatabaseConfig.for_duckdb(table_name="trades", parquet_path="trades.parquet")
+    assert duckdb_config.connection_string == {
+        "database": ":memory:",
+        "read_only": False,
+        "parquet": {"trades": "trades.parquet"},
+    }
+    assert (duckdb_config.placeholder, duckdb_config.rollup_syntax) == ("?", "rollup")
+    assert duckdb_config.null_order == "last"
+
+    snowflake_config = DatabaseConfig.for_snowflake({"account": "acme"}, "trades", schema="public")
+    assert snowflake_config.table_name == "public.trades"
+    assert (snowflake_config.placeholder, snowflake_config.rollup_syntax) == ("%s", "rollup")
+    assert snowflake_config.null_order == "high"
+
+
+def test_duckdb_scans_parquet_in_place(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    parquet_path = tmp_path / "trades.parquet"
+    duckdb.execute(
+        f"COPY (SELECT range AS id, range % 3 AS bucket FROM range(10)) "
+        f"TO '{parquet_path}' (FORMAT parquet)"
+    )
+    db_manager = create_database_manager("duckdb", table_name="trades", parquet_path=parquet_path)
+    try:
+        rows = db_manager.execute_query(
+            "SELECT bucket, COUNT(*) AS n FROM trades GROUP BY bucket ORDER BY bucket"
+        )
+        assert rows == [{"bucket": 0, "n": 4}, {"bucket": 1, "n": 3}, {"bucket": 2, "n": 3}]
+    finally:
+        db_manager.close()
@@ -0,0 +1,92 @@
+"""Tests for estimated row counts"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from cache import CountCache
+from estimates import CountEstimator, EstimatedCount, HyperLogLog
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"region" TEXT', '"price" REAL'],
+        [(i, f"s{i % 10}", f"r{i % 40}", float(i)) for i in range(1000)],
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    db_manager.execute_write([('CREATE INDEX ix_sector ON data ("sector")', []), ("ANALYZE", [])])
+    return db_manager
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "background task did not finish"
+        time.sleep(0.01)
+
+
+def test_hyperloglog_is_within_a_few_percent():
+    sketch = HyperLogLog()
+    sketch.update(range(50_000))
+    sketch.update(range(25_000))
+    assert abs(sketch.count() - 50_000) < 50_000 * 0.03
+
+
+def test_equality_filters_scale_the_row_count(db_manager):
+    estimator = CountEstimator(min_rows=100)
+    assert estimator.estimate(db_manager, AgGridOptions()) == 1000
+    options = AgGridOptions(filterModel={"sector": {"filterType": "set", "values": ["s1", "s2"]}})
+    assert estimator.estimate(db_manager, options) == 200
+    range_filter = {"price": {"filterType": "number", "type": "greaterThan", "filter": 5}}
+    assert estimator.estimate(db_manager, AgGridOptions(filterModel=range_filter)) is None
+    assert CountEstimator(min_rows=10_000).estimate(db_manager, AgGridOptions()) is None
+
+
+def test_group_count_comes_from_a_background_sketch(db_manager):
+    estimator = CountEstimator(min_rows=100)
+    threads = []
+    stream_query = db_manager.stream_query
+
+    def recording(query, params=None, chunk_size=5000):
+        threads.append(threading.current_thread().name)
+        return stream_query(query, params, chunk_size)
+
+    db_manager.stream_query = recording
+    options = AgGridOptions(rowGroupCols=[{"id": "region", "field": "region"}])
+    assert estimator.estimate(db_manager, options) is None
+    _wait_for(lambda: estimator.stats()["sketches"] == 1)
+    assert estimator.estimate(db_manager, options) == 40
+    # The table scan ran on the estimator's thread, not a query executor thread
+    assert threads and all(name.startswith("ssrm-estimate") for name in threads)
+
+
+def test_estimated_count_is_refined_in_the_background(db_manager):
+    estimator = CountEstimator(min_rows=100)
+    count_cache = CountCache()
+    ag_rows = AgRows(
+        query="",
+        options=AgGridOptions(
+            startRow=0,
+            endRow=10,
+            filterModel={"sector": {"filterType": "set", "values": ["s1", "s2", "s3"]}},
+        ),
+    )
+
+    def query():
+        return asyncio.run(
+            perform_ssrm_query(
+                db_manager, ag_rows, count_cache=count_cache, count_estimator=estimator
+            )
+        )
+
+    total_count, rows = query()
+    assert isinstance(total_count, EstimatedCount) and total_count == 300
+    assert len(rows) == 10
+    _wait_for(lambda: estimator.stats()["refinements"] == 1)
+    total_count, _ = query()
+    assert type(total_count) is int and total_count == 300
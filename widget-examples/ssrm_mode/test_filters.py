@@ -0,0 +1,118 @@
+"""Tests for filter parsing and predicate simplification"""
+
+import sqlite3
+
+from filters import (
+    FALSE,
+    TRUE,
+    And,
+    InValues,
+    NotInValues,
+    Or,
+    Range,
+    parse_filter,
+    simplify,
+)
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+
+
+def _sql(predicate):
+    return predicate.to_sql(lambda column: f'"{column}"', "?")
+
+
+def test_combined_number_filter_intersects_ranges():
+    predicate = parse_filter(
+        "price",
+        {
+            "filterType": "number",
+            "operator": "AND",
+            "conditions": [
+                {"type": "greaterThan", "filter": 10},
+                {"type": "lessThanOrEqual", "filter": 20},
+                {"type": "greaterThanOrEqual", "filter": 15},
+            ],
+        },
+    )
+    assert simplify(predicate) == Range("price", low=15, high=20)
+
+
+def test_or_of_touching_ranges_is_united():
+    predicate = Or([Range("price", low=0, high=10), Range("price", low=10, high=20)])
+    assert simplify(predicate) == Range("price", low=0, high=20)
+
+
+def test_contradictory_filters_collapse_to_false():
+    assert simplify(And([InValues("sector", ["Tech"]), InValues("sector", ["Energy"])])) == FALSE
+    assert simplify(And([Range("price", low=5), Range("price", high=1)])) == FALSE
+    assert simplify(And([InValues("id", [1]), NotInValues("id", [1])])) == FALSE
+
+
+def test_in_lists_are_intersected_and_filtered_by_bounds():
+    predicate = And(
+        [
+            InValues("id", [1, 2, 3, 4]),
+            InValues("id", [2, 3, 4, 5]),
+            Range("id", high=3),
+            NotInValues("id", [2]),
+        ]
+    )
+    assert simplify(predicate) == InValues("id", [3])
+
+
+def test_int_and_float_values_are_merged():
+    assert simplify(And([InValues("id", [1, 2]), InValues("id", [2.0, 3])])) == InValues(
+        "id", [2]
+    )
+
+
+def test_string_and_int_in_lists_are_not_intersected():
+    # Group keys arrive as strings; the number filter value is an int
+    predicate = simplify(And([InValues("year", ["2021"]), InValues("year", [2021])]))
+    assert predicate != FALSE
+    assert predicate == And([InValues("year", ["2021"]), InValues("year", [2021])])
+
+
+def test_string_and_float_in_lists_are_not_intersected():
+    predicate = simplify(And([InValues("price", ["1.5"]), InValues("price", [1.5])]))
+    assert predicate == And([InValues("price", ["1.5"]), InValues("price", [1.5])])
+
+
+def test_string_set_values_and_int_keys_are_not_intersected():
+    # The change feed narrows a set filter to the changed keys
+    predicate = simplify(And([InValues("id", ["11", "1"]), InValues("id", [1, 11])]))
+    assert predicate == And([InValues("id", ["11", "1"]), InValues("id", [1, 11])])
+
+
+def test_string_key_and_number_exclusion_are_not_merged():
+    predicate = simplify(And([InValues("year", ["2021"]), NotInValues("year", [2021])]))
+    assert predicate == And([InValues("year", ["2021"]), NotInValues("year", [2021])])
+
+
+def test_mixed_type_conditions_are_left_to_the_database():
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE t ("year" INTEGER, "value" REAL)')
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(2020, 1.0), (2021, 2.0), (2021, 3.0)])
+    options = AgGridOptions(
+        startRow=0,
+        endRow=100,
+        rowGroupCols=[{"id": "year", "field": "year"}],
+        groupKeys=["2021"],
+        filterModel={"year": {"filterType": "number", "type": "equals", "filter": 2021}},
+    )
+    query_builder = QueryBuilder(AgRows(query="", options=options), "t")
+    count_sql, count_params = query_builder.build_count_query()
+    assert conn.execute(count_sql, count_params).fetchone()[0] == 2
+
+
+def test_empty_filters_simplify_to_true():
+    assert simplify(None) == TRUE
+    assert simplify(And([])) == TRUE
+    assert _sql(simplify(And([]))) == ("1 = 1", [])
+
+
+def test_whole_day_date_filter_becomes_half_open_range():
+    predicate = parse_filter(
+        "date", {"filterType": "date", "type": "equals", "dateFrom": "2024-03-01 00:00:00"}
+    )
+    assert _sql(predicate) == ('"date" >= ? AND "date" < ?', ["2024-03-01", "2024-03-02"])
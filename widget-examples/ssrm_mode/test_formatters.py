@@ -0,0 +1,47 @@
+"""Tests for result formatting and columnar JSON rendering"""
+
+import asyncio
+import datetime
+import decimal
+import json
+
+from formatters import ColumnarRows, format_query_results, render_ssrm_response
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+
+
+def test_columnar_json_matches_row_json():
+    records = [
+        {"id": 1, "name": 'quote " and \\ slash', "v": float("nan"), "pct%": 1.5},
+        {"id": 2, "name": "ünïcode", "v": float("inf"), "pct%": None},
+    ]
+    rows = ColumnarRows.from_records(records)
+    assert json.loads(rows.to_json()) == format_query_results(records)
+    assert rows.to_records() == format_query_results(records)
+    assert rows[1]["name"] == "ünïcode"
+
+
+def test_columnar_json_renders_dates_and_decimals():
+    rows = ColumnarRows.from_tuples(
+        ["d", "amount"], [(datetime.date(2024, 3, 1), decimal.Decimal("1.25"))]
+    )
+    body = json.loads(render_ssrm_response(rows, rowCount=1))
+    assert body == {"rowData": [{"d": "2024-03-01", "amount": 1.25}], "rowCount": 1}
+
+
+def test_empty_block_renders_an_empty_array():
+    assert ColumnarRows.from_tuples(["id"], []).to_json() == "[]"
+
+
+def test_columnar_results_match_row_results(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"v" REAL', '"name" TEXT'],
+        [(1, 1.5, "a"), (2, None, "b"), (3, 3.5, None)],
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    ag_rows = AgRows(query="", options=AgGridOptions(sortModel=[{"colId": "v", "sort": "desc"}]))
+    _, records = asyncio.run(perform_ssrm_query(db_manager, ag_rows))
+    total, columnar = asyncio.run(perform_ssrm_query(db_manager, ag_rows, columnar=True))
+    assert total == 3
+    assert isinstance(columnar, ColumnarRows)
+    assert columnar.to_records() == records
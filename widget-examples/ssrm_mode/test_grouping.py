@@ -0,0 +1,123 @@
+"""Tests for the hierarchical grouping engine"""
+
+import asyncio
+
+import pytest
+
+from grouping import GroupingEngine
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+
+ROWS = [
+    (1, "Tech", "AAPL", 10.0),
+    (2, "Tech", "MSFT", 25.0),
+    (3, "Tech", "AAPL", 30.0),
+    (4, "Energy", "XOM", 5.0),
+    (5, "Energy", "CVX", None),
+    (6, "Retail", "WMT", 7.0),
+    (7, "Retail", "TGT", 8.0),
+]
+
+GROUP_COLS = [{"id": "sector", "field": "sector"}, {"id": "ticker", "field": "ticker"}]
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"ticker" TEXT', '"price" REAL'], ROWS
+    )
+    return create_database_manager("sqlite", path, "data")
+
+
+def _query(db_manager, options, grouping_engine=None):
+    return asyncio.run(
+        perform_ssrm_query(
+            db_manager, AgRows(query="", options=options), grouping_engine=grouping_engine
+        )
+    )
+
+
+@pytest.mark.parametrize("group_keys", [[], ["Tech"], ["Energy"]])
+@pytest.mark.parametrize("agg_func", ["sum", "avg", "min", "max", "count"])
+def test_hierarchy_matches_per_level_group_by(db_manager, group_keys, agg_func):
+    options = AgGridOptions(
+        startRow=0,
+        endRow=100,
+        rowGroupCols=GROUP_COLS,
+        groupKeys=group_keys,
+        valueCols=[{"id": "price", "field": "price", "aggFunc": agg_func}],
+        sortModel=[{"colId": "price", "sort": "desc"}],
+    )
+    assert _query(db_manager, options, GroupingEngine()) == _query(db_manager, options)
+
+
+def test_all_levels_come_from_one_query(db_manager):
+    engine = GroupingEngine()
+    for group_keys in ([], ["Tech"], ["Energy"], ["Retail"]):
+        options = AgGridOptions(rowGroupCols=GROUP_COLS, groupKeys=group_keys)
+        _query(db_manager, options, engine)
+    assert engine.stats()["misses"] == 1
+
+
+def test_too_large_views_are_not_queried_again(db_manager):
+    engine = GroupingEngine(max_groups=2)
+    calls = []
+    execute_query_async = db_manager.execute_query_async
+
+    async def counting(query, params=None, primary=False):
+        calls.append(query)
+        return await execute_query_async(query, params, primary)
+
+    db_manager.execute_query_async = counting
+    options = AgGridOptions(rowGroupCols=GROUP_COLS)
+    for _ in range(3):
+        assert asyncio.run(engine.get_hierarchy(db_manager, options)) is None
+    assert len(calls) == 1
+
+    engine.invalidate(db_manager.table_name)
+    asyncio.run(engine.get_hierarchy(db_manager, options))
+    assert len(calls) == 2
+
+
+def test_group_columns_with_mixed_types_sort_like_sqlite(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"code"', '"price" REAL'],
+        [(1, "b", 1.0), (2, 10, 2.0), (3, None, 3.0), (4, "a", 4.0), (5, 2, 5.0)],
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    for sort in ("asc", "desc"):
+        options = AgGridOptions(
+            rowGroupCols=[{"id": "code", "field": "code"}],
+            sortModel=[{"colId": "code", "sort": sort}],
+        )
+        # Compare rows only: the SQL path's COUNT(DISTINCT) leaves out the NULL group
+        assert _query(db_manager, options, GroupingEngine())[1] == _query(db_manager, options)[1]
+
+
+def test_duckdb_hierarchy_only_aggregates_what_each_column_needs(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    parquet_path = tmp_path / "trades.parquet"
+    values = ", ".join(
+        f"({id}, '{sector}', '{ticker}', {'NULL' if price is None else price})"
+        for id, sector, ticker, price in ROWS
+    )
+    duckdb.execute(
+        f"COPY (SELECT id, sector, ticker, price::DOUBLE AS price FROM (VALUES {values}) AS t(id, sector, ticker, price)) "
+        f"TO '{parquet_path}' (FORMAT parquet)"
+    )
+    db_manager = create_database_manager("duckdb", table_name="data", parquet_path=parquet_path)
+    try:
+        # sum() is not defined for VARCHAR on DuckDB, count and max are
+        options = AgGridOptions(
+            rowGroupCols=GROUP_COLS,
+            valueCols=[
+                {"id": "ticker", "field": "ticker", "aggFunc": "count"},
+                {"id": "price", "field": "price", "aggFunc": "avg"},
+            ],
+            sortModel=[{"colId": "price", "sort": "asc"}],
+        )
+        for group_keys in ([], ["Energy"]):
+            options = options.model_copy(update={"groupKeys": group_keys})
+            assert _query(db_manager, options, GroupingEngine())[1] == _query(db_manager, options)[1]
+    finally:
+        db_manager.close()
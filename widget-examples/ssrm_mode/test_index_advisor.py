@@ -0,0 +1,83 @@
+"""Tests for the index advisor"""
+
+import threading
+
+import pytest
+
+from helpers import create_database_manager
+from index_advisor import IndexAdvisor, index_columns_for
+from metrics import SlowQueryLog
+from models import AgGridOptions
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"ticker" TEXT', '"price" REAL'],
+        [(1, "Tech", "AAPL", 10.0), (2, "Energy", "XOM", 5.0)],
+    )
+    return create_database_manager("sqlite", path, "data")
+
+
+def test_index_columns_follow_equality_sort_range():
+    options = AgGridOptions(
+        filterModel={
+            "price": {"filterType": "number", "type": "greaterThan", "filter": 1},
+            "ticker": {"filterType": "set", "values": ["AAPL"]},
+            "sector": {"filterType": "text", "type": "equals", "filter": "Tech"},
+        },
+        sortModel=[{"colId": "id", "sort": "desc"}],
+    )
+    assert index_columns_for(options) == ("sector", "ticker", "id", "price")
+
+
+def test_frequent_patterns_are_recommended_and_created(db_manager):
+    advisor = IndexAdvisor(min_uses=2)
+    sector_sort = AgGridOptions(sortModel=[{"colId": "sector", "sort": "asc"}])
+    sector_ticker_sort = AgGridOptions(
+        sortModel=[{"colId": "sector", "sort": "asc"}, {"colId": "ticker", "sort": "asc"}]
+    )
+    for options in (sector_sort, sector_sort, sector_ticker_sort, sector_ticker_sort):
+        advisor.record(db_manager, options)
+    advisor.record(db_manager, AgGridOptions(sortModel=[{"colId": "price", "sort": "asc"}]))
+
+    # The wider index serves the sector prefix too; price is used too rarely
+    recommendations = advisor.recommendations(db_manager)
+    assert [item["columns"] for item in recommendations] == [["sector", "ticker"]]
+
+    results = advisor.apply(db_manager)
+    assert [item["status"] for item in results] == ["created"]
+    assert ["sector", "ticker"] in db_manager.get_table_indexes()
+    assert advisor.recommendations(db_manager) == []
+    statuses = [item["status"] for item in advisor.apply(db_manager, [["sector"], ["missing"]])]
+    assert statuses == ["exists", "unknown column"]
+
+
+def test_automatic_indexes_are_created_off_the_query_executor(db_manager):
+    advisor = IndexAdvisor(min_uses=1, auto_create=True)
+    threads = []
+    execute_write = db_manager.execute_write
+
+    def recording(statements):
+        threads.append(threading.current_thread().name)
+        return execute_write(statements)
+
+    db_manager.execute_write = recording
+    advisor.record(db_manager, AgGridOptions(sortModel=[{"colId": "ticker", "sort": "asc"}]))
+    advisor.ddl_executor.submit(lambda: None).result()
+    assert ["ticker"] in db_manager.get_table_indexes()
+    assert threads and all(name.startswith("ssrm-ddl") for name in threads)
+
+
+def test_slow_queries_come_from_the_slow_query_log(db_manager):
+    slow_query_log = SlowQueryLog(threshold_ms=100.0, capture_plans=False)
+    advisor = IndexAdvisor(slow_query_log=slow_query_log)
+    slow_query_log.record(db_manager, "main", "SELECT * FROM data WHERE id = ?", [1], 50.0)
+    slow_query_log.record(db_manager, "main", "SELECT * FROM data WHERE price > ?", [1], 150.0)
+    slow_query_log.record(db_manager, "main", "SELECT * FROM data WHERE price > ?", [2], 300.0)
+
+    (slow,) = advisor.report(db_manager)["slow_queries"]
+    assert slow["query"] == "SELECT * FROM data WHERE price > ?"
+    assert (slow["params"], slow["max_duration_ms"], slow["slow_calls"]) == ([2], 300.0, 2)
+    assert slow["plan"]
+    assert IndexAdvisor().slow_queries(db_manager) == []
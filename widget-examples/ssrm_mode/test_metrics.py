@@ -0,0 +1,43 @@
+"""Tests for request timing, metrics and the slow query log"""
+
+from helpers import create_database_manager
+from metrics import MetricsRegistry, SlowQueryLog, StageTimer
+
+
+def test_stage_timer_accumulates_and_renders_server_timing():
+    timer = StageTimer()
+    timer.add("count", 1.5)
+    timer.add("count", 2.0)
+    with timer.stage("format"):
+        pass
+    header = timer.server_timing_header()
+    assert header.startswith("count;dur=3.50, format;dur=")
+    assert ", total;dur=" in header
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.describe("ssrm_requests_total", "SSRM requests")
+    registry.inc("ssrm_requests_total", kind="flat")
+    registry.inc("ssrm_requests_total", kind="flat")
+    registry.observe("ssrm_stage_seconds", 0.5, stage="main")
+    registry.gauge("ssrm_cache_entries", lambda: {(("cache", "count"),): 3})
+    lines = registry.render().splitlines()
+    assert "# HELP ssrm_requests_total SSRM requests" in lines
+    assert 'ssrm_requests_total{kind="flat"} 2.0' in lines
+    assert 'ssrm_stage_seconds_bucket{stage="main",le="0.1"} 0' in lines
+    assert 'ssrm_stage_seconds_bucket{stage="main",le="1.0"} 1' in lines
+    assert 'ssrm_stage_seconds_bucket{stage="main",le="+Inf"} 1' in lines
+    assert 'ssrm_cache_entries{cache="count"} 3' in lines
+
+
+def test_slow_query_log_keeps_recent_slow_queries(sqlite_table):
+    db_manager = create_database_manager(
+        "sqlite", sqlite_table(['"id" INTEGER'], [(1,)]), "data"
+    )
+    log = SlowQueryLog(threshold_ms=100, max_entries=2, capture_plans=False)
+    log.record(db_manager, "main", "SELECT 1", [], 50)
+    for index in range(3):
+        log.record(db_manager, "main", f"SELECT {index}", [index], 200)
+    assert [entry["query"] for entry in log.entries()] == ["SELECT 2", "SELECT 1"]
+    assert log.clear() == 2
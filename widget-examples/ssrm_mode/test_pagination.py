@@ -0,0 +1,116 @@
+"""Tests for keyset pagination"""
+
+import asyncio
+import sqlite3
+
+import pytest
+
+from config import nulls_sort_first
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from pagination import KeysetCursorStore, extract_cursor
+from query_builder import QueryBuilder
+
+ROWS = [(1, 3.0), (2, None), (3, 1.0), (4, None), (5, 2.0), (6, 5.0)]
+
+
+def _pages(db_manager, sort, cursor_store=None, page_size=2):
+    pages = []
+    for start in range(0, len(ROWS) + page_size, page_size):
+        options = AgGridOptions(
+            startRow=start,
+            endRow=start + page_size,
+            sortModel=[{"colId": "v", "sort": sort}],
+        )
+        _, rows = asyncio.run(
+            perform_ssrm_query(db_manager, AgRows(query="", options=options), cursor_store)
+        )
+        pages.append([row["id"] for row in rows])
+    return pages
+
+
+@pytest.mark.parametrize("sort", ["asc", "desc"])
+def test_keyset_pages_match_offset_pages_with_nulls(sqlite_table, sort):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"v" REAL'], ROWS)
+    offset_manager = create_database_manager("sqlite", path, "data")
+    keyset_manager = create_database_manager("sqlite", path, "data", keyset_column="id")
+
+    expected = _pages(offset_manager, sort)
+    assert sum(expected, []) and sorted(sum(expected, [])) == [1, 2, 3, 4, 5, 6]
+    cursor_store = KeysetCursorStore()
+    assert _pages(keyset_manager, sort, cursor_store) == expected
+    # The pages after the first were fetched by seeking
+    assert len(cursor_store._cursors) >= 2
+
+
+@pytest.mark.parametrize("null_order", ["low", "high", "last"])
+@pytest.mark.parametrize("sort", ["ASC", "DESC"])
+def test_seek_follows_database_null_order(null_order, sort):
+    # SQLite spells out the NULL placement of the other databases
+    nulls = "NULLS FIRST" if nulls_sort_first(null_order, sort == "DESC") else "NULLS LAST"
+    conn = sqlite3.connect(":memory:")
+    conn.execute('CREATE TABLE data ("id" INTEGER PRIMARY KEY, "v" REAL)')
+    conn.executemany("INSERT INTO data VALUES (?, ?)", ROWS)
+    order_by = f' ORDER BY "v" {sort} {nulls}, "id" ASC'
+    expected = [row[0] for row in conn.execute(f"SELECT * FROM data{order_by}")]
+
+    seen, cursor = [], None
+    options = AgGridOptions(sortModel=[{"colId": "v", "sort": sort.lower()}])
+    while True:
+        query_builder = QueryBuilder(
+            AgRows(query="", options=options),
+            "data",
+            keyset_column="id",
+            cursor=cursor,
+            null_order=null_order,
+        )
+        seek_sql, params = query_builder.create_seek_sql()
+        where_sql = f" WHERE {seek_sql}" if seek_sql else ""
+        rows = conn.execute(f"SELECT * FROM data{where_sql}{order_by} LIMIT 2", params)
+        rows = [{"id": row[0], "v": row[1]} for row in rows]
+        if not rows:
+            break
+        seen.extend(row["id"] for row in rows)
+        cursor = extract_cursor(rows, options.sortModel, "id")
+    assert seen == expected
+
+
+def test_cursor_keeps_null_sort_values_but_not_null_tiebreaker():
+    sort_model = [{"colId": "v", "sort": "asc"}]
+    assert extract_cursor([{"id": 2, "v": None}], sort_model, "id") == {"id": 2, "v": None}
+    assert extract_cursor([{"id": None, "v": 1.0}], sort_model, "id") is None
+    assert extract_cursor([], sort_model, "id") is None
+
+
+def test_cursor_store_only_serves_the_following_block():
+    store = KeysetCursorStore()
+    options = AgGridOptions(startRow=0, endRow=2, sortModel=[{"colId": "v", "sort": "asc"}])
+    store.remember("data", options, [{"id": 1, "v": 1.0}, {"id": 2, "v": 2.0}], "id")
+    following = options.model_copy(update={"startRow": 2, "endRow": 4})
+    assert store.get("data", following) == {"v": 2.0, "id": 2}
+    assert store.get("other", following) is None
+    assert store.get("data", options.model_copy(update={"startRow": 4, "endRow": 6})) is None
+    resorted = following.model_copy(update={"sortModel": [{"colId": "v", "sort": "desc"}]})
+    assert store.get("data", resorted) is None
+
+
+def test_writes_drop_the_cursors_taken_before_them(sqlite_table):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"v" REAL'], ROWS)
+    keyset_manager = create_database_manager("sqlite", path, "data", keyset_column="id")
+    cursor_store = KeysetCursorStore()
+    _pages(keyset_manager, "asc", cursor_store)
+
+    # Refreshing the second block after a row was inserted before it
+    keyset_manager.execute_write([("INSERT INTO data VALUES (?, ?)", [0, None])])
+    options = AgGridOptions(startRow=2, endRow=4, sortModel=[{"colId": "v", "sort": "asc"}])
+
+    def second_block():
+        _, rows = asyncio.run(
+            perform_ssrm_query(keyset_manager, AgRows(query="", options=options), cursor_store)
+        )
+        return [row["id"] for row in rows]
+
+    assert second_block() == [3, 5]  # Seeks from the old cursor, skipping row 4
+    assert cursor_store.invalidate("data") > 0
+    assert cursor_store.invalidate("other") == 0
+    assert second_block() == [4, 3]
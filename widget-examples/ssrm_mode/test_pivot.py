@@ -0,0 +1,71 @@
+"""Tests for server-side pivot mode"""
+
+import asyncio
+
+import pytest
+
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from pivot import PivotEngine
+
+ROWS = [
+    (1, "Tech", "Q1", 10.0),
+    (2, "Tech", "Q2", 20.0),
+    (3, "Tech", "Q1", 5.0),
+    (4, "Energy", "Q2", 7.0),
+]
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"quarter" TEXT', '"revenue" REAL'], ROWS
+    )
+    return create_database_manager("sqlite", path, "data")
+
+
+def _pivot_options(**kwargs):
+    return AgGridOptions(
+        startRow=0,
+        endRow=100,
+        pivotMode=True,
+        pivotCols=[{"id": "quarter", "field": "quarter"}],
+        valueCols=[{"id": "revenue", "field": "revenue", "aggFunc": "sum"}],
+        **kwargs,
+    )
+
+
+def test_pivot_columns_come_from_one_grouped_scan(db_manager):
+    engine = PivotEngine()
+    options = _pivot_options(rowGroupCols=[{"id": "sector", "field": "sector"}])
+    total, rows = asyncio.run(
+        perform_ssrm_query(db_manager, AgRows(query="", options=options), pivot_engine=engine)
+    )
+    assert total == 2
+    assert sorted(rows, key=lambda row: row["sector"]) == [
+        {"sector": "Energy", "Q1_revenue": None, "Q2_revenue": 7.0},
+        {"sector": "Tech", "Q1_revenue": 15.0, "Q2_revenue": 20.0},
+    ]
+    assert asyncio.run(engine.get_result_fields(db_manager, options)) == [
+        "Q1_revenue",
+        "Q2_revenue",
+    ]
+
+
+def test_pivot_without_row_groups_is_one_row(db_manager):
+    total, rows = asyncio.run(
+        perform_ssrm_query(
+            db_manager, AgRows(query="", options=_pivot_options()), pivot_engine=PivotEngine()
+        )
+    )
+    assert (total, rows) == (1, [{"Q1_revenue": 15.0, "Q2_revenue": 27.0}])
+
+
+def test_pivot_keys_follow_filters_and_are_capped(db_manager):
+    engine = PivotEngine(max_pivot_keys=1)
+    filtered = _pivot_options(
+        filterModel={"sector": {"filterType": "set", "values": ["Energy"]}}
+    )
+    assert asyncio.run(engine.get_pivot_keys(db_manager, filtered)) == [("Q2",)]
+    with pytest.raises(ValueError):
+        asyncio.run(engine.get_pivot_keys(db_manager, _pivot_options()))
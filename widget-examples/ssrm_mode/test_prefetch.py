@@ -0,0 +1,79 @@
+"""Tests for block read-ahead"""
+
+import asyncio
+
+import pytest
+
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from prefetch import BlockPrefetcher
+
+
+def _block_options(start_row, page_size=10):
+    return AgGridOptions(
+        startRow=start_row,
+        endRow=start_row + page_size,
+        sortModel=[{"colId": "id", "sort": "asc"}],
+    )
+
+
+def test_adjacent_blocks_are_prefetched_within_the_row_count():
+    prefetcher = BlockPrefetcher(depth=2, backward=True)
+    computed = []
+
+    async def compute(options):
+        computed.append(options.startRow)
+        return 25, [{"id": options.startRow}]
+
+    async def run():
+        started = prefetcher.schedule("data", _block_options(10), 25, compute)
+        # Requests for scheduled blocks join the running prefetch
+        joined = await prefetcher.get("data", _block_options(20))
+        await asyncio.sleep(0)
+        cached = await prefetcher.get("data", _block_options(0))
+        return started, joined, cached
+
+    started, joined, cached = asyncio.run(run())
+    assert started == 2  # Rows 30-40 are past the row count
+    assert joined == (25, [{"id": 20}]) and cached == (25, [{"id": 0}])
+    assert sorted(computed) == [0, 20]
+    assert prefetcher.stats()["joined"] == 1
+
+
+def test_blocks_prefetched_across_a_write_are_dropped():
+    prefetcher = BlockPrefetcher()
+
+    async def compute(options):
+        await asyncio.sleep(0.01)
+        return 100, [{"id": options.startRow}]
+
+    async def run():
+        prefetcher.schedule("data", _block_options(0), 100, compute)
+        await asyncio.sleep(0)  # Let the prefetch start before the write
+        prefetcher.invalidate("data")
+        return await prefetcher.get("data", _block_options(10))
+
+    assert asyncio.run(run()) is None
+    assert prefetcher.cache.get("data", _block_options(10)) is None
+
+
+@pytest.mark.parametrize("start_row", [10, 20])
+def test_prefetched_block_matches_a_direct_query(sqlite_table, start_row):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"v" REAL'], [(i, i / 2) for i in range(30)])
+    db_manager = create_database_manager("sqlite", path, "data")
+    prefetcher = BlockPrefetcher(depth=2)
+
+    async def run():
+        await perform_ssrm_query(
+            db_manager, AgRows(query="", options=_block_options(0)), prefetcher=prefetcher
+        )
+        return await perform_ssrm_query(
+            db_manager, AgRows(query="", options=_block_options(start_row)), prefetcher=prefetcher
+        )
+
+    prefetched = asyncio.run(run())
+    direct = asyncio.run(
+        perform_ssrm_query(db_manager, AgRows(query="", options=_block_options(start_row)))
+    )
+    assert prefetched == direct
+    assert prefetcher.stats()["scheduled"] >= 2
@@ -0,0 +1,46 @@
+"""Tests for SQL generation in the query builder"""
+
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+
+
+def _builder(**options):
+    return QueryBuilder(AgRows(query="", options=AgGridOptions(**options)), "data")
+
+
+def test_filter_values_and_group_keys_are_bound_parameters():
+    query_builder = _builder(
+        rowGroupCols=[{"id": "sector", "field": "sector"}, {"id": "firm", "field": "firm"}],
+        groupKeys=["Tech'; DROP TABLE data; --"],
+        filterModel={"firm": {"filterType": "text", "type": "contains", "filter": "o'brien"}},
+    )
+    sql, params = query_builder.build_query()
+    assert "DROP" not in sql and "brien" not in sql
+    assert params == ["Tech'; DROP TABLE data; --", "%o'brien%", 500, 0]
+
+
+def test_statement_text_only_depends_on_the_query_shape():
+    def build(value, start):
+        return _builder(
+            startRow=start,
+            endRow=start + 100,
+            filterModel={"price": {"filterType": "number", "type": "lessThan", "filter": value}},
+        ).build_query()
+
+    (first_sql, first_params), (second_sql, second_params) = build(10, 0), build(20, 100)
+    assert first_sql == second_sql
+    assert first_params != second_params
+
+
+def test_mysql_placeholders():
+    options = AgGridOptions(filterModel={"id": {"filterType": "set", "values": [1, 2]}})
+    query_builder = QueryBuilder(
+        AgRows(query="", options=options),
+        "data",
+        escape_char="`",
+        placeholder="%s",
+    )
+    assert query_builder.build_query() == (
+        "SELECT * FROM data WHERE `id` IN (%s, %s) LIMIT %s OFFSET %s",
+        ["1", "2", 500, 0],
+    )
@@ -0,0 +1,31 @@
+"""Tests for JSON and streaming SSRM responses"""
+
+import asyncio
+import json
+
+from helpers import create_database_manager, perform_ssrm_query, stream_ssrm_query
+from models import AgGridOptions, AgRows
+from responses import FastJSONResponse, StreamingSSRMResponse
+
+
+def test_fast_json_response_renders_compact_json():
+    response = FastJSONResponse({"rowData": [{"v": 1.5, "name": "é"}], "rowCount": 1})
+    assert response.body == '{"rowData":[{"v":1.5,"name":"é"}],"rowCount":1}'.encode("utf-8")
+
+
+def test_streamed_block_matches_the_materialized_block(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"name" TEXT'], [(i, f"row {i}") for i in range(25)]
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    ag_rows = AgRows(query="", options=AgGridOptions(startRow=0, endRow=20))
+
+    total, chunks = asyncio.run(stream_ssrm_query(db_manager, ag_rows, chunk_size=6))
+    body = "".join(StreamingSSRMResponse._render(chunks, {"rowCount": total}))
+    expected_total, expected_rows = asyncio.run(perform_ssrm_query(db_manager, ag_rows))
+    assert json.loads(body) == {"rowCount": expected_total, "rowData": expected_rows}
+
+
+def test_empty_stream_renders_an_empty_row_array():
+    body = "".join(StreamingSSRMResponse._render(iter(["", ""]), {"rowCount": 0}))
+    assert json.loads(body) == {"rowCount": 0, "rowData": []}
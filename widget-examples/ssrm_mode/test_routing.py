@@ -0,0 +1,119 @@
+"""Tests for replica routing and sharded queries"""
+
+import asyncio
+
+import pytest
+
+from filters import And, InValues, Range
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from routing import ReplicaSet, merge_sorted_pages, prune_shards, shard_for_value
+
+ROWS = [(1, 3.0), (2, None), (3, 1.0), (4, None), (5, 2.0), (6, 5.0)]
+
+
+def _sort(rows, descending, null_order):
+    """Reference order of the rows as the database returns them"""
+    values = sorted(row["v"] for row in rows if row["v"] is not None)
+    if descending:
+        values.reverse()
+    nulls = [row for row in rows if row["v"] is None]
+    ordered = [row for value in values for row in rows if row["v"] == value]
+    nulls_first = {
+        "low": not descending,
+        "high": descending,
+        "last": False,
+    }[null_order]
+    return nulls + ordered if nulls_first else ordered + nulls
+
+
+@pytest.mark.parametrize("null_order", ["low", "high", "last"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_merge_places_nulls_like_the_database(null_order, descending):
+    rows = [{"id": row_id, "v": value} for row_id, value in ROWS]
+    pages = [
+        _sort([row for row in rows if row["id"] % 2 == shard], descending, null_order)
+        for shard in (0, 1)
+    ]
+    merged = merge_sorted_pages(pages, [("v", descending)], null_order=null_order)
+    assert [row["v"] for row in merged] == [
+        row["v"] for row in _sort(rows, descending, null_order)
+    ]
+
+
+def test_merge_slices_tuple_rows():
+    pages = [[(1, 1.0), (3, 3.0)], [(2, 2.0), (4, 4.0)]]
+    merged = merge_sorted_pages(pages, [("v", False)], skip=1, limit=2, columns=["id", "v"])
+    assert merged == [(2, 2.0), (3, 3.0)]
+
+
+def test_only_shard_key_equality_prunes_shards():
+    owner = shard_for_value("AAPL", 4)
+    predicate = And([InValues("ticker", ["AAPL"]), Range("price", low=1)])
+    assert prune_shards(predicate, "ticker", 4) == [owner]
+    assert prune_shards(Range("price", low=1), "ticker", 4) is None
+    assert prune_shards(predicate, None, 4) is None
+
+
+class _Replica:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+
+    def execute_count_query(self, query, params):
+        if not self.healthy:
+            raise ConnectionError("replica down")
+        return 1
+
+
+def test_unhealthy_replica_is_taken_out_of_rotation():
+    primary, down, up = _Replica(), _Replica(healthy=False), _Replica()
+    replicas = ReplicaSet(primary, [down, up], retry_after=60)
+    def read(connection):
+        connection.execute_count_query("SELECT 1", [])
+        return connection
+
+    served = [replicas.run(read) for _ in range(4)]
+    assert served == [up] * 4
+    assert replicas.failovers == 1
+    assert [replica["healthy"] for replica in replicas.stats()["replicas"]] == [False, True]
+
+
+def test_query_errors_are_not_failed_over():
+    replicas = ReplicaSet(_Replica(), [_Replica()])
+
+    def fail(connection):
+        raise ValueError("bad query")
+
+    with pytest.raises(ValueError):
+        replicas.run(fail)
+    assert replicas.failovers == 0
+
+
+def test_sharded_pages_match_a_single_table(sqlite_table, tmp_path):
+    columns = ['"id" INTEGER PRIMARY KEY', '"v" REAL']
+    single = sqlite_table(columns, ROWS, path=tmp_path / "single.db")
+    shards = [
+        sqlite_table(
+            columns,
+            [row for row in ROWS if shard_for_value(row[0], 2) == index],
+            path=tmp_path / f"shard{index}.db",
+        )
+        for index in range(2)
+    ]
+    single_manager = create_database_manager("sqlite", single, "data")
+    sharded_manager = create_database_manager(
+        "sqlite", single, "data", shards=shards, shard_key="id"
+    )
+
+    for sort in ("asc", "desc"):
+        for start in (0, 2, 4):
+            options = AgGridOptions(
+                startRow=start,
+                endRow=start + 2,
+                sortModel=[{"colId": "v", "sort": sort}, {"colId": "id", "sort": "asc"}],
+            )
+            results = [
+                asyncio.run(perform_ssrm_query(manager, AgRows(query="", options=options)))
+                for manager in (single_manager, sharded_manager)
+            ]
+            assert results[0] == results[1]
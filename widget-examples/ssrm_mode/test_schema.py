@@ -0,0 +1,59 @@
+"""Tests for the table schema cache"""
+
+import sqlite3
+
+import pytest
+
+from helpers import create_database_manager
+from models import AgGridOptions
+from schema import SchemaCache
+
+COLUMNS = ['"id" INTEGER PRIMARY KEY', '"firm" TEXT', '"price" REAL', '"date" DATE']
+
+
+@pytest.fixture
+def db_path(sqlite_table):
+    return sqlite_table(COLUMNS, [(1, "Acme", 1.0, "2024-01-01")])
+
+
+def test_unknown_columns_and_filter_types(db_path):
+    schema = SchemaCache().get(create_database_manager("sqlite", db_path, "data"))
+    options = AgGridOptions(
+        filterModel={"price": {"type": "equals", "filter": 1}, "nope": {"filter": "x"}},
+        sortModel=[{"colId": "bad", "sort": "asc"}],
+    )
+    assert schema.unknown_columns(options) == ["nope", "bad"]
+    typed = schema.with_filter_types({"price": {}, "date": {}, "firm": {"filterType": "set"}})
+    assert typed == {
+        "price": {"filterType": "number"},
+        "date": {"filterType": "date"},
+        "firm": {"filterType": "set"},
+    }
+
+
+def test_schema_is_loaded_once_and_shared_through_the_snapshot(db_path, tmp_path):
+    snapshot = tmp_path / "schema.json"
+    db_manager = create_database_manager("sqlite", db_path, "data")
+    first = SchemaCache(snapshot_path=snapshot)
+    first.get(db_manager)
+    first.get(db_manager)
+    assert first.loads == 1
+
+    second = SchemaCache(snapshot_path=snapshot)
+    assert second.get(db_manager).has_column("firm")
+    assert (second.loads, second.snapshot_loads) == (0, 1)
+
+
+def test_ddl_changes_reload_the_schema(db_path):
+    db_manager = create_database_manager("sqlite", db_path, "data")
+    cache = SchemaCache()
+    cache.get(db_manager)
+    assert not cache.check(db_manager)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('ALTER TABLE data ADD COLUMN "volume" INTEGER')
+    conn.commit()
+    conn.close()
+    assert cache.check(db_manager)
+    assert cache.get(db_manager).has_column("volume")
+    assert cache.ddl_changes == 1
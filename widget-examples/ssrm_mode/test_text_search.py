@@ -0,0 +1,86 @@
+"""Tests for trigram text search"""
+
+import asyncio
+
+import pytest
+
+from helpers import create_database_manager, perform_ssrm_query
+from models import AgGridOptions, AgRows
+from text_search import TextSearchIndex, TrigramIndex
+
+ROWS = [
+    (1, "Apple Inc"),
+    (2, "Applied Materials"),
+    (3, "Pineapple Farms"),
+    (4, "Microsoft"),
+    (5, None),
+    (6, "100%_Pure"),
+]
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"name" TEXT'], ROWS)
+    return create_database_manager("sqlite", path, "data")
+
+
+def _ids(db_manager, filter_config, text_index=None):
+    options = AgGridOptions(
+        startRow=0,
+        endRow=100,
+        filterModel={"name": {"filterType": "text", **filter_config}},
+        sortModel=[{"colId": "id", "sort": "asc"}],
+    )
+    _, rows = asyncio.run(
+        perform_ssrm_query(db_manager, AgRows(query="", options=options), text_index=text_index)
+    )
+    return [row["id"] for row in rows]
+
+
+def test_trigram_index_matches_like_semantics():
+    index = TrigramIndex(["Apple Inc", "Pineapple", "Maple", 42])
+    assert index.matching("contains", "APPLE") == ["Apple Inc", "Pineapple"]
+    assert index.matching("startsWith", "app") == ["Apple Inc"]
+    assert index.matching("endsWith", "ple") == ["Pineapple", "Maple"]
+    assert index.matching("contains", "xyz") == []
+    assert TrigramIndex(["Apple"], case_sensitive=True).matching("contains", "APP") == []
+
+
+@pytest.mark.parametrize("mode", ["fts5", "memory"])
+@pytest.mark.parametrize(
+    "filter_config",
+    [
+        {"type": "contains", "filter": "apple"},
+        {"type": "startsWith", "filter": "Appl"},
+        {"type": "endsWith", "filter": "soft"},
+        {"type": "contains", "filter": "zzz"},
+        {"type": "contains", "filter": "ap"},
+        {"type": "contains", "filter": "0%_"},
+        {"type": "notContains", "filter": "apple"},
+    ],
+)
+def test_indexed_filters_match_plain_like(db_manager, mode, filter_config):
+    text_index = TextSearchIndex(["name"], mode=mode)
+    assert text_index.refresh(db_manager) == mode
+    assert _ids(db_manager, filter_config, text_index) == _ids(db_manager, filter_config)
+
+
+def test_fts5_index_follows_writes(db_manager):
+    text_index = TextSearchIndex(["name"], mode="fts5")
+    text_index.refresh(db_manager)
+    db_manager.execute_write(
+        [
+            ("INSERT INTO data VALUES (?, ?)", [7, "Snapple"]),
+            ("UPDATE data SET name = ? WHERE id = ?", ["Banana", 1]),
+            ("DELETE FROM data WHERE id = ?", [2]),
+        ]
+    )
+    assert _ids(db_manager, {"type": "contains", "filter": "apple"}, text_index) == [3, 7]
+    assert text_index.stats()["rewrites"] > 0
+
+
+def test_unsupported_mode_is_rejected(db_manager):
+    with pytest.raises(ValueError):
+        TextSearchIndex(["name"], mode="bogus")
+    with pytest.raises(ValueError):
+        TextSearchIndex(["name"], mode="fulltext").refresh(db_manager)
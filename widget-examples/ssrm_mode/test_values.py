@@ -0,0 +1,89 @@
+"""Tests for set filter values"""
+
+import pytest
+
+from helpers import create_database_manager
+from values import DistinctValuesCache
+
+ROWS = [
+    (1, "Tech", "AAPL"),
+    (2, "Tech", "msft"),
+    (3, "Energy", "XOM"),
+    (4, "Energy", None),
+    (5, "Retail", "WMT"),
+    (6, "Tech", "AAPL"),
+]
+
+
+@pytest.fixture
+def db_manager(sqlite_table):
+    path = sqlite_table(['"id" INTEGER PRIMARY KEY', '"sector" TEXT', '"ticker" TEXT'], ROWS)
+    return create_database_manager("sqlite", path, "data", keyset_column="id")
+
+
+def test_values_are_narrowed_by_other_filters_only(db_manager):
+    cache = DistinctValuesCache()
+    filter_model = {
+        "sector": {"filterType": "set", "values": ["Tech"]},
+        "ticker": {"filterType": "set", "values": ["AAPL"]},
+    }
+    result = cache.get_values(db_manager, "ticker", filter_model=filter_model)
+    assert result == {"values": ["AAPL", "msft"], "truncated": False}
+    assert cache.get_values(db_manager, "ticker")["values"] == [None, "AAPL", "WMT", "XOM", "msft"]
+
+
+def test_search_is_case_insensitive_and_limited(db_manager):
+    cache = DistinctValuesCache()
+    assert cache.get_values(db_manager, "ticker", search="M")["values"] == ["msft"]
+    assert cache.get_values(db_manager, "sector", limit=2) == {
+        "values": ["Energy", "Retail"],
+        "truncated": True,
+    }
+    assert cache.stats()["loads"] == 2
+
+
+def test_truncated_lists_search_the_database(db_manager):
+    cache = DistinctValuesCache(max_values=2)
+    assert cache.get_values(db_manager, "ticker")["truncated"] is True
+    assert cache.get_values(db_manager, "ticker", search="x") == {
+        "values": ["XOM"],
+        "truncated": False,
+    }
+    assert cache.stats()["database_searches"] == 1
+
+
+def test_database_searches_take_wildcards_literally(sqlite_table):
+    path = sqlite_table(
+        ['"id" INTEGER PRIMARY KEY', '"code" TEXT'], [(1, "A_1"), (2, "AB1"), (3, "a%2"), (4, "A!3")]
+    )
+    db_manager = create_database_manager("sqlite", path, "data")
+    cache = DistinctValuesCache(max_values=1)
+    assert cache.get_values(db_manager, "code", search="a_")["values"] == ["A_1"]
+    assert cache.get_values(db_manager, "code", search="A%")["values"] == ["a%2"]
+    assert cache.get_values(db_manager, "code", search="a!")["values"] == ["A!3"]
+
+
+def test_duckdb_database_searches_ignore_case(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    parquet_path = tmp_path / "data.parquet"
+    duckdb.execute(
+        "COPY (SELECT * FROM (VALUES (1, 'AAPL'), (2, 'amzn'), (3, 'MSFT')) AS t(id, ticker)) "
+        f"TO '{parquet_path}' (FORMAT parquet)"
+    )
+    db_manager = create_database_manager("duckdb", table_name="data", parquet_path=parquet_path)
+    try:
+        cache = DistinctValuesCache(max_values=2)
+        assert cache.get_values(db_manager, "ticker", search="a") == {
+            "values": ["AAPL", "amzn"],
+            "truncated": False,
+        }
+    finally:
+        db_manager.close()
+
+
+def test_refresh_reads_only_rows_above_the_watermark(db_manager):
+    cache = DistinctValuesCache(refresh_interval=0)
+    cache.get_values(db_manager, "sector")
+    db_manager.execute_write([("INSERT INTO data VALUES (?, ?, ?)", [7, "Banks", "JPM"])])
+    assert cache.get_values(db_manager, "sector")["values"] == ["Banks", "Energy", "Retail", "Tech"]
+    assert cache.stats()["loads"] == 1 and cache.stats()["refreshes"] == 1
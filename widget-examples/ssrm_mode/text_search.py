@@ -0,0 +1,338 @@
+"""
+Text search indexes for SSRM AgGrid application.
+
+``contains``, ``startsWith`` and ``endsWith`` text filters become
+``LIKE '%text%'`` conditions, which no B-tree index can serve. For configured
+text columns :class:`TextSearchIndex` keeps a trigram index and rewrites
+these conditions to use it:
+
+- SQLite: an FTS5 table with the trigram tokenizer, kept in sync by triggers
+- MySQL: a FULLTEXT index with the ngram parser, narrowing the LIKE
+- Other databases: an in-process trigram index over the column's distinct
+  values, turning the condition into ``column IN (matching values)``
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from database import DatabaseManager
+from filters import FALSE, And, InValues, Or, Predicate, Raw, TextMatch
+
+logger = logging.getLogger(__name__)
+
+TEXT_SEARCH_MODES = ("auto", "fts5", "fulltext", "memory")
+
+# Databases whose LIKE is case-sensitive (matters for the in-process index)
+CASE_SENSITIVE_LIKE = ("duckdb", "snowflake")
+
+
+class TrigramIndex:
+    """In-process trigram index over the distinct values of one text column"""
+
+    def __init__(self, values: Sequence[Any], case_sensitive: bool = False):
+        """
+        Initialize trigram index.
+
+        Args:
+            values: Distinct values of the column (non-strings are ignored)
+            case_sensitive: Match like a case-sensitive LIKE
+        """
+        self.case_sensitive = case_sensitive
+        self.values = [value for value in values if isinstance(value, str)]
+        self._texts = [self._normalize(value) for value in self.values]
+        self._postings: Dict[str, List[int]] = {}
+        for position, text in enumerate(self._texts):
+            for trigram in {text[start : start + 3] for start in range(len(text) - 2)}:
+                self._postings.setdefault(trigram, []).append(position)
+
+    def _normalize(self, text: str) -> str:
+        return text if self.case_sensitive else text.casefold()
+
+    def matching(self, condition_type: str, needle: str) -> List[str]:
+        """
+        Values matching a ``contains``/``startsWith``/``endsWith`` condition.
+
+        ``needle`` must be at least three characters long.
+        """
+        needle = self._normalize(needle)
+        trigrams = {needle[start : start + 3] for start in range(len(needle) - 2)}
+        postings = sorted((self._postings.get(trigram, []) for trigram in trigrams), key=len)
+        if not postings or not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for positions in postings[1:]:
+            candidates.intersection_update(positions)
+            if not candidates:
+                return []
+
+        if condition_type == "startsWith":
+            check = lambda text: text.startswith(needle)
+        elif condition_type == "endsWith":
+            check = lambda text: text.endswith(needle)
+        else:
+            check = lambda text: needle in text
+        return [
+            self.values[position]
+            for position in sorted(candidates)
+            if check(self._texts[position])
+        ]
+
+
+class TextSearchIndex:
+    """
+    Trigram indexes of text columns, used to rewrite substring filters.
+
+    ``refresh`` creates the index (idempotent for FTS5 and FULLTEXT, which the
+    database keeps in sync) or rebuilds the in-process index, which must be
+    refreshed after writes. Conditions shorter than ``min_length`` characters,
+    or containing LIKE wildcards, keep their plain LIKE. ``notContains``
+    matches most rows, so it is never rewritten.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        mode: str = "auto",
+        min_length: int = 3,
+        max_values: int = 200_000,
+        max_in_values: int = 1000,
+    ):
+        """
+        Initialize text search index.
+
+        Args:
+            columns: Text columns to index
+            mode: "fts5" (SQLite), "fulltext" (MySQL), "memory", or "auto" to pick by database
+            min_length: Shortest filter text served by the index (trigrams need 3)
+            max_values: Columns with more distinct values are not indexed in memory
+            max_in_values: In-memory matches above this keep the LIKE condition
+        """
+        if mode not in TEXT_SEARCH_MODES:
+            raise ValueError(f"Unsupported text search mode: {mode}")
+        self.columns = list(columns)
+        self.mode = mode
+        self.min_length = max(min_length, 3)
+        self.max_values = max_values
+        self.max_in_values = max_in_values
+        # table -> mode in use, and (table, column) -> in-process index
+        self._modes: Dict[str, str] = {}
+        self._trigrams: Dict[tuple, TrigramIndex] = {}
+        self._lock = threading.Lock()
+        self.rewrites = 0
+
+    def _resolve_mode(self, db_manager: DatabaseManager) -> str:
+        database_type = db_manager.config.database_type
+        native = {"sqlite": "fts5", "mysql": "fulltext"}.get(database_type, "memory")
+        if self.mode == "auto":
+            return native
+        if self.mode not in ("memory", native):
+            raise ValueError(f"Text search mode {self.mode} is not available for {database_type}")
+        return self.mode
+
+    @staticmethod
+    def fts_table(table_name: str) -> str:
+        """Name of the FTS5 table indexing a table"""
+        return f"{table_name}_ssrm_fts"
+
+    def refresh(self, db_manager: DatabaseManager) -> Optional[str]:
+        """
+        Create or rebuild the index of the configured table.
+
+        Returns:
+            Optional[str]: Mode in use, or None if no index could be built
+        """
+        if not self.columns:
+            return None
+        table_name = db_manager.table_name
+        with self._lock:
+            self._modes.pop(table_name, None)
+        mode = self._resolve_mode(db_manager)
+        if mode != "memory":
+            try:
+                if mode == "fts5":
+                    self._ensure_fts5(db_manager)
+                else:
+                    self._ensure_fulltext(db_manager)
+            except Exception as e:
+                # e.g. SQLite older than 3.34 has no trigram tokenizer
+                logger.warning(
+                    "Could not create %s index of %s (%s), using an in-process index",
+                    mode,
+                    table_name,
+                    e,
+                )
+                mode = "memory"
+        if mode == "memory":
+            try:
+                self._build_trigrams(db_manager)
+            except Exception:
+                logger.exception("Could not build text search index of %s", table_name)
+                return None
+        with self._lock:
+            self._modes[table_name] = mode
+        return mode
+
+    async def refresh_async(self, db_manager: DatabaseManager) -> Optional[str]:
+        """Run ``refresh`` on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(db_manager.executor, self.refresh, db_manager)
+
+    def _ensure_fts5(self, db_manager: DatabaseManager) -> None:
+        """Create the FTS5 trigram table and its sync triggers, unless up to date"""
+        table_name = db_manager.table_name
+        fts = self.fts_table(table_name)
+        escape = lambda name: f"{db_manager.escape_char}{name}{db_manager.escape_char}"
+        existing = [
+            row["name"] for row in db_manager.execute_query(f"PRAGMA table_info({fts})")
+        ]
+        if existing == self.columns:
+            return
+
+        column_list = ", ".join(escape(column) for column in self.columns)
+        new_values = ", ".join(f"new.{escape(column)}" for column in self.columns)
+        old_values = ", ".join(f"old.{escape(column)}" for column in self.columns)
+        delete_old = (
+            f"INSERT INTO {fts}({fts}, rowid, {column_list}) "
+            f"VALUES ('delete', old.rowid, {old_values});"
+        )
+        insert_new = f"INSERT INTO {fts}(rowid, {column_list}) VALUES (new.rowid, {new_values});"
+        statements = [
+            f"DROP TABLE IF EXISTS {fts}",
+            f"DROP TRIGGER IF EXISTS {fts}_insert",
+            f"DROP TRIGGER IF EXISTS {fts}_delete",
+            f"DROP TRIGGER IF EXISTS {fts}_update",
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({column_list}, "
+            f"content='{table_name}', content_rowid='rowid', tokenize='trigram')",
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table_name} BEGIN {insert_new} END",
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table_name} BEGIN {delete_old} END",
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE ON {table_name} "
+            f"BEGIN {delete_old} {insert_new} END",
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]
+        db_manager.execute_write([(statement, []) for statement in statements])
+        logger.info("Created FTS5 trigram index %s on %s", fts, ", ".join(self.columns))
+
+    def _ensure_fulltext(self, db_manager: DatabaseManager) -> None:
+        """Create one ngram FULLTEXT index per column, unless it exists"""
+        table_name = db_manager.table_name
+        escape = lambda name: f"{db_manager.escape_char}{name}{db_manager.escape_char}"
+        for column in self.columns:
+            index_name = f"ssrm_ft_{column}"
+            exists = db_manager.execute_count_query(
+                "SELECT COUNT(*) FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+                [table_name, index_name],
+            )
+            if exists:
+                continue
+            db_manager.execute_write(
+                [
+                    (
+                        f"CREATE FULLTEXT INDEX {index_name} ON {table_name} "
+                        f"({escape(column)}) WITH PARSER ngram",
+                        [],
+                    )
+                ]
+            )
+            logger.info("Created FULLTEXT index %s on %s", index_name, table_name)
+
+    def _build_trigrams(self, db_manager: DatabaseManager) -> None:
+        """Rebuild the in-process indexes from the columns' distinct values"""
+        table_name = db_manager.table_name
+        case_sensitive = db_manager.config.database_type in CASE_SENSITIVE_LIKE
+        for column in self.columns:
+            escaped = f"{db_manager.escape_char}{column}{db_manager.escape_char}"
+            _, rows = db_manager.execute_query_columnar(
+                f"SELECT DISTINCT {escaped} FROM {table_name} LIMIT {db_manager.placeholder}",
+                [self.max_values + 1],
+            )
+            with self._lock:
+                self._trigrams.pop((table_name, column), None)
+            if len(rows) > self.max_values:
+                logger.warning(
+                    "Not indexing %s.%s in memory: more than %d distinct values",
+                    table_name,
+                    column,
+                    self.max_values,
+                )
+                continue
+            index = TrigramIndex([row[0] for row in rows], case_sensitive)
+            with self._lock:
+                self._trigrams[(table_name, column)] = index
+
+    def _rewrite_match(self, table_name: str, mode: str, match: TextMatch) -> Predicate:
+        """Index-backed equivalent of one LIKE condition, or the condition itself"""
+        needle = str(match.value)
+        if (
+            match.field not in self.columns
+            or match.condition_type == "notContains"
+            or len(needle) < self.min_length
+            or "%" in needle
+            or "_" in needle
+        ):
+            return match
+
+        pattern = match.params[0]
+        if mode == "fts5":
+            # The FTS5 trigram tokenizer serves LIKE on the FTS table itself
+            rewritten: Predicate = Raw(
+                match.field,
+                f"rowid IN (SELECT rowid FROM {self.fts_table(table_name)} "
+                "WHERE {column} LIKE {p})",
+                [pattern],
+            )
+        elif mode == "fulltext":
+            if '"' in needle:
+                return match
+            # The ngram phrase narrows the rows; LIKE keeps the exact semantics
+            rewritten = Raw(
+                match.field,
+                "MATCH({column}) AGAINST ({p} IN BOOLEAN MODE) AND {column} LIKE {p}",
+                [f'"{needle}"', pattern],
+            )
+        else:
+            index = self._trigrams.get((table_name, match.field))
+            if index is None:
+                return match
+            values = index.matching(match.condition_type, needle)
+            if len(values) > self.max_in_values:
+                return match
+            rewritten = InValues(match.field, values) if values else FALSE
+        self.rewrites += 1
+        return rewritten
+
+    def rewrite(self, predicate: Predicate, table_name: str) -> Predicate:
+        """Replace the substring conditions of a predicate that an index can serve"""
+        mode = self._modes.get(table_name)
+        if mode is None:
+            return predicate
+        if isinstance(predicate, TextMatch):
+            return self._rewrite_match(table_name, mode, predicate)
+        if isinstance(predicate, And):
+            return And([self.rewrite(child, table_name) for child in predicate.children])
+        if isinstance(predicate, Or):
+            return Or([self.rewrite(child, table_name) for child in predicate.children])
+        return predicate
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Stop using in-process indexes until the next ``refresh`` (after writes)"""
+        with self._lock:
+            stale = [
+                key for key in self._trigrams if table_name is None or key[0] == table_name
+            ]
+            for key in stale:
+                del self._trigrams[key]
+            return len(stale)
+
+    def stats(self) -> dict:
+        """Get the mode per table, in-process index sizes and the rewrite count"""
+        return {
+            "modes": dict(self._modes),
+            "memory_indexes": {
+                f"{table}.{column}": len(index.values)
+                for (table, column), index in self._trigrams.items()
+            },
+            "rewrites": self.rewrites,
+        }
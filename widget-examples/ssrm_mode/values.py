@@ -0,0 +1,278 @@
+"""
+Set filter values for SSRM AgGrid application.
+
+AG Grid set filters list the distinct values of a column, narrowed by the
+other active filters. :class:`DistinctValuesCache` keeps these lists per
+column and filter, refreshes them incrementally from rows added since the last
+load, and answers mini-filter searches from a sorted, case-folded index.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import TTLCache
+from database import DatabaseManager
+from filters import TRUE, And, Raw, simplify
+from formatters import clean_json_data
+from models import AgGridOptions, AgRows
+from query_builder import QueryBuilder
+
+logger = logging.getLogger(__name__)
+
+
+# Escape character of LIKE patterns; not a backslash, which MySQL string literals consume
+LIKE_ESCAPE = "!"
+
+
+def like_prefix_pattern(prefix: str) -> str:
+    """LIKE pattern matching values that start with ``prefix`` taken literally"""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        prefix = prefix.replace(char, LIKE_ESCAPE + char)
+    return f"{prefix}%"
+
+
+def _sort_key(value: Any) -> Tuple[bool, bool, Any]:
+    """Order NULL first, then numbers, then strings"""
+    return (value is not None, isinstance(value, str), value if value is not None else 0)
+
+
+class ColumnValues:
+    """Sorted distinct values of a column under one filter, with a prefix index"""
+
+    def __init__(self, values: List[Any], truncated: bool, watermark: Any = None):
+        """
+        Initialize column values.
+
+        Args:
+            values: Distinct values, in any order
+            truncated: The column has more distinct values than were loaded
+            watermark: Highest ``keyset_column`` value seen when loading, for refreshes
+        """
+        self.values = sorted(set(values), key=_sort_key)
+        self.truncated = truncated
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+        self._index: Optional[Tuple[List[str], List[Any]]] = None
+
+    def merge(self, values: List[Any], watermark: Any) -> "ColumnValues":
+        """New entry holding these values and additional ones"""
+        return ColumnValues(self.values + values, self.truncated, watermark)
+
+    def search(self, prefix: str) -> List[Any]:
+        """Values whose text starts with ``prefix``, ignoring case, in index order"""
+        if self._index is None:
+            # Built on the first search: (folded text, value) sorted by folded text
+            pairs = sorted(
+                (str(value).casefold(), value) for value in self.values if value is not None
+            )
+            self._index = ([folded for folded, _ in pairs], [value for _, value in pairs])
+        keys, values = self._index
+        folded = prefix.casefold()
+        start = bisect.bisect_left(keys, folded)
+        end = start
+        while end < len(keys) and keys[end].startswith(folded):
+            end += 1
+        return values[start:end]
+
+
+class DistinctValuesCache:
+    """
+    Distinct column values for set filters, cached per column and filter.
+
+    Columns with more than ``max_values`` distinct values are kept truncated;
+    searches on them run a case-insensitive prefix query against the database
+    instead. As that query compares ``LOWER(column)``, it scans rather than
+    seeks a plain index on the column: the sorted prefix index only exists for
+    the values held in memory, and database searches are cached per prefix.
+    Entries older than ``refresh_interval`` seconds are refreshed: when the
+    database has a ``keyset_column`` (assumed to grow with inserts), only rows
+    above the previous maximum are read, otherwise the list is reloaded. Updates
+    and deletes are not seen incrementally; ``invalidate`` drops the lists.
+    """
+
+    def __init__(
+        self,
+        max_values: int = 10_000,
+        refresh_interval: Optional[float] = 300.0,
+        max_entries: int = 256,
+    ):
+        """
+        Initialize distinct values cache.
+
+        Args:
+            max_values: Distinct values kept per column and filter
+            refresh_interval: Seconds before a list is refreshed; None never
+            max_entries: Column/filter combinations kept before LRU eviction
+        """
+        self.max_values = max_values
+        self.refresh_interval = refresh_interval
+        self._cache = TTLCache(max_entries=max_entries, ttl=None)
+        self._searches = TTLCache(max_entries=max_entries, ttl=refresh_interval)
+        self.loads = 0
+        self.refreshes = 0
+        self.database_searches = 0
+
+    def _where_predicate(
+        self, db_manager: DatabaseManager, column: str, filter_model: Optional[Dict[str, Any]]
+    ):
+        """Simplified predicate of the active filters, except the column's own"""
+        options = AgGridOptions(
+            startRow=0,
+            endRow=0,
+            filterModel={
+                field: config for field, config in (filter_model or {}).items() if field != column
+            },
+        )
+        query_builder = QueryBuilder(
+            ag_rows=AgRows(query="", options=options, escape=db_manager.escape_char),
+            table_name=db_manager.table_name,
+            escape_char=db_manager.escape_char,
+            placeholder=db_manager.placeholder,
+        )
+        return query_builder.create_where_predicate()
+
+    def _select(
+        self,
+        db_manager: DatabaseManager,
+        column: str,
+        predicate,
+        limit: Optional[int] = None,
+    ) -> List[Any]:
+        """Run ``SELECT DISTINCT column`` under a predicate"""
+        escape = lambda name: f"{db_manager.escape_char}{name}{db_manager.escape_char}"
+        query = f"SELECT DISTINCT {escape(column)} AS value FROM {db_manager.table_name}"
+        params: List[Any] = []
+        if predicate != TRUE:
+            where_sql, params = predicate.to_sql(escape, db_manager.placeholder)
+            query += f" WHERE {where_sql}"
+        if limit is not None:
+            query += f" ORDER BY {escape(column)} LIMIT {db_manager.placeholder}"
+            params = params + [limit]
+        return [row["value"] for row in db_manager.execute_query(query, params)]
+
+    def _watermark(self, db_manager: DatabaseManager) -> Any:
+        if not db_manager.keyset_column:
+            return None
+        escaped = f"{db_manager.escape_char}{db_manager.keyset_column}{db_manager.escape_char}"
+        rows = db_manager.execute_query(
+            f"SELECT MAX({escaped}) AS watermark FROM {db_manager.table_name}"
+        )
+        return rows[0]["watermark"] if rows else None
+
+    def _load(self, db_manager: DatabaseManager, column: str, predicate) -> ColumnValues:
+        watermark = self._watermark(db_manager)
+        values = self._select(db_manager, column, predicate, limit=self.max_values + 1)
+        self.loads += 1
+        truncated = len(values) > self.max_values
+        return ColumnValues(values[: self.max_values], truncated, watermark)
+
+    def _refresh(
+        self, db_manager: DatabaseManager, column: str, predicate, entry: ColumnValues
+    ) -> ColumnValues:
+        if entry.truncated or entry.watermark is None:
+            return self._load(db_manager, column, predicate)
+
+        watermark = self._watermark(db_manager)
+        added = []
+        if watermark != entry.watermark:
+            since = Raw(db_manager.keyset_column, "{column} > {p}", [entry.watermark])
+            added = self._select(db_manager, column, simplify(And([predicate, since])))
+        self.refreshes += 1
+        refreshed = entry.merge(added, watermark)
+        if len(refreshed.values) > self.max_values:
+            return self._load(db_manager, column, predicate)
+        return refreshed
+
+    def get_values(
+        self,
+        db_manager: DatabaseManager,
+        column: str,
+        filter_model: Optional[Dict[str, Any]] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get the distinct values of a column for a set filter.
+
+        Args:
+            db_manager: Database of the configured table
+            column: Column whose values are listed
+            filter_model: Active filters; the column's own filter is ignored
+            search: Only values starting with this text (case-insensitive)
+            limit: Maximum number of values returned
+
+        Returns:
+            Dict[str, Any]: ``values`` and ``truncated`` (more values exist than returned)
+        """
+        predicate = self._where_predicate(db_manager, column, filter_model)
+        key = (db_manager.table_name, column, predicate.key())
+
+        entry = self._cache.get(key)
+        if entry is None:
+            entry = self._load(db_manager, column, predicate)
+            self._cache.set(key, entry)
+        elif (
+            self.refresh_interval is not None
+            and time.monotonic() - entry.loaded_at > self.refresh_interval
+        ):
+            entry = self._refresh(db_manager, column, predicate, entry)
+            self._cache.set(key, entry)
+
+        truncated = entry.truncated
+        if search and entry.truncated:
+            # Values beyond the cached ones may match; ask the database
+            search_key = key + (search,)
+            values = self._searches.get(search_key)
+            if values is None:
+                like = Raw(
+                    column,
+                    f"LOWER({{column}}) LIKE LOWER({{p}}) ESCAPE '{LIKE_ESCAPE}'",
+                    [like_prefix_pattern(search)],
+                )
+                values = self._select(
+                    db_manager, column, simplify(And([predicate, like])), self.max_values + 1
+                )
+                self._searches.set(search_key, values)
+                self.database_searches += 1
+            truncated = len(values) > self.max_values
+            values = sorted(values[: self.max_values], key=_sort_key)
+        elif search:
+            values = entry.search(search)
+        else:
+            values = entry.values
+
+        if limit is not None and len(values) > limit:
+            values = values[:limit]
+            truncated = True
+        return {"values": clean_json_data(list(values)), "truncated": truncated}
+
+    async def get_values_async(
+        self, db_manager: DatabaseManager, column: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Run ``get_values`` on the database executor without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            db_manager.executor, lambda: self.get_values(db_manager, column, **kwargs)
+        )
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """Drop cached values, e.g. after rows were updated or deleted"""
+        if table_name is None:
+            self._searches.invalidate()
+            return self._cache.invalidate()
+        self._searches.invalidate(lambda key: key[0] == table_name)
+        return self._cache.invalidate(lambda key: key[0] == table_name)
+
+    def stats(self) -> dict:
+        """Get hit/miss counters and load/refresh/search counts"""
+        return {
+            "entries": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "loads": self.loads,
+            "refreshes": self.refreshes,
+            "database_searches": self.database_searches,
+        }